@@ -0,0 +1,62 @@
+"""
+Benchmark the construction of the reports.
+
+The models are built and updated like `apd.parse_page()` does, with the values produced by the parser either trusted,
+or validated again like in strict mode.
+"""
+import datetime
+import timeit
+
+from scrapd.core import deceased
+from scrapd.core import model
+
+# Number of reports built by each run.
+REPORTS = 1000
+
+
+def build_report():
+    """Build a report from the values produced by the parser."""
+    report = model.Report(
+        case='19-123456',
+        crash='50',
+        date=datetime.date(2019, 7, 7),
+        location='10500 block of N IH 35 SB',
+        time=datetime.time(4, 54),
+    )
+    fatalities = [fatality for fatality, _ in deceased.process_deceased_field('Hispanic male, 19 years of age')]
+    fatalities += [fatality for fatality, _ in deceased.process_deceased_field('John Doe | White male | 01/02/1990')]
+    report.assign('fatalities', fatalities)
+    report.compute_fatalities_age()
+    report.assign('notes', 'The preliminary investigation shows that the driver lost control of the vehicle.')
+
+    result = model.Report.trusted(case='19-123456')
+    result.update(report, trusted=True)
+    result.assign('link', 'http://austintexas.gov/news/traffic-fatality-50-4')
+    return result
+
+
+def benchmark(strict):
+    """
+    Measure the cost of building a report.
+
+    :param bool strict: `True` to validate the values produced by the parser
+    :return: the best time to build a report, in microseconds.
+    :rtype: float
+    """
+    model.set_strict_validation(strict)
+    try:
+        return min(timeit.repeat(build_report, number=REPORTS, repeat=5)) / REPORTS * 1e6
+    finally:
+        model.set_strict_validation(False)
+
+
+def main():
+    """Compare the cost of building a report with and without the validation of the trusted values."""
+    validated = benchmark(True)
+    trusted = benchmark(False)
+    print(f'validated: {validated:.1f} µs/report')
+    print(f'trusted:   {trusted:.1f} µs/report ({validated / trusted:.2f}x faster)')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 """Define the top-level cli command."""
 import asyncio
+import contextlib
 import logging
 import sys
 
@@ -8,7 +9,16 @@ from loguru import logger
 
 from scrapd.cli.base import AbstractCommand
 from scrapd.core import apd
+from scrapd.core import article
+from scrapd.core import cache
+from scrapd.core import crawl
+from scrapd.core import date_utils
+from scrapd.core import deceased
+from scrapd.core import state
+from scrapd.core import store
+from scrapd.core.formatter import FanOut
 from scrapd.core.formatter import Formatter
+from scrapd.core.formatter import open_output
 from scrapd.core.version import detect_from_metadata
 
 # Set the project name.
@@ -18,12 +28,70 @@ APP_NAME = 'scrapd'
 __version__ = detect_from_metadata(APP_NAME)
 
 
+def parse_outputs(ctx, param, value):  # pylint: disable=unused-argument
+    """
+    Parse the `FORMAT:PATH` values of the `--output` option.
+
+    :param click.Context ctx: the context
+    :param click.Parameter param: the option
+    :param tuple value: the values
+    :return: the formats and the paths.
+    :rtype: list
+    """
+    outputs = []
+    for output in value:
+        format_, _, path = output.partition(':')
+        format_ = format_.lower()
+        if format_ not in Formatter.formatters or not path:
+            formats = ', '.join(sorted(Formatter.formatters))
+            raise click.BadParameter(f'"{output}" is not like FORMAT:PATH, with FORMAT in {formats}.')
+        outputs.append((format_, path))
+    return outputs
+
+
 # pylint: disable=unused-argument
 #   The arguments are used via the `self.args` dict of the `AbstractCommand` class.
 @click.version_option(version=__version__)
-@click.command()
+@click.group(invoke_without_command=True)
+@click.option('--append', is_flag=True, help='append to an existing output, without the CSV header', show_default=True)
 @click.option('-a', '--attempts', type=click.INT, default=3, help='number of attempts per report', show_default=True)
 @click.option('-b', '--backoff', type=click.INT, default=3, help='initial backoff time (second)', show_default=True)
+@click.option(
+    '--cache',
+    'cache_dir',
+    type=click.Path(file_okay=False),
+    help='store the HTTP responses into a cache directory',
+)
+@click.option(
+    '--cache-size',
+    type=click.IntRange(min=0),
+    default=cache.DEFAULT_MAX_SIZE // 1024 // 1024,
+    help='maximum size of the cache (MB)',
+    show_default=True,
+)
+@click.option(
+    '--cache-ttl-detail',
+    type=click.IntRange(min=0),
+    default=cache.DEFAULT_DETAIL_TTL,
+    help='time to live of the cached detail pages (second)',
+    show_default=True,
+)
+@click.option(
+    '--cache-ttl-listing',
+    type=click.IntRange(min=0),
+    default=cache.DEFAULT_LISTING_TTL,
+    help='time to live of the cached news pages (second)',
+    show_default=True,
+)
+@click.option('--compact', is_flag=True, help='print compact JSON: no indentation, unsorted keys', show_default=True)
+@click.option(
+    '-c',
+    '--concurrency',
+    type=click.IntRange(min=1),
+    default=10,
+    help='maximum number of detail pages processed at the same time',
+    show_default=True,
+)
 @click.option('--dump', is_flag=True, help='dump reports with parsing issues', show_default=True)
 @click.option(
     '-f',
@@ -35,11 +103,89 @@ __version__ = detect_from_metadata(APP_NAME)
     show_default=True,
 )
 @click.option('--from', 'from_', help='start date')
+@click.option(
+    '--html-parser',
+    type=click.Choice(['auto', *article.HTML_PARSERS]),
+    default='auto',
+    help='parser of the detail pages, "auto" selects the fastest one installed',
+    show_default=True,
+)
+@click.option(
+    '--incremental',
+    type=click.Path(dir_okay=False),
+    help='only retrieve the reports which are not recorded in the state file, then update it',
+)
+@click.option(
+    '--listing-concurrency',
+    type=click.IntRange(min=1),
+    default=4,
+    help='maximum number of news pages fetched at the same time',
+    show_default=True,
+)
+@click.option(
+    '--output',
+    multiple=True,
+    callback=parse_outputs,
+    help='write the results in a format to a path ("-" for stdout) instead, e.g. csv:fatalities.csv (repeatable)',
+)
 @click.option('--pages', default=-1, help='number pages to process')
+@click.option(
+    '--parse-cache-size',
+    type=click.IntRange(min=0),
+    default=date_utils.DEFAULT_CACHE_SIZE,
+    help='maximum number of dates and times memoized by each parse worker, the statistics of the caches are only '
+    'logged with the inline and thread executors',
+    show_default=True,
+)
+@click.option(
+    '--parse-executor',
+    type=click.Choice(apd.PARSE_EXECUTORS),
+    default='process',
+    help='executor parsing the detail pages',
+    show_default=True,
+)
+@click.option(
+    '--parse-workers',
+    type=click.IntRange(min=1),
+    help='number of workers parsing the detail pages  [default: number of CPUs]',
+)
+@click.option(
+    '--store',
+    'store_path',
+    type=click.Path(dir_okay=False),
+    help='also store the reports into a SQLite database, merged with the stored ones',
+)
+@click.option('--strict', is_flag=True, help='validate all the values produced by the parser', show_default=True)
 @click.option('--to', help='end date')
 @click.option('-v', '--verbose', count=True, help='adjust the log level')
 @click.pass_context
-def cli(ctx, attempts, backoff, dump, format_, from_, pages, to, verbose):  # noqa: D403
+def cli(
+        ctx,
+        append,
+        attempts,
+        backoff,
+        cache_dir,
+        cache_size,
+        cache_ttl_detail,
+        cache_ttl_listing,
+        compact,
+        concurrency,
+        dump,
+        format_,
+        from_,
+        html_parser,
+        incremental,
+        listing_concurrency,
+        output,
+        pages,
+        parse_cache_size,
+        parse_executor,
+        parse_workers,
+        store_path,
+        strict,
+        to,
+        verbose,
+):  # noqa: D403
     """Retrieve APD's traffic fatality reports."""
     ctx.obj = {**ctx.params}
     ctx.auto_envvar_prefix = 'VZ'
@@ -65,8 +211,36 @@ def cli(ctx, attempts, backoff, dump, format_, from_, pages, to, verbose):  # no
     # Add the logger.
     logger.add(sys.stderr, format=log_format, level=log_level, colorize=True)
 
-    # Prepare the command.
-    command = Retrieve(ctx.params, ctx.obj)
+    # Retrieve the reports, unless a subcommand is invoked.
+    if ctx.invoked_subcommand is None:
+        command = Retrieve(ctx.params, ctx.obj)
+        command.execute()
+
+
+# The options of the query are defaulted to the ones given before the subcommand, e.g. `scrapd --format csv query`.
+@cli.command()
+@click.option('--append', is_flag=True, help='append to an existing output, without the CSV header', show_default=True)
+@click.option('--compact', is_flag=True, help='print compact JSON: no indentation, unsorted keys', show_default=True)
+@click.option(
+    '-f',
+    '--format',
+    'format_',
+    type=click.Choice(sorted(Formatter.formatters)),
+    help='specify output format  [default: json]',
+)
+@click.option('--from', 'from_', help='start date')
+@click.option(
+    '--store',
+    'store_path',
+    type=click.Path(exists=True, dir_okay=False),
+    required=True,
+    help='SQLite database filled by the --store option of the retrieval',
+)
+@click.option('--to', help='end date')
+@click.pass_context
+def query(ctx, append, compact, format_, from_, store_path, to):
+    """Query the reports stored by the --store option, offline."""
+    command = Query(ctx.params, ctx.obj)
     command.execute()
 
 
@@ -75,20 +249,115 @@ class Retrieve(AbstractCommand):
 
     def _execute(self):
         """Define the internal execution of the command."""
-        # Collect the results.
-        results, _ = asyncio.run(
-            apd.async_retrieve(
-                self.args['pages'],
-                self.args['from_'],
-                self.args['to'],
-                self.args['attempts'],
-                self.args['backoff'],
-                self.args['dump'],
-            ))
-        result_count = len(results)
+        # Prepare the response cache.
+        response_cache = None
+        if self.args['cache_dir']:
+            response_cache = cache.ResponseCache(
+                self.args['cache_dir'],
+                listing_ttl=self.args['cache_ttl_listing'],
+                detail_ttl=self.args['cache_ttl_detail'],
+                max_size=self.args['cache_size'] * 1024 * 1024,
+            )
+
+        # Load the state of the previous crawl.
+        crawl_state = state.CrawlState.load(self.args['incremental']) if self.args['incremental'] else None
+
+        # Select the HTML parser.
+        html_parser = self.args['html_parser']
+        if html_parser == 'auto':
+            html_parser = article.detect_html_parser()
+        elif html_parser not in article.available_html_parsers():
+            raise ValueError(f'The HTML parser "{html_parser}" is not installed.')
+        logger.debug(f'Parsing the detail pages with {html_parser}.')
+
+        # Open the report store.
+        report_store = store.ReportStore(self.args['store_path']) if self.args['store_path'] else None
+
+        # Prepare the executor parsing the detail pages, which is shut down once the crawl is over.
+        executor = apd.create_parse_executor(
+            self.args['parse_executor'],
+            self.args['parse_workers'],
+            self.args['parse_cache_size'],
+            self.args['strict'],
+        )
+
+        # Print the results as they are retrieved.
+        try:
+            reports = crawl.iter_reports(
+                pages=self.args['pages'],
+                from_=self.args['from_'],
+                to=self.args['to'],
+                attempts=self.args['attempts'],
+                backoff=self.args['backoff'],
+                dump=self.args['dump'],
+                concurrency=self.args['concurrency'],
+                cache=response_cache,
+                state=crawl_state,
+                listing_concurrency=self.args['listing_concurrency'],
+                executor=executor,
+                html_parser=html_parser,
+            )
+            if report_store:
+                reports = report_store.tee(reports)
+            with contextlib.ExitStack() as stack:
+                formatter = self.open_formatter(stack)
+                result_count = asyncio.run(
+                    formatter.aprint(reports, append=self.args['append'], compact=self.args['compact']))
+        finally:
+            if executor:
+                executor.shutdown()
+            if report_store:
+                report_store.close()
         logger.info(f'Total: {result_count}')
+        # The parse caches of the worker processes are not visible from here.
+        date_utils.log_parse_stats(caches=self.args['parse_executor'] != 'process')
+        deceased.log_parse_stats()
+
+        # Save the state for the next crawl.
+        if crawl_state:
+            crawl_state.save(self.args['incremental'])
+
+    def open_formatter(self, stack):
+        """
+        Open the formatter printing the results.
+
+        Each `--output` is printed by its own formatter, in its own file, and the results are sent to all of them by a
+        fan-out. The files are only replaced once all the results are printed. Otherwise the results are printed to
+        stdout, in the format specified by `--format`.
+
+        :param contextlib.ExitStack stack: the stack closing the files
+        :return: the formatter.
+        :rtype: Formatter
+        """
+        if not self.args['output']:
+            return Formatter(self.args['format_'].lower(), compact=self.args['compact'])
+
+        formatters = []
+        for format_, path in self.args['output']:
+            output = None if path == '-' else stack.enter_context(open_output(path, self.args['append']))
+            formatters.append(Formatter(format_, output, compact=self.args['compact']))
+        return FanOut(formatters)
+
+
+class Query(AbstractCommand):
+    """Query the reports stored in a SQLite database."""
+
+    def _execute(self):
+        """Define the internal execution of the command."""
+        from_date = date_utils.from_date(self.option('from_'))
+        to_date = date_utils.to_date(self.option('to'))
+        with store.ReportStore(self.args['store_path']) as report_store:
+            results = list(report_store.query(from_date, to_date))
+
+        formatter = Formatter(self.option('format_').lower(), compact=self.option('compact'))
+        formatter.print(results, append=self.option('append'), compact=self.option('compact'))
+        logger.info(f'Total: {len(results)}')
+
+    def option(self, name):
+        """
+        Return the value of an option of the command, or of the program if it is not specified.
 
-        # Get the format and print the results.
-        format_ = self.args['format_'].lower()
-        formatter = Formatter(format_)
-        formatter.print(results)
+        :param str name: the name of the option
+        :return: the value of the option.
+        """
+        return self.args[name] or self.global_args.get(name)
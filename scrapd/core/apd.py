@@ -1,7 +1,12 @@
 """Define the module containing the function used to scrap data from the APD website."""
 import asyncio
+import concurrent.futures
+import contextvars
+import datetime
+import os
 from pathlib import Path
 import re
+from typing import NamedTuple
 from urllib.parse import urljoin
 
 import aiohttp
@@ -13,18 +18,45 @@ from tenacity import wait_exponential
 from scrapd.core import article
 from scrapd.core import constant
 from scrapd.core import date_utils
+from scrapd.core import deceased
 from scrapd.core import model
 from scrapd.core.regex import match_pattern
 
 APD_URL = 'http://austintexas.gov/department/news/296'
 PAGE_DETAILS_URL = 'http://austintexas.gov/'
 
+# Available executors to parse the detail pages.
+PARSE_EXECUTORS = ['inline', 'process', 'thread']
+
+# Number of days between the crash date and the release date of a report beyond which a report is skipped without
+# being fetched.
+RELEASE_DATE_MARGIN = 30
+
+# The parse statistics, which are also collected from the parse worker processes.
+PARSE_STATS = [date_utils.STATS, deceased.STATS]
+
+
+class NewsEntry(NamedTuple):
+    """Represent a fatality entry of a news page."""
+
+    url: str
+    title: str
+    crash: int
+    release_date: datetime.date = None
+
+
+# The response cache used by `fetch_text`, disabled by default.
+response_cache = contextvars.ContextVar('response_cache', default=None)
+
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=3), reraise=True)
 async def fetch_text(session, url, params=None):
     """
     Fetch the data from a URL as text.
 
+    If a response cache is set, a fresh cached response is returned without any request, and an expired one is
+    revalidated with a conditional request.
+
     :param aiohttp.ClientSession session: aiohttp session
     :param str url: request URL
     :param dict params: request paramemters, defaults to None
@@ -33,10 +65,31 @@ async def fetch_text(session, url, params=None):
     """
     if not params:
         params = {}
+
+    # Look for a cached response.
+    cache = response_cache.get()
+    entry = cache.get(url, params) if cache else None
+    headers = {}
+    if entry:
+        ttl = cache.listing_ttl if url == APD_URL else cache.detail_ttl
+        if entry.is_fresh(ttl):
+            logger.trace(f'Cache hit for {url} {params}')
+            return entry.body
+        headers = entry.validators()
+
     try:
-        async with session.get(url, params=params) as response:
+        async with session.get(url, params=params, headers=headers) as response:
             logger.debug(response.url)
-            return await response.text()
+
+            # The cached response is still valid.
+            if entry and response.status == 304:
+                cache.refresh(url, params, entry)
+                return entry.body
+
+            text = await response.text()
+            if cache and response.status == 200:
+                cache.set(url, params, text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            return text
     except (
             aiohttp.ClientError,
             aiohttp.http_exceptions.HttpProcessingError,
@@ -74,41 +127,134 @@ async def fetch_detail_page(session, url):
     return await fetch_text(session, url)
 
 
-def extract_traffic_fatalities_page_details_link(news_page):
+def parse_news_page(news_page):
     """
-    Extract the fatality detail page links from the news page.
+    Parse the fatality entries of a news page.
 
-    :param str news_page: html content of the new pages
-    :return: a list of links.
-    :rtype: list or `None`
+    :param str news_page: html content of the news page
+    :return: the fatality entries of the page.
+    :rtype: list(NewsEntry)
     """
-    regex = re.compile(
+    entry_pattern = re.compile(
         r'''
-        (?:
-            (/news/traffic-fatality-(\d{1,3})(?:-(\d?|[a-z]+))?)\"
-            |
-            (/news/fatality-crash-(\d{1,3})-(\d))
-        )
+        news-release-date\">                # The release date field.
+        \s*<div\sclass=\"field-content\">   # Its content.
+        ([^<]*)                             # Capture the release date.
+        </div>
+        (?:(?!news-release-date).)*?        # Anything but the next entry.
+        <a\s+href=\"([^\"]+)\"[^>]*>        # Capture the link.
+        ([^<]*)                             # Capture the title.
+        </a>
         ''',
-        re.VERBOSE | re.MULTILINE,
+        re.VERBOSE | re.DOTALL,
+    )
+    link_pattern = re.compile(r'^/news/(?:traffic-fatality|fatality-crash)-(\d{1,3})(?:-(?:\d?|[a-z]+))?$')
+
+    entries = []
+    for release, link, title in entry_pattern.findall(news_page):
+        link_match = link_pattern.match(link)
+        if not link_match:
+            continue
+        try:
+            release_date = date_utils.parse_date(release.strip())
+        except ValueError:
+            release_date = None
+        entries.append(
+            NewsEntry(
+                url=urljoin(PAGE_DETAILS_URL, link),
+                title=' '.join(title.split()),
+                crash=int(link_match.group(1)),
+                release_date=release_date,
+            ))
+    return entries
+
+
+def parse_release_dates(news_page):
+    """
+    Parse the release dates of all the entries of a news page.
+
+    :param str news_page: html content of the news page
+    :return: the release dates which could be parsed.
+    :rtype: list(datetime.date)
+    """
+    release_date_pattern = re.compile(
+        r'''
+        news-release-date\">                # The release date field.
+        \s*<div\sclass=\"field-content\">   # Its content.
+        ([^<]*)                             # Capture the release date.
+        </div>
+        ''',
+        re.VERBOSE,
     )
-    matches = regex.findall(news_page, re.MULTILINE)
-    compact_matches = []
-    for match in matches:
-        parts = tuple(part for part in match if part != '')
-        compact_matches.append(parts)
-    return compact_matches
+    release_dates = []
+    for release in release_date_pattern.findall(news_page):
+        try:
+            release_dates.append(date_utils.parse_date(release.strip()))
+        except ValueError:
+            continue
+    return release_dates
 
 
-def generate_detail_page_urls(titles):
+def reaches_date(news_page, to_date, margin=RELEASE_DATE_MARGIN):
     """
-    Generate the full URLs of the fatality detail pages.
+    Return `True` if a news page contains entries released around or before a date.
 
-    :param list titles: a list of partial link
-    :return: a list of full links to the fatality detail pages.
-    :rtype: list
+    A page without any release date is considered to reach the date.
+
+    :param str news_page: html content of the news page
+    :param datetime.date to_date: the end date
+    :param int margin: safety margin (day)
+    :rtype: bool
     """
-    return [urljoin(PAGE_DETAILS_URL, title[0]) for title in titles]
+    release_dates = parse_release_dates(news_page)
+    if not release_dates:
+        return True
+    return min(release_dates) - datetime.timedelta(days=margin) <= to_date
+
+
+def is_released_before(entry, from_date, margin=RELEASE_DATE_MARGIN):
+    """
+    Return `True` if an entry was clearly released before a date.
+
+    A report is released after the crash, therefore if the release date is before the start date, so is the crash.
+
+    :param NewsEntry entry: the news entry
+    :param datetime.date from_date: the start date
+    :param int margin: safety margin (day)
+    :rtype: bool
+    """
+    if not entry.release_date or not from_date:
+        return False
+    return entry.release_date + datetime.timedelta(days=margin) < from_date
+
+
+def is_released_after(entry, to_date, margin=RELEASE_DATE_MARGIN):
+    """
+    Return `True` if an entry was clearly released after a date.
+
+    A report is usually released a few days after the crash, the margin covers the reports released later.
+
+    :param NewsEntry entry: the news entry
+    :param datetime.date to_date: the end date
+    :param int margin: safety margin (day)
+    :rtype: bool
+    """
+    if not entry.release_date or not to_date:
+        return False
+    return entry.release_date - datetime.timedelta(days=margin) > to_date
+
+
+def is_released_within(entry, from_date, to_date, margin=RELEASE_DATE_MARGIN):
+    """
+    Return `True` unless an entry was clearly released outside of a time range.
+
+    :param NewsEntry entry: the news entry
+    :param datetime.date from_date: the start date
+    :param datetime.date to_date: the end date
+    :param int margin: safety margin (day)
+    :rtype: bool
+    """
+    return not is_released_before(entry, from_date, margin) and not is_released_after(entry, to_date, margin)
 
 
 def has_next(news_page):
@@ -134,20 +280,47 @@ def has_next(news_page):
     return bool(element)
 
 
-def parse_page(page, url, dump=False):
+def parse_last_page(news_page):
+    """
+    Return the number of the last news page, using the "last page" link of the pager.
+
+    The page number starts at 1.
+
+    :param str news_page: the news page to parse
+    :return: the number of the last news page, or `None` if the pager does not have a "last page" link.
+    :rtype: int
+    """
+    if not news_page:
+        return None
+
+    pattern = re.compile(
+        r'''
+        href=\"\?page=(\d+)\"       # The page parameter (starting at 0).
+        [^>]*                       # Any other attribute.
+        rel=\"last\"                # The link to the last page.
+        ''',
+        re.VERBOSE,
+    )
+    element = match_pattern(news_page, pattern)
+    return int(element) + 1 if element else None
+
+
+def parse_page(page, url, dump=False, html_parser='html.parser'):
     """
     Parse the page using all parsing methods available.
 
     :param str page: the content of the fatality page
     :param str url: detail page URL
+    :param bool dump: dump reports with parsing issues
+    :param str html_parser: the HTML parser, one of `article.HTML_PARSERS`
     :return: a dictionary representing a fatality.
     :rtype: dict
     """
-    report = model.Report(case='19-123456')
+    report = model.Report.trusted(case='19-123456')
 
     # Parse the page.
-    article_report, artricle_err = article.parse_content(page)
-    report.update(article_report)
+    article_report, artricle_err = article.parse_content(page, html_parser)
+    report.update(article_report, trusted=True)
     if artricle_err:  # pragma: no cover
         article_err_str = f'\nArticle fields:\n\t * ' + "\n\t * ".join(artricle_err) if artricle_err else ''
         logger.debug(f'Errors while parsing {url}:{article_err_str}')
@@ -163,13 +336,86 @@ def parse_page(page, url, dump=False):
     return report
 
 
+def create_parse_executor(kind='process', workers=None, cache_size=None, strict=False):
+    """
+    Create the executor parsing the detail pages.
+
+    * `process`: the pages are parsed in a pool of processes, using all the cores.
+    * `thread`: the pages are parsed in a pool of threads.
+    * `inline`: the pages are parsed in the event loop.
+
+    Each worker is set up by `init_parse_worker` when it starts.
+
+    :param str kind: the kind of executor, defaults to `process`
+    :param int workers: the number of workers, defaults to None to use the number of CPUs
+    :param int cache_size: the maximum number of results kept in each parse cache, defaults to None to keep the current
+        size
+    :param bool strict: `True` to validate the values produced by the parser, defaults to False
+    :return: the executor, or `None` to parse the pages in the event loop.
+    :rtype: concurrent.futures.Executor
+    """
+    workers = workers or os.cpu_count()
+    if kind == 'process':
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_parse_worker,
+            initargs=(cache_size, strict),
+        )
+    if kind == 'thread':
+        # The threads share the caches and the settings of the current process.
+        init_parse_worker(cache_size, strict)
+        return concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    if kind == 'inline':
+        init_parse_worker(cache_size, strict)
+        return None
+    raise ValueError(f'invalid parse executor: "{kind}"')
+
+
+def init_parse_worker(cache_size=None, strict=False):
+    """
+    Set up a process parsing the detail pages.
+
+    The `dateparser` data is loaded, the parse caches are sized and the validation mode of the models is set.
+
+    :param int cache_size: the maximum number of results kept in each parse cache, defaults to None to keep the current
+        size
+    :param bool strict: `True` to validate the values produced by the parser, defaults to False
+    """
+    date_utils.warm_up(cache_size)
+    model.set_strict_validation(strict)
+
+
+def parse_page_in_worker(page, url, dump=False, html_parser='html.parser'):
+    """
+    Parse a detail page in a worker process.
+
+    The parse statistics of a worker process are not visible from the main process, therefore the statistics of the
+    parse are returned with the report, in order to be merged into `PARSE_STATS` by the main process.
+
+    :param str page: the content of the fatality page
+    :param str url: detail page URL
+    :param bool dump: dump reports with parsing issues
+    :param str html_parser: the HTML parser, one of `article.HTML_PARSERS`
+    :return: the report and the statistics of the parse.
+    :rtype: tuple
+    """
+    for stats in PARSE_STATS:
+        stats.clear()
+    report = parse_page(page, url, dump, html_parser)
+    return report, [stats.copy() for stats in PARSE_STATS]
+
+
 @retry()
-async def fetch_and_parse(session, url, dump=False):
+async def fetch_and_parse(session, url, dump=False, executor=None, html_parser='html.parser'):
     """
     Parse a fatality page from a URL.
 
     :param aiohttp.ClientSession session: aiohttp session
     :param str url: detail page URL
+    :param bool dump: dump reports with parsing issues
+    :param concurrent.futures.Executor executor: the executor parsing the page, defaults to None to parse it in the
+        event loop
+    :param str html_parser: the HTML parser, one of `article.HTML_PARSERS`
     :return: a dictionary representing a fatality.
     :rtype: dict
     """
@@ -179,99 +425,19 @@ async def fetch_and_parse(session, url, dump=False):
         raise ValueError(f'The URL {url} returned a 0-length content.')
 
     # Parse it.
-    report = parse_page(page, url, dump)
+    loop = asyncio.get_event_loop()
+    if isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+        report, worker_stats = await loop.run_in_executor(executor, parse_page_in_worker, page, url, dump, html_parser)
+        for stats, counts in zip(PARSE_STATS, worker_stats):
+            stats.update(counts)
+    elif executor:
+        report = await loop.run_in_executor(executor, parse_page, page, url, dump, html_parser)
+    else:
+        report = parse_page(page, url, dump, html_parser)
     if not report:
         raise ValueError(f'No data could be extracted from the page {url}.')
 
     # Add the report link.
-    report.link = url
+    report.assign('link', url)
 
     return report
-
-
-async def async_retrieve(pages=-1, from_=None, to=None, attempts=1, backoff=1, dump=False):
-    """
-    Retrieve fatality data.
-
-    :param str pages: number of pages to retrieve or -1 for all
-    :param str from_: the start date
-    :param str to: the end date
-    :param int attempts: number of attempts per report
-    :param int backoff: initial backoff time (second)
-    :param bool dump: dump reports with parsing issues
-    :return: the list of fatalities and the number of pages that were read.
-    :rtype: tuple
-    """
-    res = {}
-    page = 1
-    has_entries = False
-    no_date_within_range_count = 0
-    from_date = date_utils.from_date(from_)
-    to_date = date_utils.to_date(to)
-
-    logger.debug(f'Retrieving fatalities from {from_date} to {to_date}.')
-
-    async with aiohttp.ClientSession() as session:
-        while True:
-            # Fetch the news page.
-            logger.info(f'Fetching page {page}...')
-            try:
-                news_page = await fetch_news_page(session, page)
-            except Exception:
-                raise ValueError(f'Cannot retrieve news page #{page}.')
-
-            # Looks for traffic fatality links.
-            page_details_links = extract_traffic_fatalities_page_details_link(news_page)
-
-            # Generate the full URL for the links.
-            links = generate_detail_page_urls(page_details_links)
-            logger.debug(f'{len(links)} fatality page(s) to process.')
-
-            # Fetch and parse each link.
-            tasks = [
-                fetch_and_parse.retry_with(
-                    stop=stop_after_attempt(attempts),
-                    wait=wait_exponential(multiplier=backoff),
-                    reraise=True,
-                )(session, link, dump) for link in links
-            ]
-            page_res = await asyncio.gather(*tasks)
-
-            if page_res:
-                # If the page contains fatalities, ensure all of them happened within the specified time range.
-                entries_in_time_range = [
-                    entry for entry in page_res if date_utils.is_between(entry.date, from_date, to_date)
-                ]
-
-                # If 2 pages in a row:
-                #   1) contain results
-                #   2) but none of them contain dates within the time range
-                #   3) and we did not collect any valid entries
-                # Then we can stop the operation.
-                past_entries = all([date_utils.is_before(entry.date, from_date) for entry in page_res])
-                if from_ and past_entries and not has_entries:
-                    no_date_within_range_count += 1
-                if no_date_within_range_count > 1:
-                    logger.debug(f'{len(entries_in_time_range)} fatality page(s) within the specified time range.')
-                    break
-
-                # Check whether we found entries in the previous pages.
-                if not has_entries:
-                    has_entries = not has_entries and bool(entries_in_time_range)
-                logger.debug(f'{len(entries_in_time_range)} fatality page(s) is/are within the specified time range.')
-
-                # If there are none in range, we do not need to search further, and we can discard the results.
-                if has_entries and not entries_in_time_range:
-                    logger.debug(f'There are no data within the specified time range on page {page}.')
-                    break
-
-                # Store the results if the ID number is new.
-                res.update({entry.case: entry for entry in entries_in_time_range if entry.case not in res})
-
-            # Stop if there is no further pages.
-            if not has_next(news_page) or page >= pages > 0:
-                break
-
-            page += 1
-
-    return list(res.values()), page
@@ -1,52 +1,146 @@
-"""Manage the parsing of the press release article."""
+"""
+Manage the parsing of the press release article.
+
+The deceased and notes fields are extracted from the HTML tree of the article, which can be built by the parsers of
+`HTML_PARSERS`: `html.parser` or `lxml` through `BeautifulSoup`, or `selectolax`. They all give the same results, the
+fastest one installed is detected by `detect_html_parser()`.
+"""
+import importlib.util
 import re
 import unicodedata
 
 import bs4
 
 from scrapd.core import date_utils
-from scrapd.core import deceased
 from scrapd.core import model
 from scrapd.core import regex
+from scrapd.core.article_section import DeceasedSection
+from scrapd.core.article_section import process_deceased_fields
+from scrapd.core.article_section import split_notes
+from scrapd.core.article_section import starts_with_label
 from scrapd.core.constant import Fields
 
+# HTML parsers, from the fastest to the slowest, and the module they require.
+HTML_PARSERS = {
+    'selectolax': 'selectolax',
+    'lxml': 'lxml',
+    'html.parser': None,
+}
 
-def to_soup(html):
+# Types of the strings which are part of the text of a tag, like in `bs4.Tag.get_text()`.
+TEXT_TYPES = (bs4.NavigableString, bs4.CData)
+
+
+def available_html_parsers():
+    """
+    Return the HTML parsers which are installed.
+
+    :return: the names of the parsers, from the fastest to the slowest.
+    :rtype: list
+    """
+    return [parser for parser, module in HTML_PARSERS.items() if not module or importlib.util.find_spec(module)]
+
+
+def detect_html_parser():
+    """
+    Return the fastest HTML parser which is installed.
+
+    :rtype: str
+    """
+    return available_html_parsers()[0]
+
+
+def extract_article(html):
+    """
+    Extract the article region from a HTML document.
+
+    The bulletin is contained in the `<article>` element of the detail page, therefore the navigation, the menus and
+    the footer do not need to be parsed. The whole document is returned if the page has no article.
+
+    :param string html: represents a HTML document
+    :return: the `<article>` element of the document, or the whole document.
+    :rtype: str
+    """
+    start = html.find('<article')
+    if start < 0:
+        return html
+
+    end = html.find('</article>', start)
+    if end < 0:
+        return html
+
+    return html[start:end + len('</article>')]
+
+
+def to_soup(html, html_parser='html.parser'):
     """
     Create a beautiful soup object from a HTML string.
 
     :param string html: represents a HTML document
+    :param str html_parser: the parser used by BeautifulSoup, `html.parser` or `lxml`
     :return: A BeautifulSoup object.
     :rtype: bs4.BeautifulSoup
     """
-    soup = bs4.BeautifulSoup(html, 'html.parser')
+    soup = bs4.BeautifulSoup(html, html_parser)
     return soup
 
 
+def index_text(soup):
+    """
+    Index the text of a tree in a single walk.
+
+    The text of the tree is the concatenation of its strings, like `get_text()`. The text of each tag is a slice of
+    it, which is recorded by its span.
+
+    :param bs4.BeautifulSoup soup: the content of the bulletin page
+    :return: the text of the tree, the tags in document order, and the spans of the tags in the text indexed by the
+        `id()` of the tags.
+    :rtype: str, list, dict
+    """
+    parts = []
+    offset = 0
+    tags = []
+    spans = {}
+    stack = [(soup, iter(soup.contents), 0)]
+    while stack:
+        tag, children, start = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            spans[id(tag)] = (start, offset)
+        elif isinstance(child, bs4.Tag):
+            tags.append(child)
+            stack.append((child, iter(child.contents), offset))
+        elif type(child) in TEXT_TYPES:
+            parts.append(child)
+            offset += len(child)
+
+    return ''.join(parts), tags, spans
+
+
 def get_deceased_tag(soup):
     """
     Get the tag with information about one or more deceased people.
 
+    The tags whose text starts with "Deceased" are found using the text index of the tree, instead of extracting the
+    text of each tag.
+
     :param bs4.BeautifulSoup soup:
         the content of the bulletin page
 
     :return list:
         the tag labeled "Deceased" in the bulletin
     """
+    text, tags, spans = index_text(soup)
 
     def starts_with_deceased(tag):
-        return tag.get_text().strip().startswith("Deceased")
+        return starts_with_label(text, spans[id(tag)], "Deceased")
 
-    answers = []
-    first = soup.find(starts_with_deceased)
+    first = next((tag for tag in tags if starts_with_deceased(tag)), None)
     if not first:
-        return answers
-
-    answers = [first]
-    for next_tag in first.find_next_siblings(starts_with_deceased):
-        answers.append(next_tag)
+        return []
 
-    return answers
+    return [first] + [tag for tag in first.next_siblings if isinstance(tag, bs4.Tag) and starts_with_deceased(tag)]
 
 
 def parse_deceased_tag(deceased_tag_p):
@@ -65,7 +159,7 @@ def parse_deceased_tag(deceased_tag_p):
         if len(split_text) > 1:
             return split_text[1].strip()
 
-    deceased_field_str = ''
+    passages = []
     starting_tag = deceased_tag_p.find("strong") or deceased_tag_p
     for passage in starting_tag.next_siblings:
         if not passage.string:
@@ -74,45 +168,53 @@ def parse_deceased_tag(deceased_tag_p):
             break
         if "Arrested:" in passage.string:
             break
-        deceased_field_str += passage.string
+        passages.append(passage.string)
 
-    return deceased_field_str.strip()
+    return ''.join(passages).strip()
 
 
-def parse_deceased_field(soup):
+def parse_deceased_section(soup):
     """
-    Extract content from deceased field on the fatality page.
+    Extract the deceased fields and the notes from the bulletin page.
+
+    The "Deceased" tags are found and parsed once, then the notes are extracted from the text following the last one.
 
     :param bs4.BeautifulSoup soup: the content of the bulletin page
-    :return:
-    :rtype:
+    :return: the deceased section of the bulletin.
+    :rtype: DeceasedSection
     """
-    errors = []
-    fatalities = []
     deceased_tags = get_deceased_tag(soup)
-    for deceased_tag in deceased_tags:
-        deceased_field = parse_deceased_tag(deceased_tag)
-        try:
-            fatality = []
-            err = []
-            for processed_deceased in deceased.process_deceased_field(deceased_field):
-                f, e = processed_deceased
-                fatality.append(f)
-                err += e
-        except ValueError as e:  # pragma: no cover
-            errors.append(str(e))
-        else:
-            fatalities.extend(fatality)
-            errors.extend(err)
+    if not deceased_tags:
+        return DeceasedSection([], '', '')
 
-    return fatalities, errors
+    deceased_fields = [parse_deceased_tag(deceased_tag) for deceased_tag in deceased_tags]
+    last_tag = deceased_tags[-1]
+    deceased_text = ''.join([
+        last_tag.text,
+        *(sibling if isinstance(sibling, bs4.NavigableString) else sibling.text for sibling in last_tag.next_siblings),
+    ])
+    alt = [el for el in last_tag.parent.next_siblings if isinstance(el, bs4.element.Tag)]
+    notes, arrested = split_notes(deceased_text, deceased_fields[-1], alt[0].text if len(alt) == 1 else '')
+    return DeceasedSection(deceased_fields, notes, arrested)
 
 
-def parse_content(page):
+def parse_deceased_field(soup):
+    """
+    Extract content from deceased field on the fatality page.
+
+    :param bs4.BeautifulSoup soup: the content of the bulletin page
+    :return: a list of fatalities and a list of errors.
+    :rtype: list, list
+    """
+    return process_deceased_fields(parse_deceased_section(soup).deceased_fields)
+
+
+def parse_content(page, html_parser='html.parser'):
     """
     Parse the detail page to extract fatality information.
 
     :param str news_page: the content of the fatality page
+    :param str html_parser: the parser building the HTML tree of the article, one of `HTML_PARSERS`
     :return: a dictionary representing a fatality and a list of errors.
     :rtype: dict, list
     """
@@ -122,25 +224,28 @@ def parse_content(page):
     # Normalize the page.
     normalized_detail_page = unicodedata.normalize("NFKD", page)
 
+    # Extract the labelled fields.
+    fields = regex.match_fields(normalized_detail_page)
+
     # Parse the `Case` field.
-    d[Fields.CASE] = regex.match_case_field(normalized_detail_page)
+    d[Fields.CASE] = fields.get(Fields.CASE, '')
     if not d.get(Fields.CASE):
         raise ValueError('a case number is mandatory')
 
     # Parse the `Date` field.
-    d[Fields.DATE] = regex.match_date_field(normalized_detail_page)
+    d[Fields.DATE] = regex.parse_date_field(fields.get(Fields.DATE, ''))
     if not d.get(Fields.DATE):
         raise ValueError('a date is mandatory')
 
     # Parse the `Crashes` field.
-    crash_str = regex.match_crash_field(normalized_detail_page)
+    crash_str = fields.get(Fields.CRASH)
     if crash_str:
         d[Fields.CRASH] = crash_str
     else:
         parsing_errors.append("could not retrieve the crash number")
 
     # Parse the `Time` field.
-    time_str = regex.match_time_field(normalized_detail_page)
+    time_str = fields.get(Fields.TIME, '')
     time = date_utils.parse_time(time_str)
     if time:
         d[Fields.TIME] = time
@@ -148,7 +253,7 @@ def parse_content(page):
         parsing_errors.append("could not retrieve the crash time")
 
     # Parse the location field.
-    location_str = regex.match_location_field(normalized_detail_page)
+    location_str = fields.get(Fields.LOCATION)
     if location_str:
         d[Fields.LOCATION] = location_str.strip()
     else:
@@ -156,15 +261,20 @@ def parse_content(page):
 
     # Convert to a report object.
     report = model.Report(**d)
-    report.compute_fatalities_age()
 
-    # Convert the page to a BeautifulSoup object.
-    soup = to_soup(normalized_detail_page.replace("<br>", "</br>"))
+    # Convert the article to a HTML tree.
+    html = extract_article(normalized_detail_page).replace("<br>", "</br>")
+    if html_parser == 'selectolax':
+        # Import the backend lazily, since selectolax is an optional dependency.
+        from scrapd.core import article_selectolax
+        section = article_selectolax.parse_deceased_section(article_selectolax.to_tree(html))
+    else:
+        section = parse_deceased_section(to_soup(html, html_parser))
 
     # Parse the `Deceased` field.
-    deceased_fields, err = parse_deceased_field(soup)
+    deceased_fields, err = process_deceased_fields(section.deceased_fields)
     if deceased_fields:
-        report.fatalities = deceased_fields
+        report.assign('fatalities', deceased_fields)
         parsing_errors.extend(err)
     else:
         parsing_errors.append("could not retrieve the deceased information")
@@ -172,9 +282,8 @@ def parse_content(page):
 
     # Fill in Notes from Details page
     if deceased_fields:
-        notes = parse_notes_field(soup)
-        if notes:
-            report.notes = notes
+        if section.notes:
+            report.assign('notes', section.notes)
         else:
             parsing_errors.append("could not retrieve the notes information")
 
@@ -190,24 +299,4 @@ def parse_notes_field(soup):
     :return: notes from the Deceased field of the APD bulletin
     :rtype: str
     """
-    deceased_tag = get_deceased_tag(soup)[-1]
-    split_tag = parse_deceased_tag(deceased_tag)
-    deceased_text = deceased_tag.text
-    for sibling in deceased_tag.next_siblings:
-        if isinstance(sibling, bs4.NavigableString):
-            deceased_text += sibling
-        else:
-            deceased_text += sibling.text
-    notes = deceased_text.split(split_tag)[1]
-    if 'arrested:' in notes.lower():
-        filtered_notes = [part for part in list(filter(None, notes.split('\n'))) if 'arrested:' not in part.lower()]
-        if filtered_notes:
-            notes = '\n'.join(filtered_notes)
-        else:
-            alt = [el for el in list(deceased_tag.parent.next_siblings) if isinstance(el, bs4.element.Tag)]
-            notes = alt[0].text if len(alt) == 1 else ''
-    if "APD is investigating this case" in notes:
-        without_boilerplate = notes.split("APD is investigating this case")[0]
-    else:
-        without_boilerplate = notes.split("Anyone with information regarding")[0]
-    return without_boilerplate.strip("()<>").strip()
+    return parse_deceased_section(soup).notes
@@ -0,0 +1,93 @@
+"""
+Define the parts of the parsing of the deceased section which do not depend on the HTML parser.
+
+They are shared by the `BeautifulSoup` based functions of the `article` module and by the `selectolax` based functions
+of the `article_selectolax` module.
+"""
+import re
+from typing import NamedTuple
+
+from scrapd.core import deceased
+
+
+class DeceasedSection(NamedTuple):
+    """Represent the deceased section of a bulletin."""
+
+    # The text of each deceased field.
+    deceased_fields: list
+    # The notes following the last deceased field.
+    notes: str
+    # The arrest information following the last deceased field.
+    arrested: str
+
+
+# Pattern of the first non-whitespace character.
+NON_WHITESPACE = re.compile(r'\S')
+
+
+def starts_with_label(text, span, label):
+    """
+    Return `True` if the stripped slice of a text starts with a label.
+
+    :param str text: the text
+    :param tuple span: the start and the end of the slice
+    :param str label: the label
+    :rtype: bool
+    """
+    start, end = span
+    first_char = NON_WHITESPACE.search(text, start, end)
+    return bool(first_char) and text.startswith(label, first_char.start(), end)
+
+
+def process_deceased_fields(deceased_fields):
+    """
+    Process the text of the deceased fields.
+
+    :param iterable deceased_fields: the text of each deceased field
+    :return: a list of fatalities and a list of errors.
+    :rtype: list, list
+    """
+    errors = []
+    fatalities = []
+    for deceased_field in deceased_fields:
+        try:
+            fatality = []
+            err = []
+            for processed_deceased in deceased.process_deceased_field(deceased_field):
+                f, e = processed_deceased
+                fatality.append(f)
+                err += e
+        except ValueError as e:  # pragma: no cover
+            errors.append(str(e))
+        else:
+            fatalities.extend(fatality)
+            errors.extend(err)
+
+    return fatalities, errors
+
+
+def split_notes(deceased_text, deceased_field, alternative_notes):
+    """
+    Extract the notes and the arrest information from the text following the deceased field.
+
+    :param str deceased_text: the text of the last deceased field and of its siblings
+    :param str deceased_field: the last deceased field
+    :param str alternative_notes: the text to use if the notes only contain the arrest information
+    :return: the notes from the Deceased field of the APD bulletin, and the arrest information.
+    :rtype: str, str
+    """
+    if not deceased_field or deceased_field not in deceased_text:
+        return '', ''
+
+    notes = deceased_text.split(deceased_field, 2)[1]
+    arrested = ''
+    if 'arrested:' in notes.lower():
+        parts = list(filter(None, notes.split('\n')))
+        filtered_notes = [part for part in parts if 'arrested:' not in part.lower()]
+        arrested = '\n'.join(part.strip() for part in parts if 'arrested:' in part.lower())
+        notes = '\n'.join(filtered_notes) if filtered_notes else alternative_notes
+    if "APD is investigating this case" in notes:
+        without_boilerplate = notes.split("APD is investigating this case", 1)[0]
+    else:
+        without_boilerplate = notes.split("Anyone with information regarding", 1)[0]
+    return without_boilerplate.strip("()<>").strip(), arrested
@@ -0,0 +1,286 @@
+"""
+Parse the deceased and notes fields of the press release article with `selectolax`.
+
+The functions mirror the `BeautifulSoup` based functions of the `article` module on the nodes of a `lexbor` tree, and
+must give the same results.
+"""
+import re
+
+from selectolax.lexbor import LexborHTMLParser
+
+from scrapd.core import article_section
+
+# Tag names of the text and comment nodes.
+TEXT_NODE = '-text'
+COMMENT_NODE = '-comment'
+
+# Whitespace characters collapsed by BeautifulSoup, and the tags preserving them.
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+PRESERVE_WHITESPACE_TAGS = {'pre', 'textarea'}
+
+
+def to_tree(html):
+    """
+    Create a `lexbor` tree from a HTML string.
+
+    :param string html: represents a HTML document
+    :return: the body of the document.
+    :rtype: selectolax.lexbor.LexborNode
+    """
+    return LexborHTMLParser(html).body
+
+
+def is_tag(node):
+    """
+    Return `True` if a node is an element.
+
+    :param selectolax.lexbor.LexborNode node: a node
+    :rtype: bool
+    """
+    return node.tag not in (TEXT_NODE, COMMENT_NODE)
+
+
+def get_text(node):
+    """
+    Get all the text of a node.
+
+    The text is the concatenation of the text nodes, like the one of `bs4.Tag.get_text()`.
+
+    :param selectolax.lexbor.LexborNode node: a node
+    :rtype: str
+    """
+    if node.tag == TEXT_NODE:
+        return text_content(node)
+    return ''.join(text_content(text) for text in node.traverse(include_text=True) if text.tag == TEXT_NODE)
+
+
+def text_content(text):
+    """
+    Get the content of a text node, like a `bs4.NavigableString`.
+
+    BeautifulSoup collapses the strings which only contain whitespace into a single newline, or a single space.
+
+    :param selectolax.lexbor.LexborNode text: a text node
+    :rtype: str
+    """
+    content = text.text(deep=False)
+    if content.strip(ASCII_SPACES) or is_preserving_whitespace(text):
+        return content
+    return collapse_whitespace(content)
+
+
+def collapse_whitespace(content):
+    """
+    Collapse a string which only contains whitespace, like BeautifulSoup.
+
+    :param str content: a string which only contains whitespace
+    :return: a single newline if the string contains one, a single space otherwise.
+    :rtype: str
+    """
+    return '\n' if '\n' in content else ' '
+
+
+def is_preserving_whitespace(node):
+    """
+    Return `True` if a node is contained in a tag preserving the whitespace.
+
+    :param selectolax.lexbor.LexborNode node: a node
+    :rtype: bool
+    """
+    parent = node.parent
+    while parent is not None:
+        if parent.tag in PRESERVE_WHITESPACE_TAGS:
+            return True
+        parent = parent.parent
+    return False
+
+
+def get_string(node):
+    """
+    Get the single string of a node, like `bs4.Tag.string`.
+
+    :param selectolax.lexbor.LexborNode node: a node
+    :return: the text of a text node, the string of the only child of an element, or `None`.
+    :rtype: str
+    """
+    if node.tag == TEXT_NODE:
+        return text_content(node)
+    if node.tag == COMMENT_NODE:
+        return None
+
+    children = list(iter_children(node))
+    return get_string(children[0]) if len(children) == 1 else None
+
+
+def iter_children(node):
+    """
+    Iterate over the children of a node, including the text nodes.
+
+    :param selectolax.lexbor.LexborNode node: a node
+    :rtype: generator
+    """
+    child = node.child
+    while child is not None:
+        yield child
+        child = child.next
+
+
+def iter_next_siblings(node):
+    """
+    Iterate over the next siblings of a node, including the text nodes.
+
+    :param selectolax.lexbor.LexborNode node: a node
+    :rtype: generator
+    """
+    sibling = node.next
+    while sibling is not None:
+        yield sibling
+        sibling = sibling.next
+
+
+def index_text(tree):
+    """
+    Index the text of a tree in a single walk.
+
+    The index is built like the one of the BeautifulSoup trees, see `article.index_text()`.
+
+    :param selectolax.lexbor.LexborNode tree: the body of the bulletin page
+    :return: the text of the tree, the elements in document order, and the spans of the elements in the text indexed
+        by their `mem_id`.
+    :rtype: str, list, dict
+    """
+    parts = []
+    offset = 0
+    tags = []
+    spans = {}
+    stack = [(tree, iter_children(tree), 0, is_preserving_whitespace(tree))]
+    while stack:
+        node, children, start, preserve_whitespace = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            spans[node.mem_id] = (start, offset)
+        elif child.tag == TEXT_NODE:
+            content = child.text(deep=False)
+            if not preserve_whitespace and not content.strip(ASCII_SPACES):
+                content = collapse_whitespace(content)
+            parts.append(content)
+            offset += len(content)
+        elif is_tag(child):
+            tags.append(child)
+            preserve_child_whitespace = preserve_whitespace or child.tag in PRESERVE_WHITESPACE_TAGS
+            stack.append((child, iter_children(child), offset, preserve_child_whitespace))
+
+    return ''.join(parts), tags, spans
+
+
+def get_deceased_tag(tree):
+    """
+    Get the tag with information about one or more deceased people.
+
+    :param selectolax.lexbor.LexborNode tree: the body of the bulletin page
+    :return list: the tag labeled "Deceased" in the bulletin
+    """
+    text, tags, spans = index_text(tree)
+
+    def starts_with_deceased(node):
+        return article_section.starts_with_label(text, spans[node.mem_id], "Deceased")
+
+    first = next((node for node in tags if starts_with_deceased(node)), None)
+    if not first:
+        return []
+
+    return [first] + [node for node in iter_next_siblings(first) if is_tag(node) and starts_with_deceased(node)]
+
+
+def parse_deceased_tag(deceased_tag_p):
+    """
+    Find the part of the relevant HTML tag with the text of a Deceased record.
+
+    :param selectolax.lexbor.LexborNode deceased_tag_p: HTML tag starting with "Deceased"
+    :return: the part of the tag's text with Name, Ethnicity, and DOB.
+    :rtype str:
+    """
+    deceased_text = get_text(deceased_tag_p)
+    if 20 < len(deceased_text) < 100 and "preliminary" not in deceased_text:
+        split_text = re.split(r'Deceased(?: \d)?:', deceased_text, maxsplit=1)
+        if len(split_text) > 1:
+            return split_text[1].strip()
+
+    descendants = deceased_tag_p.traverse(include_text=False)
+    next(descendants, None)
+    starting_tag = next((node for node in descendants if node.tag == 'strong'), deceased_tag_p)
+
+    passages = []
+    for passage in iter_next_siblings(starting_tag):
+        passage_string = get_string(passage)
+        if not passage_string:
+            continue
+        if contains(passage, "preliminary"):
+            break
+        if "Arrested:" in passage_string:
+            break
+        passages.append(passage_string)
+
+    return ''.join(passages).strip()
+
+
+def contains(node, text):
+    """
+    Check whether a node contains a text, like the `in` operator of `bs4`.
+
+    A text node contains the text if it is a part of its content, whereas an element contains it if one of its
+    children is exactly this text.
+
+    :param selectolax.lexbor.LexborNode node: a node
+    :param str text: the text to look for
+    :rtype: bool
+    """
+    if node.tag == TEXT_NODE:
+        return text in text_content(node)
+    return any(child.tag == TEXT_NODE and text_content(child) == text for child in iter_children(node))
+
+
+def parse_deceased_section(tree):
+    """
+    Extract the deceased fields and the notes from the bulletin page.
+
+    The section is split like `article.parse_deceased_section()` splits the BeautifulSoup trees.
+
+    :param selectolax.lexbor.LexborNode tree: the body of the bulletin page
+    :return: the deceased section of the bulletin.
+    :rtype: article_section.DeceasedSection
+    """
+    deceased_tags = get_deceased_tag(tree)
+    if not deceased_tags:
+        return article_section.DeceasedSection([], '', '')
+
+    deceased_fields = [parse_deceased_tag(tag) for tag in deceased_tags]
+    last_tag = deceased_tags[-1]
+    deceased_text = ''.join([get_text(last_tag), *(get_text(sibling) for sibling in iter_next_siblings(last_tag))])
+    parent_siblings = [el for el in iter_next_siblings(last_tag.parent) if is_tag(el)]
+    alternative_notes = get_text(parent_siblings[0]) if len(parent_siblings) == 1 else ''
+    notes, arrested = article_section.split_notes(deceased_text, deceased_fields[-1], alternative_notes)
+    return article_section.DeceasedSection(deceased_fields, notes, arrested)
+
+
+def parse_deceased_field(tree):
+    """
+    Extract content from deceased field on the fatality page.
+
+    :param selectolax.lexbor.LexborNode tree: the body of the bulletin page
+    :return: a list of fatalities and a list of errors.
+    :rtype: list, list
+    """
+    return article_section.process_deceased_fields(parse_deceased_section(tree).deceased_fields)
+
+
+def parse_notes_field(tree):
+    """
+    Get Notes from deceased field's element.
+
+    :param selectolax.lexbor.LexborNode tree: the body of the bulletin page
+    :return: notes from the Deceased field of the APD bulletin
+    :rtype: str
+    """
+    return parse_deceased_section(tree).notes
@@ -0,0 +1,234 @@
+"""
+Define the HTTP response cache.
+
+The responses are stored on disk, one file per URL and parameters, with their `ETag` and `Last-Modified` headers in
+order to revalidate them with a conditional request once they expired. The least recently used entries are evicted
+when the cache grows beyond its maximum size.
+
+The size of the cache is tracked as the entries are written, therefore the cache directory is only scanned once, then
+when entries must be evicted.
+"""
+from dataclasses import asdict
+from dataclasses import dataclass
+import hashlib
+import json
+import os
+from pathlib import Path
+import time
+from urllib.parse import urlencode
+
+from loguru import logger
+
+# Default time to live of the listing pages (second).
+DEFAULT_LISTING_TTL = 600
+
+# Default time to live of the detail pages (second).
+DEFAULT_DETAIL_TTL = 30 * 24 * 3600
+
+# Default maximum size of the cache (byte).
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024
+
+# Fraction of the maximum size the cache is reduced to by an eviction, so that a full cache is not scanned on every
+# write.
+EVICTION_RATIO = 0.9
+
+
+@dataclass
+class CacheEntry:
+    """Represent a cached response."""
+
+    url: str
+    body: str
+    etag: str = ''
+    last_modified: str = ''
+    stored_at: float = 0.0
+
+    def is_fresh(self, ttl):
+        """
+        Return `True` if the entry can be used without revalidation.
+
+        :param int ttl: time to live of the entry (second)
+        :rtype: bool
+        """
+        return time.time() - self.stored_at < ttl
+
+    def validators(self):
+        """
+        Return the headers needed to revalidate the entry.
+
+        :return: the conditional request headers.
+        :rtype: dict
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Store the HTTP responses on disk."""
+
+    def __init__(
+            self,
+            directory,
+            listing_ttl=DEFAULT_LISTING_TTL,
+            detail_ttl=DEFAULT_DETAIL_TTL,
+            max_size=DEFAULT_MAX_SIZE,
+    ):
+        """
+        Initialize the cache.
+
+        :param str directory: the directory containing the cache entries
+        :param int listing_ttl: time to live of the listing pages (second)
+        :param int detail_ttl: time to live of the detail pages (second)
+        :param int max_size: maximum size of the cache (byte)
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.listing_ttl = listing_ttl
+        self.detail_ttl = detail_ttl
+        self.max_size = max_size
+        self.size = None
+
+    @staticmethod
+    def key(url, params=None):
+        """
+        Compute the key of a request.
+
+        :param str url: request URL
+        :param dict params: request parameters, defaults to None
+        :return: the key of the request.
+        :rtype: str
+        """
+        query = urlencode(sorted((params or {}).items()))
+        return hashlib.sha256(f'{url}?{query}'.encode()).hexdigest()
+
+    def path(self, url, params=None):
+        """
+        Return the path of the file storing a request.
+
+        :param str url: request URL
+        :param dict params: request parameters, defaults to None
+        :rtype: pathlib.Path
+        """
+        return self.directory / f'{self.key(url, params)}.json'
+
+    def get(self, url, params=None):
+        """
+        Retrieve a cached response.
+
+        :param str url: request URL
+        :param dict params: request parameters, defaults to None
+        :return: the cached response or `None`.
+        :rtype: CacheEntry
+        """
+        entry_file = self.path(url, params)
+        try:
+            entry = CacheEntry(**json.loads(entry_file.read_text()))
+        except (OSError, TypeError, ValueError):
+            return None
+
+        # Mark the entry as recently used.
+        os.utime(entry_file)
+        return entry
+
+    def set(self, url, params, body, etag='', last_modified=''):
+        """
+        Store a response.
+
+        :param str url: request URL
+        :param dict params: request parameters
+        :param str body: response body
+        :param str etag: value of the `ETag` header
+        :param str last_modified: value of the `Last-Modified` header
+        :return: the stored entry.
+        :rtype: CacheEntry
+        """
+        entry = CacheEntry(url, body, etag or '', last_modified or '', time.time())
+        self.write(self.path(url, params), entry)
+        return entry
+
+    def refresh(self, url, params, entry):
+        """
+        Reset the age of a revalidated entry.
+
+        :param str url: request URL
+        :param dict params: request parameters
+        :param CacheEntry entry: the revalidated entry
+        """
+        entry.stored_at = time.time()
+        self.write(self.path(url, params), entry)
+
+    def write(self, entry_file, entry):
+        """
+        Write an entry on disk, and update the size of the cache.
+
+        The least recently used entries are evicted if the cache grows beyond its maximum size.
+
+        :param pathlib.Path entry_file: the file storing the entry
+        :param CacheEntry entry: the entry to write
+        """
+        try:
+            previous_size = entry_file.stat().st_size
+        except OSError:
+            previous_size = 0
+        size = self.store(entry_file, entry)
+
+        if self.size is None:
+            self.size = sum(entry_size for _, entry_size, _ in self.scan())
+        else:
+            self.size += size - previous_size
+        if self.size > self.max_size:
+            self.evict()
+
+    @staticmethod
+    def store(entry_file, entry):
+        """
+        Write an entry on disk.
+
+        The entry is written into a temporary file first, then renamed, to prevent concurrent readers from seeing
+        partial entries.
+
+        :param pathlib.Path entry_file: the file storing the entry
+        :param CacheEntry entry: the entry to write
+        :return: the size of the entry on disk (byte).
+        :rtype: int
+        """
+        content = json.dumps(asdict(entry)).encode()
+        tmp_file = entry_file.with_suffix('.tmp')
+        tmp_file.write_bytes(content)
+        tmp_file.replace(entry_file)
+        return len(content)
+
+    def scan(self):
+        """
+        List the entries of the cache directory.
+
+        :return: the modification time, the size and the file of each entry.
+        :rtype: list
+        """
+        entries = []
+        for entry_file in self.directory.glob('*.json'):
+            try:
+                stat = entry_file.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_file))
+        return entries
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits within a fraction of its maximum size."""
+        entries = self.scan()
+        total_size = sum(entry_size for _, entry_size, _ in entries)
+        for _, size, entry_file in sorted(entries):
+            if total_size <= self.max_size * EVICTION_RATIO:
+                break
+            logger.trace(f'Evicting {entry_file} from the cache.')
+            try:
+                entry_file.unlink()
+            except OSError:
+                continue
+            total_size -= size
+        self.size = total_size
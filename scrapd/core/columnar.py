@@ -0,0 +1,145 @@
+"""
+Define the columnar exports of the reports.
+
+The reports are flattened to one row per fatality, like the CSV format, and converted to Apache Arrow tables with typed
+columns: the dates and the times keep their types, and the ethnicities and the genders are dictionary encoded. The
+tables are written to Parquet files or to Arrow IPC files, which can be read back with a memory map.
+
+`pyarrow` is an optional dependency, which can be installed with `pip install scrapd[arrow]`.
+"""
+import importlib
+
+from scrapd.core.constant import FATALITY_FIELDS
+from scrapd.core.constant import Fields
+from scrapd.core.constant import LEADING_REPORT_FIELDS
+from scrapd.core.constant import ROW_FIELDS
+from scrapd.core.constant import TRAILING_REPORT_FIELDS
+
+# The columns holding enumerations, which are dictionary encoded.
+DICTIONARY_COLUMNS = (Fields.ETHNICITY, Fields.GENDER)
+
+
+def import_pyarrow(submodule=None):
+    """
+    Import `pyarrow`, or one of its submodules.
+
+    :param str submodule: the name of the submodule, like `parquet`
+    :return: the module.
+    :rtype: module
+    """
+    name = f'pyarrow.{submodule}' if submodule else 'pyarrow'
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise ImportError('The columnar formats require pyarrow, install it with "pip install scrapd[arrow]".')
+
+
+def column_types(pyarrow):
+    """
+    Return the types of the columns.
+
+    :param module pyarrow: the `pyarrow` module
+    :return: the types of the columns, by name.
+    :rtype: dict
+    """
+    types = {name: pyarrow.string() for name in ROW_FIELDS}
+    types.update({
+        Fields.AGE: pyarrow.int64(),
+        Fields.CRASH: pyarrow.int64(),
+        Fields.DATE: pyarrow.date32(),
+        Fields.DOB: pyarrow.date32(),
+        Fields.TIME: pyarrow.time32('s'),
+    })
+    return types
+
+
+def to_columns(reports):
+    """
+    Flatten the reports to columns, with one row per fatality.
+
+    The values are read directly from the attributes of the reports and of the fatalities, which can also be records.
+
+    :param iterable reports: the reports
+    :return: the lists of values, by column name.
+    :rtype: dict
+    """
+    columns = {name: [] for name in ROW_FIELDS}
+    report_columns = [(columns[name], name) for name in LEADING_REPORT_FIELDS + TRAILING_REPORT_FIELDS]
+    fatality_columns = [(columns[name], name) for name in FATALITY_FIELDS]
+    for report in reports:
+        for fatality in report.fatalities:
+            for column, name in report_columns:
+                column.append(getattr(report, name))
+            for column, name in fatality_columns:
+                column.append(getattr(fatality, name))
+    for name in DICTIONARY_COLUMNS:
+        columns[name] = [value.value for value in columns[name]]
+    return columns
+
+
+def to_arrow(reports):
+    """
+    Convert the reports to an Arrow table, with one row per fatality.
+
+    :param iterable reports: the reports
+    :return: the table.
+    :rtype: pyarrow.Table
+    """
+    pyarrow = import_pyarrow()
+    columns = to_columns(reports)
+    arrays = []
+    for name, type_ in column_types(pyarrow).items():
+        array = pyarrow.array(columns[name], type_)
+        arrays.append(array.dictionary_encode() if name in DICTIONARY_COLUMNS else array)
+    return pyarrow.Table.from_arrays(arrays, names=list(ROW_FIELDS))
+
+
+def to_dataframe(reports):
+    """
+    Convert the reports to a pandas data frame, with one row per fatality.
+
+    The dates are converted to `datetime64` columns, and the dictionary encoded columns to categories.
+
+    :param iterable reports: the reports
+    :return: the data frame.
+    :rtype: pandas.DataFrame
+    """
+    return to_arrow(reports).to_pandas(date_as_object=False)
+
+
+def write_arrow(reports, sink):
+    """
+    Write the reports to an Arrow IPC file.
+
+    :param iterable reports: the reports
+    :param sink: a path, or a binary file-like object
+    """
+    pyarrow = import_pyarrow()
+    table = to_arrow(reports)
+    writer = pyarrow.ipc.new_file(sink, table.schema)
+    writer.write_table(table)
+    writer.close()
+
+
+def write_parquet(reports, sink):
+    """
+    Write the reports to a Parquet file.
+
+    :param iterable reports: the reports
+    :param sink: a path, or a binary file-like object
+    """
+    import_pyarrow('parquet').write_table(to_arrow(reports), sink)
+
+
+def read_arrow(path):
+    """
+    Read an Arrow IPC file with a memory map.
+
+    The columns are not copied in memory, therefore large files are read almost instantly.
+
+    :param str path: the path of the file
+    :return: the table.
+    :rtype: pyarrow.Table
+    """
+    pyarrow = import_pyarrow()
+    return pyarrow.ipc.open_file(pyarrow.memory_map(str(path))).read_all()
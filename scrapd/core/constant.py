@@ -25,4 +25,20 @@ class Fields():
     TIME = 'time'
 
 
+# The fields of the rows of the flat formats, with one row per fatality: the fields of the fatality are surrounded by
+# the ones of the report.
+LEADING_REPORT_FIELDS = (Fields.CRASH, Fields.CASE, Fields.DATE, Fields.TIME, Fields.LOCATION)
+FATALITY_FIELDS = (
+    Fields.FIRST_NAME,
+    Fields.MIDDLE_NAME,
+    Fields.LAST_NAME,
+    Fields.GENERATION,
+    Fields.ETHNICITY,
+    Fields.GENDER,
+    Fields.DOB,
+    Fields.AGE,
+)
+TRAILING_REPORT_FIELDS = (Fields.LINK, Fields.NOTES)
+ROW_FIELDS = LEADING_REPORT_FIELDS + FATALITY_FIELDS + TRAILING_REPORT_FIELDS
+
 DUMP_DIR = '.dump'
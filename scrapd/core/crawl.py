@@ -0,0 +1,700 @@
+"""
+Define the crawl of the APD news site.
+
+The news pages are fetched by a producer, and their detail pages are fetched and parsed by a pool of workers, with the
+functions of the `apd` module.
+"""
+import asyncio
+import collections
+import functools
+
+import aiohttp
+from loguru import logger
+from tenacity import stop_after_attempt
+from tenacity import wait_exponential
+
+from scrapd.core import apd
+from scrapd.core import date_utils
+
+
+class CrawlTracker:
+    """
+    Track the progress of a crawl.
+
+    The news pages are fetched by a producer and their detail pages are processed by a pool of workers, therefore the
+    detail pages of several news pages are processed at the same time. The tracker collects the reports of each news
+    page and evaluates the pages in order, as soon as all their detail pages are processed, to decide whether the crawl
+    must stop.
+
+    The new reports within the time range are kept until they are collected with `pop_reports`, whereas only the case
+    numbers of the previous reports are kept.
+    """
+
+    def __init__(self, from_date=None, to_date=None, check_past_entries=False):
+        """
+        Initialize the tracker.
+
+        :param datetime.date from_date: the start date
+        :param datetime.date to_date: the end date
+        :param bool check_past_entries: stop the crawl after 2 pages containing only entries before `from_date`
+        """
+        self.from_date = from_date
+        self.to_date = to_date
+        self.check_past_entries = check_past_entries
+        self.error = None
+        self.errors = {}
+        self.has_entries = False
+        self.last_page = 0
+        self.links = set()
+        self.cases = set()
+        self.no_date_within_range_count = 0
+        self.pending = {}
+        self.ready = asyncio.Event()
+        self.reports = {}
+        self.results = {}
+        self.stop = asyncio.Event()
+
+    @classmethod
+    def from_range(cls, from_=None, to=None):
+        """
+        Create a tracker for a time range.
+
+        :param str from_: the start date
+        :param str to: the end date
+        :return: the tracker.
+        :rtype: CrawlTracker
+        """
+        return cls(date_utils.from_date(from_), date_utils.to_date(to), bool(from_))
+
+    def add_page(self, page, link_count):
+        """
+        Register a news page and the number of detail pages it contains.
+
+        :param int page: the news page number
+        :param int link_count: the number of detail pages to process
+        """
+        self.pending[page] = link_count
+        self.results[page] = [None] * link_count
+        self.evaluate()
+
+    def add_report(self, page, index, report):
+        """
+        Store the report of a detail page.
+
+        The reports are stored in the order of the links of the news page, whatever the order they are processed in.
+
+        :param int page: the news page number the detail page belongs to
+        :param int index: the index of the detail page link in the news page
+        :param model.Report report: the report
+        """
+        self.results[page][index] = report
+        self.pending[page] -= 1
+        self.evaluate()
+
+    def pop_reports(self):
+        """
+        Collect the new reports.
+
+        :return: the new reports within the time range, in the order of the news pages.
+        :rtype: list
+        """
+        reports = list(self.reports.values())
+        self.reports.clear()
+        self.ready.clear()
+        return reports
+
+    def skip_to(self, page):
+        """
+        Start the evaluation at a specific page, the previous ones being skipped.
+
+        :param int page: the first news page number
+        """
+        self.last_page = page - 1
+
+    def fail(self, page, error):
+        """
+        Record the error of a detail page.
+
+        The error stops the crawl once the evaluation reaches its news page, therefore the errors of the news pages
+        which are not evaluated, because the crawl stopped before them, are discarded. Only the first error of each news
+        page is kept.
+
+        :param int page: the news page number the detail page belongs to
+        :param Exception error: the error to record
+        """
+        self.errors.setdefault(page, error)
+        self.pending[page] -= 1
+        self.evaluate()
+
+    def evaluate(self):
+        """Evaluate the completed pages in order, until a page is still being processed or the crawl must stop."""
+        page = self.last_page + 1
+        while not self.stop.is_set() and page in self.pending:
+            if page in self.errors:
+                self.error = self.errors[page]
+                self.stop.set()
+                break
+            if self.pending[page]:
+                break
+            self.last_page = page
+            page_res = self.results.pop(page)
+            if self.evaluate_page(page, page_res):
+                self.stop.set()
+            page += 1
+
+    def evaluate_page(self, page, page_res):
+        """
+        Store the results of a news page which are within the time range.
+
+        The links of the reports within the time range are recorded as processed. The other reports are not emitted,
+        therefore their detail pages must be processed again by a crawl of another time range.
+
+        :param int page: the news page number
+        :param list page_res: the reports of the page
+        :return: `True` if the crawl must stop, `False` otherwise.
+        :rtype: bool
+        """
+        if not page_res:
+            return False
+
+        # If the page contains fatalities, ensure all of them happened within the specified time range.
+        entries_in_time_range = [
+            entry for entry in page_res if date_utils.is_between(entry.date, self.from_date, self.to_date)
+        ]
+
+        # If 2 pages in a row:
+        #   1) contain results
+        #   2) but none of them contain dates within the time range
+        #   3) and we did not collect any valid entries
+        # Then we can stop the operation.
+        if self.check_past_entries and not self.has_entries:
+            past_entries = all([date_utils.is_before(entry.date, self.from_date) for entry in page_res])
+            if past_entries:
+                self.no_date_within_range_count += 1
+        if self.no_date_within_range_count > 1:
+            logger.debug(f'{len(entries_in_time_range)} fatality page(s) within the specified time range.')
+            return True
+
+        # Check whether we found entries in the previous pages.
+        if not self.has_entries:
+            self.has_entries = bool(entries_in_time_range)
+        logger.debug(f'{len(entries_in_time_range)} fatality page(s) is/are within the specified time range.')
+
+        # If there are none in range, we do not need to search further, and we can discard the results.
+        if self.has_entries and not entries_in_time_range:
+            logger.debug(f'There are no data within the specified time range on page {page}.')
+            return True
+
+        # Store the results if the ID number is new.
+        self.links.update(entry.link for entry in entries_in_time_range)
+        new_reports = {entry.case: entry for entry in entries_in_time_range if entry.case not in self.cases}
+        if new_reports:
+            self.cases.update(new_reports)
+            self.reports.update(new_reports)
+            self.ready.set()
+        return False
+
+
+async def seek_news_page(fetch, last_page, to_date, margin=apd.RELEASE_DATE_MARGIN):
+    """
+    Find the first news page containing entries released around or before the end date.
+
+    The news pages are ordered by release date, therefore the pages are probed with a galloping search (2, 4, 8, 16,
+    etc.) until a page reaches the end date, then with a binary search between the last 2 probes. The first page is
+    expected not to reach the end date.
+
+    :param coroutine fetch: the coroutine fetching a news page from its number
+    :param int last_page: the number of the last news page
+    :param datetime.date to_date: the end date
+    :param int margin: safety margin between the crash date and the release date (day)
+    :return: the number of the first news page to crawl.
+    :rtype: int
+    """
+    # Gallop until a page reaches the end date.
+    low = 1
+    step = 1
+    while True:
+        high = min(low + step, last_page)
+        if apd.reaches_date(await fetch(high), to_date, margin):
+            break
+        if high == last_page:
+            return last_page
+        low = high
+        step *= 2
+
+    # Search the first page reaching the end date between the last 2 probes.
+    while high - low > 1:
+        middle = (low + high) // 2
+        if apd.reaches_date(await fetch(middle), to_date, margin):
+            high = middle
+        else:
+            low = middle
+
+    logger.debug(f'Skipping to page {high}.')
+    return high
+
+
+class NewsPageFetcher:
+    """Fetch the news pages, keeping the pages which were probed to be fetched again later."""
+
+    def __init__(self, session):
+        """
+        Initialize the fetcher.
+
+        :param aiohttp.ClientSession session: aiohttp session
+        """
+        self.session = session
+        self.probes = {}
+
+    async def fetch(self, page):
+        """
+        Fetch a news page, using the probed page if there is one.
+
+        :param int page: the page number
+        :return: the content of the news page.
+        :rtype: str
+        """
+        if page in self.probes:
+            return self.probes.pop(page)
+        logger.info(f'Fetching page {page}...')
+        try:
+            return await apd.fetch_news_page(self.session, page)
+        except Exception:
+            raise ValueError(f'Cannot retrieve news page #{page}.')
+
+    async def probe(self, page):
+        """
+        Fetch a news page and keep it.
+
+        :param int page: the page number
+        :return: the content of the news page.
+        :rtype: str
+        """
+        if page not in self.probes:
+            self.probes[page] = await self.fetch(page)
+        return self.probes[page]
+
+    def discard_probes(self, first_page):
+        """
+        Discard the probed pages which will not be fetched again.
+
+        :param int first_page: the number of the first page which will be fetched
+        """
+        self.probes = {page: news_page for page, news_page in self.probes.items() if page >= first_page}
+
+
+async def fetch_news_pages(session, pages=-1, concurrency=4, to_date=None, margin=apd.RELEASE_DATE_MARGIN):
+    """
+    Fetch the news pages, in order.
+
+    The first page gives the number of the last page, then the next pages are fetched concurrently. If the pager does
+    not give the last page, the pages are fetched one after the other until there is no next page.
+
+    If the first page was released after the end date, the pages released after the end date are skipped using
+    `seek_news_page`.
+
+    The pages which were fetched in advance are discarded when the caller stops the iteration.
+
+    :param aiohttp.ClientSession session: aiohttp session
+    :param str pages: number of pages to retrieve or -1 for all
+    :param int concurrency: maximum number of news pages fetched at the same time
+    :param datetime.date to_date: the end date, defaults to None
+    :param int margin: safety margin between the crash date and the release date (day), `None` to fetch all the pages
+    :return: an asynchronous generator of tuples containing the page number and the page content.
+    :rtype: async_generator
+    """
+    fetcher = NewsPageFetcher(session)
+    fetch = fetcher.fetch
+
+    # Fetch the first page.
+    news_page = await fetch(1)
+    last_page = apd.parse_last_page(news_page)
+
+    # Fall back to fetching the pages one by one if the last page is unknown.
+    if not last_page:
+        async for page, news_page in fetch_news_pages_sequentially(fetch, news_page, pages):
+            yield page, news_page
+        return
+
+    # Skip the pages released after the end date.
+    if pages > 0:
+        last_page = min(last_page, pages)
+    first_page = 1
+    if to_date and margin is not None and last_page > 1 and not apd.reaches_date(news_page, to_date, margin):
+        fetcher.probes[1] = news_page
+        first_page = await seek_news_page(fetcher.probe, last_page, to_date, margin)
+        fetcher.discard_probes(first_page)
+    else:
+        yield 1, news_page
+        first_page = 2
+
+    # Fetch the next pages concurrently.
+    async for page, news_page in fetch_news_pages_concurrently(fetch, first_page, last_page, concurrency):
+        yield page, news_page
+
+
+async def fetch_news_pages_sequentially(fetch, news_page, pages=-1):
+    """
+    Fetch the news pages one after the other, until there is no next page.
+
+    :param coroutine fetch: the coroutine fetching a news page from its number
+    :param str news_page: the content of the first page
+    :param str pages: number of pages to retrieve or -1 for all
+    :return: an asynchronous generator of tuples containing the page number and the page content.
+    :rtype: async_generator
+    """
+    page = 1
+    yield page, news_page
+    while apd.has_next(news_page) and not page >= pages > 0:
+        page += 1
+        news_page = await fetch(page)
+        yield page, news_page
+
+
+async def fetch_news_pages_concurrently(fetch, first_page, last_page, concurrency=4):
+    """
+    Fetch a range of news pages concurrently, in order.
+
+    The pages which were fetched in advance are discarded when the caller stops the iteration.
+
+    :param coroutine fetch: the coroutine fetching a news page from its number
+    :param int first_page: the number of the first page to fetch
+    :param int last_page: the number of the last page to fetch
+    :param int concurrency: maximum number of news pages fetched at the same time
+    :return: an asynchronous generator of tuples containing the page number and the page content.
+    :rtype: async_generator
+    """
+    window = collections.deque()
+    next_page = first_page
+    try:
+        while window or next_page <= last_page:
+            while len(window) < concurrency and next_page <= last_page:
+                window.append(asyncio.ensure_future(fetch(next_page)))
+                next_page += 1
+            page = next_page - len(window)
+            news_page = await window.popleft()
+            yield page, news_page
+    finally:
+        for task in window:
+            task.cancel()
+        await asyncio.gather(*window, return_exceptions=True)
+
+
+async def produce_news_pages(
+        session,
+        queue,
+        tracker,
+        pages=-1,
+        state=None,
+        release_margin=apd.RELEASE_DATE_MARGIN,
+        listing_concurrency=4,
+):
+    """
+    Fetch the news pages and queue their detail page links.
+
+    The news pages are fetched ahead of time, concurrently, but they are processed in order.
+
+    The detail pages released clearly outside of the time range are skipped, and the crawl stops at the first news page
+    containing only entries released before the start date.
+
+    In incremental mode, the detail pages which were already processed are skipped, and the crawl stops at the first
+    news page containing only known detail pages.
+
+    :param aiohttp.ClientSession session: aiohttp session
+    :param asyncio.Queue queue: the queue feeding the detail page workers
+    :param CrawlTracker tracker: the crawl tracker
+    :param str pages: number of pages to retrieve or -1 for all
+    :param state.CrawlState state: the state of the previous crawl, defaults to None
+    :param int release_margin: safety margin between the crash date and the release date (day), `None` to process all
+        the detail pages
+    :param int listing_concurrency: maximum number of news pages fetched at the same time
+    """
+    news_pages = fetch_news_pages(session, pages, listing_concurrency, tracker.to_date, release_margin)
+    try:
+        async for page, news_page in news_pages:
+            if tracker.stop.is_set():
+                break
+
+            # The pages before the first one may have been skipped.
+            if not tracker.pending:
+                tracker.skip_to(page)
+
+            if not await process_news_page(page, news_page, queue, tracker, pages, state, release_margin):
+                break
+    finally:
+        await news_pages.aclose()
+
+
+async def process_news_page(
+        page,
+        news_page,
+        queue,
+        tracker,
+        pages=-1,
+        state=None,
+        release_margin=apd.RELEASE_DATE_MARGIN,
+):
+    """
+    Queue the detail page links of a news page.
+
+    :param int page: the news page number
+    :param str news_page: the content of the news page
+    :param asyncio.Queue queue: the queue feeding the detail page workers
+    :param CrawlTracker tracker: the crawl tracker
+    :param str pages: number of pages to retrieve or -1 for all
+    :param state.CrawlState state: the state of the previous crawl, defaults to None
+    :param int release_margin: safety margin between the crash date and the release date (day), `None` to process all
+        the detail pages
+    :return: `True` if the next news page must be processed, `False` otherwise.
+    :rtype: bool
+    """
+    # Looks for traffic fatality entries.
+    entries = apd.parse_news_page(news_page)
+
+    # Skip the entries which were already processed.
+    new_entries = [entry for entry in entries if not state.is_known(entry.url)] if state else entries
+
+    # Skip the entries released outside of the time range.
+    entries_in_range = new_entries
+    if release_margin is not None:
+        entries_in_range = [
+            entry for entry in new_entries
+            if apd.is_released_within(entry, tracker.from_date, tracker.to_date, release_margin)
+        ]
+    links = [entry.url for entry in entries_in_range]
+    logger.debug(f'{len(links)} fatality page(s) to process.')
+
+    # Queue the links for the workers.
+    tracker.add_page(page, len(links))
+    for index, link in enumerate(links):
+        await queue.put((page, index, link))
+
+    # Stop if there is no further pages.
+    if not apd.has_next(news_page) or page >= pages > 0:
+        return False
+
+    # Stop if the page contains only known links.
+    if entries and not new_entries:
+        logger.debug(f'Page {page} contains only known fatality pages.')
+        return False
+
+    # Stop if the page contains only entries released before the time range.
+    if release_margin is not None and entries and all(
+            apd.is_released_before(entry, tracker.from_date, release_margin) for entry in entries):
+        logger.debug(f'Page {page} contains only fatality pages released before {tracker.from_date}.')
+        return False
+
+    return True
+
+
+async def process_detail_pages(session, queue, tracker, fetcher, dump=False):
+    """
+    Fetch and parse the detail pages from the queue.
+
+    Once the crawl is stopped, the remaining links are drained from the queue without being fetched.
+
+    :param aiohttp.ClientSession session: aiohttp session
+    :param asyncio.Queue queue: the queue containing the detail page links
+    :param CrawlTracker tracker: the crawl tracker
+    :param coroutine fetcher: the coroutine fetching and parsing a detail page
+    :param bool dump: dump reports with parsing issues
+    """
+    while True:
+        page, index, link = await queue.get()
+        try:
+            if not tracker.stop.is_set():
+                report = await fetcher(session, link, dump)
+                tracker.add_report(page, index, report)
+        except asyncio.CancelledError:  # pylint: disable=try-except-raise
+            # The cancellation is an `Exception` before Python 3.8, but it is not a failure of the page.
+            raise
+        except Exception as e:
+            tracker.fail(page, e)
+        finally:
+            queue.task_done()
+
+
+async def with_cache(cache, coroutine):
+    """
+    Run a coroutine with a response cache.
+
+    The cache is set in the context of the task running the coroutine, therefore it is not visible outside of the task.
+
+    :param cache.ResponseCache cache: the HTTP response cache, or None
+    :param coroutine coroutine: the coroutine
+    :return: the result of the coroutine.
+    """
+    apd.response_cache.set(cache)
+    return await coroutine
+
+
+def discard_known_reports(reports, state=None):
+    """
+    Discard the reports which were already known, and record the new ones in the state.
+
+    :param list reports: the reports
+    :param state.CrawlState state: the state of the previous crawl, defaults to None
+    :return: the new reports.
+    :rtype: list
+    """
+    if not state:
+        return reports
+
+    new_reports = [report for report in reports if report.case not in state.cases]
+    state.update([], new_reports)
+    return new_reports
+
+
+async def iter_reports(
+        pages=-1,
+        from_=None,
+        to=None,
+        attempts=1,
+        backoff=1,
+        dump=False,
+        concurrency=10,
+        cache=None,
+        state=None,
+        release_margin=apd.RELEASE_DATE_MARGIN,
+        listing_concurrency=4,
+        executor=None,
+        html_parser='html.parser',
+        tracker=None,
+):
+    """
+    Retrieve fatality data, yielding the reports as the crawl progresses.
+
+    Whether the crawl must stop is decided once all the detail pages of a news page are processed, therefore the new
+    reports of a news page are yielded as soon as the news page is evaluated. The reports which are not consumed are
+    not kept by the crawl.
+
+    The crawl stops when the iteration is stopped.
+
+    :param str pages: number of pages to retrieve or -1 for all
+    :param str from_: the start date
+    :param str to: the end date
+    :param int attempts: number of attempts per report
+    :param int backoff: initial backoff time (second)
+    :param bool dump: dump reports with parsing issues
+    :param int concurrency: maximum number of detail pages processed at the same time
+    :param cache.ResponseCache cache: the HTTP response cache, defaults to None
+    :param state.CrawlState state: the state of the previous crawl for incremental crawls, defaults to None. It gets
+        updated with the results of the crawl.
+    :param int release_margin: safety margin between the crash date and the release date (day) used to skip the
+        detail pages released outside of the time range, `None` to process all the detail pages
+    :param int listing_concurrency: maximum number of news pages fetched at the same time
+    :param concurrent.futures.Executor executor: the executor parsing the detail pages, defaults to None to parse them
+        in the event loop
+    :param str html_parser: the HTML parser, one of `article.HTML_PARSERS`
+    :param CrawlTracker tracker: the crawl tracker, defaults to None to create one for the time range. It gives access
+        to the progress of the crawl, like the number of pages that were read.
+    :return: an asynchronous generator of `model.Report` objects.
+    :rtype: async_generator
+    """
+    tracker = tracker or CrawlTracker.from_range(from_, to)
+    queue = asyncio.Queue(maxsize=concurrency)
+    fetcher = functools.partial(
+        apd.fetch_and_parse.retry_with(
+            stop=stop_after_attempt(attempts),
+            wait=wait_exponential(multiplier=backoff),
+            reraise=True,
+        ),
+        executor=executor,
+        html_parser=html_parser,
+    )
+
+    logger.debug(f'Retrieving fatalities from {tracker.from_date} to {tracker.to_date}.')
+
+    async def crawl():
+        await produce_news_pages(session, queue, tracker, pages, state, release_margin, listing_concurrency)
+        await queue.join()
+
+    async with aiohttp.ClientSession() as session:
+        workers = [
+            asyncio.ensure_future(with_cache(cache, process_detail_pages(session, queue, tracker, fetcher, dump)))
+            for _ in range(concurrency)
+        ]
+        crawler = asyncio.ensure_future(with_cache(cache, crawl()))
+        try:
+            finished = False
+            while not finished:
+                # Wait for new reports, or for the end of the crawl.
+                if not crawler.done():
+                    ready = asyncio.ensure_future(tracker.ready.wait())
+                    await asyncio.wait([crawler, ready], return_when=asyncio.FIRST_COMPLETED)
+                    ready.cancel()
+                finished = crawler.done()
+                if finished:
+                    crawler.result()
+                    if tracker.error:
+                        raise tracker.error
+
+                for report in discard_known_reports(tracker.pop_reports(), state):
+                    yield report
+        finally:
+            crawler.cancel()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(crawler, *workers, return_exceptions=True)
+
+    if state:
+        state.update(tracker.links, [])
+
+
+async def async_retrieve(
+        pages=-1,
+        from_=None,
+        to=None,
+        attempts=1,
+        backoff=1,
+        dump=False,
+        concurrency=10,
+        cache=None,
+        state=None,
+        release_margin=apd.RELEASE_DATE_MARGIN,
+        listing_concurrency=4,
+        executor=None,
+        html_parser='html.parser',
+):
+    """
+    Retrieve fatality data.
+
+    The reports yielded by `iter_reports` are collected.
+
+    :param str pages: number of pages to retrieve or -1 for all
+    :param str from_: the start date
+    :param str to: the end date
+    :param int attempts: number of attempts per report
+    :param int backoff: initial backoff time (second)
+    :param bool dump: dump reports with parsing issues
+    :param int concurrency: maximum number of detail pages processed at the same time
+    :param cache.ResponseCache cache: the HTTP response cache, defaults to None
+    :param state.CrawlState state: the state of the previous crawl for incremental crawls, defaults to None. It gets
+        updated with the results of the crawl.
+    :param int release_margin: safety margin between the crash date and the release date (day) used to skip the
+        detail pages released outside of the time range, `None` to process all the detail pages
+    :param int listing_concurrency: maximum number of news pages fetched at the same time
+    :param concurrent.futures.Executor executor: the executor parsing the detail pages, defaults to None to parse them
+        in the event loop
+    :param str html_parser: the HTML parser, one of `article.HTML_PARSERS`
+    :return: the list of fatalities and the number of pages that were read.
+    :rtype: tuple
+    """
+    tracker = CrawlTracker.from_range(from_, to)
+    reports = [
+        report async for report in iter_reports(
+            pages,
+            attempts=attempts,
+            backoff=backoff,
+            dump=dump,
+            concurrency=concurrency,
+            cache=cache,
+            state=state,
+            release_margin=release_margin,
+            listing_concurrency=listing_concurrency,
+            executor=executor,
+            html_parser=html_parser,
+            tracker=tracker,
+        )
+    ]
+    return reports, tracker.last_page
@@ -1,7 +1,67 @@
-"""Define a module to manipulate dates."""
-import datetime
+"""
+Define a module to manipulate dates.
+
+The dates and times are first parsed with the formats used in the APD bulletins, and only fall back to `dateparser`
+when none of them matches. The number of fast-path and fallback parses is tracked in `STATS`.
 
-import dateparser
+The results are memoized in LRU caches, shared by all the threads of a process, since the same strings are parsed many
+times.
+"""
+import calendar
+import collections
+import datetime
+import functools
+import re
+
+from dateparser.date import DateDataParser
+from dateparser.search import search_dates
+from loguru import logger
+
+# Languages used by the `dateparser` fallback.
+LANGUAGES = ['en']
+
+# Month numbers indexed by their lowercase English names and abbreviations.
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+MONTHS.update({abbr.lower(): number for number, abbr in enumerate(calendar.month_abbr) if abbr})
+MONTHS['sept'] = 9
+
+# Date formats used in the APD bulletins.
+DATE_FORMATS = [
+    # January 15, 2019 / Wednesday, Oct. 3, 2018 / feb 2 2018
+    re.compile(
+        r'''
+        ^(?:[a-z]+day,?\s)?                   # Optional day of the week.
+        (?P<month>[a-z]+)\.?\s                # Month name.
+        (?P<day>\d{1,2})(?:st|nd|rd|th)?,?\s  # Day.
+        (?P<year>\d{4})$                      # Year.
+        ''',
+        re.IGNORECASE | re.VERBOSE,
+    ),
+    # 1/2/1990 / 10-1-17 / 2,2,19
+    re.compile(r'^(?P<month>\d{1,2})(?P<sep>[/\-, ])(?P<day>\d{1,2})(?P=sep)(?P<year>\d{4}|\d{2})$'),
+    # 2019-01-15
+    re.compile(r'^(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})$'),
+]
+
+# Time formats used in the APD bulletins.
+TIME_FORMATS = [
+    # 4:30 p.m. / 01:14a.m. / 8 PM
+    re.compile(r'^(?P<hour>\d{1,2})(?::?(?P<minute>\d{2}))?\s?(?P<meridiem>[ap])\.?\s?m\.?$', re.IGNORECASE),
+    # 18:05
+    re.compile(r'^(?P<hour>\d{1,2}):(?P<minute>\d{2})$'),
+]
+
+# Number of parses indexed by kind of parse and path ('fast' or 'fallback').
+STATS = collections.Counter()
+
+# Default maximum number of results kept in each parse cache.
+DEFAULT_CACHE_SIZE = 4096
+
+# The `dateparser` parsers indexed by their settings.
+_date_parsers = {}
+
+# The memoized parse functions indexed by kind of parse.
+_caches = {}
 
 
 def is_before(d1, d2):
@@ -76,15 +136,12 @@ def parse_date(date, default=None, settings=None):
     :rtype: datetime.date
     """
 
-    try:
-        d = dateparser.parse(date, settings=settings)
-        if d:
-            return d.date()
-        raise ValueError(f'Cannot parse date: {date}')
-    except Exception:
-        if default:
-            return default
-        raise ValueError(f'No default value for unparseable date: {date}')
+    d = _caches['date'](date, tuple(sorted((settings or {}).items())))
+    if d:
+        return d
+    if default:
+        return default
+    raise ValueError(f'No default value for unparseable date: {date}')
 
 
 def parse_time(time):
@@ -96,10 +153,234 @@ def parse_time(time):
     :rtype: datetime.time
     """
 
-    dt = dateparser.parse(time)
+    return _caches['time'](time)
+
+
+def search_date(text):
+    """
+    Search for the first date in a text.
+
+    :param str text: text containing a date
+    :return: a date object representing the first date found, or `None`.
+    :rtype: datetime.date
+    """
+    return _caches['search'](text)
+
+
+def _parse_date(date, settings):
+    """
+    Parse a date, using `dateparser` if the fast path does not match.
+
+    :param str date: date
+    :param tuple settings: the items of the parsing options
+    :return: a date object representing the date, or `None`.
+    :rtype: datetime.date
+    """
+    d = fast_parse_date(date)
+    if d:
+        STATS['date', 'fast'] += 1
+        return d
+
+    STATS['date', 'fallback'] += 1
+    try:
+        dt = get_date_parser(dict(settings)).get_date_data(date)['date_obj']
+    except Exception:
+        return None
+    return None if not dt else dt.date()
+
+
+def _parse_time(time):
+    """
+    Parse a time, using `dateparser` if the fast path does not match.
+
+    :param str time: time
+    :return: a time object representing the time, or `None`.
+    :rtype: datetime.time
+    """
+    t = fast_parse_time(time)
+    if t:
+        STATS['time', 'fast'] += 1
+        return t
+
+    STATS['time', 'fallback'] += 1
+    dt = get_date_parser().get_date_data(time)['date_obj']
     return None if not dt else dt.time()
 
 
+def _search_date(text):
+    """
+    Search for the first date in a text, using `dateparser` if the fast path does not match.
+
+    :param str text: text containing a date
+    :return: a date object representing the first date found, or `None`.
+    :rtype: datetime.date
+    """
+    d = fast_parse_date(text)
+    if d:
+        STATS['search', 'fast'] += 1
+        return d
+
+    STATS['search', 'fallback'] += 1
+    dates = search_dates(text, languages=LANGUAGES)
+    return dates[0][1].date() if dates else None
+
+
+def set_cache_size(maxsize=DEFAULT_CACHE_SIZE):
+    """
+    Replace the parse caches with empty caches of a given size.
+
+    :param int maxsize: maximum number of results kept in each cache, `None` for no limit, 0 to disable the caches
+    """
+    _caches['date'] = functools.lru_cache(maxsize=maxsize)(_parse_date)
+    _caches['time'] = functools.lru_cache(maxsize=maxsize)(_parse_time)
+    _caches['search'] = functools.lru_cache(maxsize=maxsize)(_search_date)
+
+
+def clear_cache():
+    """Empty the parse caches."""
+    for cache in _caches.values():
+        cache.cache_clear()
+
+
+def cache_info():
+    """
+    Return the statistics of the parse caches.
+
+    :return: a dictionary of `functools._CacheInfo` named tuples (`hits`, `misses`, `maxsize`, `currsize`), indexed by
+        kind of parse.
+    :rtype: dict
+    """
+    return {kind: cache.cache_info() for kind, cache in _caches.items()}
+
+
+def get_date_parser(settings=None):
+    """
+    Return the `dateparser` parser for a set of settings.
+
+    The parsers are restricted to `LANGUAGES` and only created once, since their creation is expensive.
+
+    :param dict settings: a dictionary containing the parsing options
+    :return: the parser.
+    :rtype: dateparser.date.DateDataParser
+    """
+    key = tuple(sorted((settings or {}).items()))
+    parser = _date_parsers.get(key)
+    if not parser:
+        parser = _date_parsers.setdefault(key, DateDataParser(languages=LANGUAGES, settings=settings))
+    return parser
+
+
+def warm_up(cache_size=None):
+    """
+    Load the `dateparser` data ahead of the first fallback parse.
+
+    :param int cache_size: maximum number of results kept in each parse cache, defaults to None to keep the current
+        caches
+    """
+    if cache_size is not None:
+        set_cache_size(cache_size)
+    get_date_parser().get_date_data('January 1, 2019')
+    search_dates('January 1, 2019', languages=LANGUAGES)
+
+
+def fast_parse_date(date):
+    """
+    Parse a date using the formats of `DATE_FORMATS`.
+
+    :param str date: date
+    :return: a date object representing the date, or `None` if no format matches.
+    :rtype: datetime.date
+    """
+    if not date:
+        return None
+
+    normalized_date = ' '.join(date.split())
+    for date_format in DATE_FORMATS:
+        match = date_format.match(normalized_date)
+        if not match:
+            continue
+
+        month = match.group('month')
+        month = int(month) if month.isdigit() else MONTHS.get(month.lower())
+        year = int(match.group('year'))
+        if len(match.group('year')) == 2:
+            year += 1900 if year >= 69 else 2000
+        try:
+            return datetime.date(year, month, int(match.group('day')))
+        except (TypeError, ValueError):
+            return None
+
+    return None
+
+
+def fast_parse_time(time):
+    """
+    Parse a time using the formats of `TIME_FORMATS`.
+
+    :param str time: time
+    :return: a time object representing the time, or `None` if no format matches.
+    :rtype: datetime.time
+    """
+    if not time:
+        return None
+
+    normalized_time = time.strip()
+    for time_format in TIME_FORMATS:
+        match = time_format.match(normalized_time)
+        if not match:
+            continue
+
+        hour = int(match.group('hour'))
+        minute = int(match.group('minute') or 0)
+        meridiem = match.groupdict().get('meridiem')
+        if meridiem:
+            # Leave the inconsistent values, like "18:46 pm", to the fallback.
+            if not 1 <= hour <= 12:
+                return None
+            hour = hour % 12 + (12 if meridiem.lower() == 'p' else 0)
+        try:
+            return datetime.time(hour, minute)
+        except ValueError:
+            return None
+
+    return None
+
+
+def parse_stats():
+    """
+    Compute the fast-path hit rate of each kind of parse.
+
+    The statistics are collected per process, and only count the parses which were not found in the caches. The
+    statistics of the parse worker processes are merged into the ones of the main process by `apd.fetch_and_parse`.
+
+    :return: a dictionary of `(fast, fallback, hit_rate)` tuples indexed by kind of parse.
+    :rtype: dict
+    """
+    stats = {}
+    for kind in sorted({kind for kind, _ in STATS}):
+        fast = STATS[kind, 'fast']
+        fallback = STATS[kind, 'fallback']
+        stats[kind] = (fast, fallback, fast / (fast + fallback) if fast + fallback else 0.0)
+    return stats
+
+
+def log_parse_stats(caches=True):
+    """
+    Log the fast-path hit rate of each kind of parse, and the statistics of the parse caches.
+
+    The caches belong to each process, therefore their statistics are only meaningful if the dates were parsed by the
+    current process.
+
+    :param bool caches: `True` to log the statistics of the parse caches, defaults to True
+    """
+    for kind, (fast, fallback, hit_rate) in parse_stats().items():
+        logger.debug(f'{kind.capitalize()} parsing: {fast} fast, {fallback} fallback ({hit_rate:.1%} fast).')
+    if not caches:
+        return
+    for kind, info in cache_info().items():
+        logger.debug(f'{kind.capitalize()} cache: {info.hits} hits, {info.misses} misses, {info.currsize} entries.')
+
+
 def is_between(date, from_=None, to=None):
     """
     Check whether a date is comprised between 2 others.
@@ -130,3 +411,6 @@ def compute_age(date, dob):
 
     # Compute the age.
     return (date - dob).days // DAYS_IN_YEAR
+
+
+set_cache_size()
@@ -9,19 +9,59 @@ Deceased is a special field as it contains a lot of other fields:
 - Gender
 - Date of birth
 - (Notes)
+
+The format of a deceased field is classified from cheap features of the text, in order to only run the parsers which
+can handle it. The number of fields parsed by each parser is tracked in `STATS`.
 """
 import calendar
+import collections
 from dataclasses import asdict
 from dataclasses import dataclass
+import functools
 import re
 
 # import bs4
+from loguru import logger
 from pydantic import ValidationError
 
 from scrapd.core import date_utils
 from scrapd.core import model
 from scrapd.core.constant import Fields
 
+# Tokens introducing the DOB, by order of precedence.
+DOB_TOKENS = {
+    token: rank
+    for rank, token in enumerate(
+        ['Born', 'born', 'DOB:', 'D.O.B.', '(DOB:', '(DOB', '(D.O.B:', '(D.O.B.', '(D.O.B', 'DOB', Fields.DOB])
+}
+
+# Delimiters of the tokens of the comma and space delimited deceased fields.
+COMMA_DELIMITERS = re.compile(r' |(?<=[A-Za-z])/')
+SPACE_DELIMITERS = re.compile(r' |/')
+
+# Age of the victim.
+AGE_PATTERN = re.compile(r'([0-9]+) years')
+
+# Description of an unidentified victim.
+UNIDENTIFIED_PATTERN = re.compile(
+    r'''
+    (?:                         # Non captured group
+    (Unidentified               # The "Unidentified" keyword
+    |                           # Or
+    Unknown                     # The "Unknown" keyword
+    )
+    ,?                          # Potentially a comma
+    \s                          # A whitespace
+    (?P<ethinicty>[^\s]+\s)?    # The ethinicty
+    (?P<gender>female|male)     # The gender
+    )
+    ''',
+    re.VERBOSE,
+)
+
+# Number of deceased fields indexed by the format which parsed them, or 'unparsed'.
+STATS = collections.Counter()
+
 
 @dataclass
 class Name:
@@ -187,20 +227,42 @@ def dob_search(split_deceased_field):
     :return: the DOB index within the split deceased field.
     :rtype: int
     """
-    dob_index = -1
-    dob_tokens = [Fields.DOB, 'DOB', '(D.O.B', '(D.O.B.', '(D.O.B:', '(DOB', '(DOB:', 'D.O.B.', 'DOB:', 'born', 'Born']
-    while dob_index < 0 and dob_tokens:
-        dob_token = dob_tokens.pop()
-        try:
-            dob_index = split_deceased_field.index(dob_token)
-        except ValueError:
-            pass
-        else:
-            break
+    dob_rank, dob_index = len(DOB_TOKENS), -1
+    for index, token in enumerate(split_deceased_field):
+        rank = DOB_TOKENS.get(token, dob_rank)
+        if rank < dob_rank:
+            dob_rank, dob_index = rank, index
 
     return dob_index
 
 
+def classify_deceased_field(deceased_field, split_deceased_field):
+    """
+    Find the formats which can be used to parse a deceased field.
+
+    The formats whose parser would fail are ruled out from cheap features of the field. The space delimited format can
+    only be recognized by parsing its DOB, therefore it is always a candidate.
+
+    :param str deceased_field: the deceased field
+    :param list split_deceased_field: the tokens of the deceased field, split like a comma delimited field
+    :return: the names and the parse methods of the candidate formats, by order of precedence.
+    :rtype: list
+    """
+    formats = []
+    if dob_search(split_deceased_field) >= 0:
+        parse_comma = functools.partial(parse_comma_delimited_deceased_field, split_deceased_field=split_deceased_field)
+        formats.append(('comma', parse_comma))
+    if '|' in deceased_field:
+        formats.append(('pipe', parse_pipe_delimited_deceased_field))
+    formats.append(('space', parse_space_delimited_deceased_field))
+    if AGE_PATTERN.search(deceased_field):
+        formats.append(('age', parse_age_deceased_field))
+    if 'Unidentified' in deceased_field or 'Unknown' in deceased_field:
+        formats.append(('unidentified', parse_unidentified))
+
+    return formats
+
+
 def process_deceased_field(deceased_field):
     """
     Parse the deceased field.
@@ -212,26 +274,20 @@ def process_deceased_field(deceased_field):
     :return: a tuple containing a model.Fatality and a list of associated parsing errors.
     :rtype: tuple(model.Fatality, list())
     """
-    # Parse methods ordered by usage.
-    parse_methods = [
-        parse_comma_delimited_deceased_field,
-        parse_pipe_delimited_deceased_field,
-        parse_space_delimited_deceased_field,
-        parse_age_deceased_field,
-        parse_unidentified,
-    ]
-
-    # Execute the parsing methods in order.
-    for m in parse_methods:
+    # Execute the parsing methods of the candidate formats in order.
+    for name, m in classify_deceased_field(deceased_field, COMMA_DELIMITERS.split(deceased_field)):
         try:
             d = m(deceased_field)
             if isinstance(d, dict):
+                STATS[name] += 1
                 return [to_fatality(d)]
             if isinstance(d, list):
+                STATS[name] += 1
                 return [to_fatality(entry) for entry in d]
         except (ValueError, IndexError):
             pass
 
+    STATS['unparsed'] += 1
     raise ValueError(f'cannot parse {Fields.DECEASED}: "{deceased_field}"')  # pragma: no cover
 
 
@@ -243,27 +299,27 @@ def parse_age_deceased_field(deceased_field):
     :return: a dictionary representing the deceased field.
     :rtype: dict
     """
-    age_pattern = re.compile(r'([0-9]+) years')
-
-    age = re.search(age_pattern, deceased_field)
+    age = AGE_PATTERN.search(deceased_field)
     if age is None:
         raise ValueError("age not found in Deceased field")
-    split_deceased_field = age_pattern.split(deceased_field)
+    split_deceased_field = AGE_PATTERN.split(deceased_field, maxsplit=1)
     d = parse_fleg(split_deceased_field[0].split())
     d[Fields.AGE] = int(age.group(1))
 
     return d
 
 
-def parse_comma_delimited_deceased_field(deceased_field):
+def parse_comma_delimited_deceased_field(deceased_field, split_deceased_field=None):
     """
     Parse deceased fields seperated with commas.
 
     :param str deceased_field: a list representing the deceased field
+    :param list split_deceased_field: the tokens of the deceased field, defaults to None to split the field
     :return: a dictionary representing the deceased field.
     :rtype: dict
     """
-    split_deceased_field = re.split(r' |(?<=[A-Za-z])/', deceased_field)
+    if split_deceased_field is None:
+        split_deceased_field = COMMA_DELIMITERS.split(deceased_field)
 
     # Find the DOB token as we use it as a delimiter.
     dob_index = dob_search(split_deceased_field)
@@ -302,7 +358,7 @@ def parse_space_delimited_deceased_field(deceased_field):
     :return: a dictionary representing the deceased field.
     :rtype: dict
     """
-    split_deceased_field = re.split(r' |/', deceased_field)
+    split_deceased_field = SPACE_DELIMITERS.split(deceased_field)
     fleg = split_deceased_field[:-1]
     return parse_deceased_field_common(split_deceased_field, fleg)
 
@@ -315,22 +371,7 @@ def parse_unidentified(deceased_field):
     :return: a list of dictionaries representing the deceased field.
     :rtype: list of dicts
     """
-    unidentified_deceased_pattern = re.compile(
-        r'''
-        (?:                         # Non captured group
-        (Unidentified               # The "Unidentified" keyword
-        |                           # Or
-        Unknown                     # The "Unknown" keyword
-        )
-        ,?                          # Potentially a comma
-        \s                          # A whitespace
-        (?P<ethinicty>[^\s]+\s)?    # The ethinicty
-        (?P<gender>female|male)     # The gender
-        )
-        ''',
-        re.VERBOSE,
-    )
-    matches = re.finditer(unidentified_deceased_pattern, deceased_field)
+    matches = UNIDENTIFIED_PATTERN.finditer(deceased_field)
     unidentified_fatalities = []
     for match in matches:
         d = {
@@ -362,3 +403,10 @@ def parse_deceased_field_common(split_deceased_field, fleg):
     d[Fields.DOB] = date_utils.check_dob(dob_guess)
 
     return d
+
+
+def log_parse_stats():
+    """Log the number of deceased fields parsed with each format."""
+    if STATS:
+        counts = ', '.join(f'{count} {name}' for name, count in STATS.most_common())
+        logger.debug(f'Deceased parsing: {counts}.')
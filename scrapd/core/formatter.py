@@ -5,32 +5,31 @@ This module contains all the classes with the ability to print the results. They
 formatter used to print the results and can be sdtout, sdterr, a file or even a remote storage if the formatter allows
 it.
 """
+import asyncio
+import concurrent.futures
+import contextlib
 import csv
 import datetime
+import functools
 import json
+import operator
+from pathlib import Path
 import pprint
+import queue
 import sys
+import time
 
-from scrapd.core.constant import Fields
+from scrapd.core.constant import ROW_FIELDS
+from scrapd.core import columnar
 from scrapd.core import model
+from scrapd.core import record
 
-CSVFIELDS = [
-    Fields.CRASH,
-    Fields.CASE,
-    Fields.DATE,
-    Fields.TIME,
-    Fields.LOCATION,
-    Fields.FIRST_NAME,
-    Fields.MIDDLE_NAME,
-    Fields.LAST_NAME,
-    Fields.GENERATION,
-    Fields.ETHNICITY,
-    Fields.GENDER,
-    Fields.DOB,
-    Fields.AGE,
-    Fields.LINK,
-    Fields.NOTES,
-]
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+CSVFIELDS = list(ROW_FIELDS)
 
 
 def json_serializers(obj):
@@ -39,29 +38,151 @@ def json_serializers(obj):
 
     :rtype: str
     """
-    json_encoders = {
-        datetime.date: lambda x: x.strftime("%Y-%m-%d"),
-        datetime.time: lambda x: x.strftime("%H:%M:%S"),
-        model.Ethnicity: lambda x: x.value,
-        model.Fatality: lambda x: x.dict(),
-        model.Gender: lambda x: x.value,
-        model.Report: lambda x: x.dict(),
-    }
     try:
-        return json_encoders[type(obj)](obj)
+        return JSON_ENCODERS[type(obj)](obj)
     except KeyError:
         raise TypeError("Type %s not serializable" % type(obj))
 
 
-def to_json(results):
+def format_date(value):
+    """
+    Format a date like `value.strftime("%Y-%m-%d")`, but faster.
+
+    :param datetime.date value: the date
+    :rtype: str
+    """
+    return f'{value.year}-{value.month:02}-{value.day:02}'
+
+
+def format_time(value):
+    """
+    Format a time like `value.strftime("%H:%M:%S")`, but faster.
+
+    :param datetime.time value: the time
+    :rtype: str
+    """
+    return f'{value.hour:02}:{value.minute:02}:{value.second:02}'
+
+
+def field_plan(model_, fatalities=None):
+    """
+    Precompute how the fields of a model are converted to JSON values.
+
+    :param type model_: the model
+    :param function fatalities: the converter of the fatalities
+    :return: the names of the fields and their converters, `None` if the values are kept as they are.
+    :rtype: tuple
+    """
+    converters = {
+        datetime.date: format_date,
+        datetime.time: format_time,
+        model.Ethnicity: operator.attrgetter('value'),
+        model.Fatality: fatalities,
+        model.Gender: operator.attrgetter('value'),
+    }
+    return tuple((name, converters.get(field.type_)) for name, field in model_.__fields__.items())
+
+
+def to_json_object(value):
+    """
+    Convert the reports and the fatalities to JSON objects, in a single pass.
+
+    The fields are converted using the plan of their model, therefore the reports do not need to be converted to
+    dictionaries first. The lists are converted recursively, and the other values are kept as they are.
+
+    :param value: a report, a fatality, or a list of them
+    :return: the JSON object.
+    """
+    plan = JSON_PLANS.get(type(value))
+    if plan is None:
+        if isinstance(value, (list, tuple)):
+            return [to_json_object(item) for item in value]
+        return value
+
+    json_object = {}
+    for name, converter in plan:
+        field_value = getattr(value, name)
+        json_object[name] = field_value if converter is None or field_value is None else converter(field_value)
+    return json_object
+
+
+def to_compact_json(value):
+    """
+    Convert a value to a compact JSON string, without indentation and without sorting the keys.
+
+    `orjson` is used if it is installed.
+
+    :param value: the value, converted by `to_json_object`
+    :rtype: str
+    """
+    if orjson:
+        return orjson.dumps(value, default=json_serializers).decode()
+    return json.dumps(value, separators=(',', ':'), default=json_serializers)
+
+
+def to_csv_rows(entry):
+    """
+    Convert a report to CSV rows, one per fatality.
+
+    :param model.Report entry: the report
+    :return: the rows, as tuples of values in the order of `CSVFIELDS`.
+    :rtype: generator
+    """
+    for fatality in entry.fatalities:
+        yield (
+            entry.crash,
+            entry.case,
+            entry.date,
+            entry.time,
+            entry.location,
+            fatality.first,
+            fatality.middle,
+            fatality.last,
+            fatality.generation,
+            fatality.ethnicity.value,
+            fatality.gender.value,
+            fatality.dob,
+            fatality.age,
+            entry.link,
+            entry.notes,
+        )
+
+
+def to_json(results, compact=False):
     """
     Convert dict of parsed fields to JSON string.
 
     :param results dict: results of scraping APD news site
+    :param bool compact: `True` to skip the indentation and the sorting of the keys
 
     :rtype: str
     """
-    return json.dumps(results, sort_keys=True, indent=2, default=json_serializers)
+    if compact:
+        return to_compact_json(to_json_object(results))
+    return json.dumps(to_json_object(results), sort_keys=True, indent=2, default=json_serializers)
+
+
+# The custom objects which are converted by `json_serializers`.
+JSON_ENCODERS = {
+    datetime.date: format_date,
+    datetime.time: format_time,
+    model.Ethnicity: lambda x: x.value,
+    model.Fatality: to_json_object,
+    model.Gender: lambda x: x.value,
+    model.Report: to_json_object,
+    record.FatalityRecord: to_json_object,
+    record.ReportRecord: to_json_object,
+}
+
+# The conversion plans of the reports and of the fatalities, by type.
+FATALITY_PLAN = field_plan(model.Fatality)
+REPORT_PLAN = field_plan(model.Report, fatalities=to_json_object)
+JSON_PLANS = {
+    model.Fatality: FATALITY_PLAN,
+    model.Report: REPORT_PLAN,
+    record.FatalityRecord: FATALITY_PLAN,
+    record.ReportRecord: REPORT_PLAN,
+}
 
 
 class Formatter():
@@ -74,18 +195,25 @@ class Formatter():
     formatters = {}
     __format_name__ = 'default'
 
-    def __init__(self, format_='json', output=None):  # noqa: D107
+    # Whether the results are printed as they are produced.
+    streaming = False
+
+    def __init__(self, format_='json', output=None, **options):  # noqa: D107
         self.format = format_
         self.output = output or sys.stdout
+        # The options of the formatter, passed on to the formatter of the format.
+        self.options = options
 
     def __init_subclass__(cls, **kwargs):  # noqa: D105
         super().__init_subclass__(**kwargs)
-        cls.formatters[cls.__format_name__] = cls
+        # Only register the formatters defining a format name, not the intermediate base classes.
+        if '__format_name__' in cls.__dict__:
+            cls.formatters[cls.__format_name__] = cls
 
     def _get_formatter(self):
         """Return the appropriate formatter."""
-        formatter = self.formatters.get(self.format, self)
-        return formatter()
+        formatter = self.formatters.get(self.format)
+        return formatter(self.format, self.output, **self.options) if formatter else self
 
     def print(self, results, **kwargs):  # pragma: no cover
         """
@@ -99,6 +227,17 @@ class Formatter():
         formatter = self._get_formatter()
         formatter.printer(results, **kwargs)
 
+    async def aprint(self, results, **kwargs):
+        """
+        Print the results of an asynchronous iterable with the appropriate formatter.
+
+        :param async_iterable results: the results to display.
+        :return: the number of results.
+        :rtype: int
+        """
+        formatter = self._get_formatter()
+        return await formatter.aprinter(results, **kwargs)
+
     # pylint: disable=unused-argument
     def printer(self, results, **kwargs):
         """
@@ -108,6 +247,20 @@ class Formatter():
         """
         print(results, file=self.output)
 
+    async def aprinter(self, results, **kwargs):
+        """
+        Define the printer method of the asynchronous iterables.
+
+        The results are collected, then displayed by `printer`.
+
+        :param async_iterable results: the results to display.
+        :return: the number of results.
+        :rtype: int
+        """
+        results = [entry async for entry in results]
+        self.printer(results, **kwargs)
+        return len(results)
+
 
 class PythonFormatter(Formatter):
     """
@@ -132,44 +285,190 @@ class JSONFormatter(Formatter):
 
     __format_name__ = 'json'
 
-    def printer(self, results, **kwargs):  # noqa: D102
-        json_string = to_json(results)
+    def printer(self, results, compact=False, **kwargs):  # noqa: D102
+        json_string = to_json(results, compact)
         print(json_string, file=self.output)
 
 
-class CSVFormatter(Formatter):
+class StreamingFormatter(Formatter):
+    """
+    Define the base class of the formatters printing the results as soon as they are produced.
+
+    The results can be provided by an iterable or an asynchronous iterable. The output is flushed every `batch_size`
+    results, or when a result is produced after `flush_interval` seconds.
+    """
+
+    streaming = True
+    batch_size = 100
+    flush_interval = 1.0
+
+    def __init__(self, format_='default', output=None, **options):  # noqa: D107
+        super().__init__(format_, output, **options)
+        self.pending = 0
+        self.flushed_at = time.monotonic()
+
+    def printer(self, results, **kwargs):  # noqa: D102
+        self.start(**kwargs)
+        count = 0
+        for count, entry in enumerate(results, 1):
+            self.write(entry)
+            self.written()
+        self.flush()
+        return count
+
+    async def aprinter(self, results, **kwargs):  # noqa: D102
+        self.start(**kwargs)
+        count = 0
+        async for entry in results:
+            count += 1
+            self.write(entry)
+            self.written()
+        self.flush()
+        return count
+
+    def start(self, **kwargs):
+        """Write the beginning of the output."""
+
+    def write(self, entry):
+        """
+        Write a result.
+
+        :param model.Report entry: the result to write
+        """
+        raise NotImplementedError
+
+    def written(self):
+        """Flush the output if enough results were written, or if the last flush is too old."""
+        self.pending += 1
+        if self.pending >= self.batch_size or time.monotonic() - self.flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Flush the output."""
+        self.output.flush()
+        self.pending = 0
+        self.flushed_at = time.monotonic()
+
+
+class JSONLinesFormatter(StreamingFormatter):
+    """
+    Define the JSON Lines formatter.
+
+    Displays each result as a compact JSON object on its own line. The keys are sorted, unless the `compact` option is
+    used.
+    """
+
+    __format_name__ = 'jsonl'
+
+    def __init__(self, format_='default', output=None, compact=False, **options):
+        """
+        Select the JSON encoder.
+
+        :param bool compact: `True` to skip the sorting of the keys
+        """
+        super().__init__(format_, output, **options)
+        self.compact = compact
+
+    def write(self, entry):  # noqa: D102
+        json_object = to_json_object(entry)
+        if self.compact:
+            self.output.write(to_compact_json(json_object))
+        else:
+            self.output.write(json.dumps(json_object, sort_keys=True, separators=(',', ':'), default=json_serializers))
+        self.output.write('\n')
+
+
+class NDJSONFormatter(JSONLinesFormatter):
+    """
+    Define the NDJSON formatter.
+
+    Alias of the JSON Lines formatter.
+    """
+
+    __format_name__ = 'ndjson'
+
+
+class CSVFormatter(StreamingFormatter):
     """
     Define the CSV formatter.
 
-    Displays the results as a CSV.
+    Displays the results as a CSV, with one row per fatality. The header is not written when appending to an existing
+    output.
     """
 
     __format_name__ = 'csv'
 
+    def __init__(self, format_='default', output=None, **options):  # noqa: D107
+        super().__init__(format_, output, **options)
+        self.writer = None
+
+    def start(self, append=False, **kwargs):
+        """
+        Write the header, unless the results are appended to an existing output.
+
+        :param bool append: `True` to append the results to an existing output
+        """
+        self.writer = csv.writer(self.output)
+        if not append:
+            self.writer.writerow(CSVFIELDS)
+
+    def write(self, entry):  # noqa: D102
+        self.writer.writerows(to_csv_rows(entry))
+
+
+class ColumnarFormatter(Formatter):
+    """
+    Define the base class of the formatters writing the results in a binary columnar format.
+
+    The results are written with one row per fatality, like the CSV format. These formatters require `pyarrow`.
+    """
+
+    def __init__(self, format_='default', output=None, **options):  # noqa: D107
+        super().__init__(format_, output, **options)
+        # Fail before retrieving the results if pyarrow is not installed.
+        columnar.import_pyarrow()
+
     def printer(self, results, **kwargs):  # noqa: D102
-        rows = []
-        for entry in results:
-            for fatality in entry.fatalities:
-                rows.append({
-                    Fields.CRASH: entry.crash,
-                    Fields.CASE: entry.case,
-                    Fields.DATE: entry.date,
-                    Fields.TIME: entry.time,
-                    Fields.LOCATION: entry.location,
-                    Fields.FIRST_NAME: fatality.first,
-                    Fields.MIDDLE_NAME: fatality.middle,
-                    Fields.LAST_NAME: fatality.last,
-                    Fields.GENERATION: fatality.generation,
-                    Fields.ETHNICITY: fatality.ethnicity.value,
-                    Fields.GENDER: fatality.gender.value,
-                    Fields.DOB: fatality.dob,
-                    Fields.AGE: fatality.age,
-                    Fields.LINK: entry.link,
-                    Fields.NOTES: entry.notes,
-                })
-        writer = csv.DictWriter(self.output, fieldnames=CSVFIELDS, extrasaction='ignore')
-        writer.writeheader()
-        writer.writerows(rows)
+        # The binary formats are written to the underlying buffer of the text outputs.
+        self.output.flush()
+        sink = getattr(self.output, 'buffer', self.output)
+        self.write(results, sink)
+        sink.flush()
+
+    def write(self, results, sink):
+        """
+        Write the results.
+
+        :param list results: the results to write
+        :param sink: a binary file-like object
+        """
+        raise NotImplementedError
+
+
+class ArrowFormatter(ColumnarFormatter):
+    """
+    Define the Arrow formatter.
+
+    Writes the results as an Arrow IPC file, which can be read with a memory map.
+    """
+
+    __format_name__ = 'arrow'
+
+    def write(self, results, sink):  # noqa: D102
+        columnar.write_arrow(results, sink)
+
+
+class ParquetFormatter(ColumnarFormatter):
+    """
+    Define the Parquet formatter.
+
+    Writes the results as a Parquet file.
+    """
+
+    __format_name__ = 'parquet'
+
+    def write(self, results, sink):  # noqa: D102
+        columnar.write_parquet(results, sink)
 
 
 class CountFormatter(Formatter):
@@ -183,3 +482,137 @@ class CountFormatter(Formatter):
 
     def printer(self, results, **kwargs):  # noqa: D102
         print(len(results), file=self.output)
+
+
+# Marks the end of the results sent to the formatters of a fan-out.
+END_OF_RESULTS = object()
+
+# Marks the abort of the results sent to the formatters of a fan-out, when the results could not all be retrieved.
+ABORTED = object()
+
+
+class ResultsAborted(Exception):
+    """Raised by the results of a fan-out when they could not all be retrieved."""
+
+
+def iter_queue(results_queue):
+    """
+    Iterate over the results of a queue, until the end of the results.
+
+    :param queue.SimpleQueue results_queue: the queue of the results
+    :return: a generator of the results.
+    :rtype: generator
+    :raises ResultsAborted: if the results are aborted
+    """
+    while True:
+        entry = results_queue.get()
+        if entry is END_OF_RESULTS:
+            return
+        if entry is ABORTED:
+            raise ResultsAborted()
+        yield entry
+
+
+def print_queue(formatter, results_queue, **kwargs):
+    """
+    Print the results of a queue, until the end of the results.
+
+    If the results are aborted, the formatters which print the results once they are all retrieved print nothing, and
+    the streaming formatters stop printing.
+
+    :param Formatter formatter: the formatter
+    :param queue.SimpleQueue results_queue: the queue of the results
+    :return: `True` if all the results were printed, `False` if they were aborted.
+    :rtype: bool
+    """
+    results = iter_queue(results_queue)
+    try:
+        if not formatter.streaming:
+            results = list(results)
+        formatter.printer(results, **kwargs)
+    except ResultsAborted:
+        return False
+    return True
+
+
+@contextlib.contextmanager
+def open_output(path, append=False):
+    """
+    Open an output file.
+
+    The results are written to a temporary file which only replaces the output file once all of them are written,
+    therefore an existing output file is kept intact if the results cannot be retrieved. The results appended to an
+    output file are written directly into it.
+
+    :param str path: the path of the output file
+    :param bool append: `True` to append the results to the output file
+    :return: a context manager opening the output file.
+    """
+    if append:
+        with open(path, 'a', newline='') as output:
+            yield output
+        return
+
+    output_file = Path(path)
+    tmp_file = output_file.with_name(f'{output_file.name}.tmp')
+    try:
+        with open(tmp_file, 'w', newline='') as output:
+            yield output
+    except BaseException:
+        with contextlib.suppress(OSError):
+            tmp_file.unlink()
+        raise
+    tmp_file.replace(output_file)
+
+
+class FanOut():
+    """
+    Print the results with several formatters at once.
+
+    Each formatter runs in its own thread and receives the results through its own unbounded queue, therefore a slow
+    output slows down neither the retrieval of the results nor the other outputs.
+
+    If the results cannot all be retrieved, the formatters are aborted, see `print_queue`.
+    """
+
+    def __init__(self, formatters):
+        """
+        Initialize the fan-out.
+
+        :param list formatters: the formatters
+        """
+        self.formatters = [formatter._get_formatter() for formatter in formatters]
+
+    async def aprint(self, results, **kwargs):
+        """
+        Print the results of an asynchronous iterable with all the formatters.
+
+        :param async_iterable results: the results to display.
+        :return: the number of results.
+        :rtype: int
+        """
+        loop = asyncio.get_running_loop()
+        queues = [queue.SimpleQueue() for _ in self.formatters]
+        count = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(self.formatters)) as executor:
+            printers = [
+                loop.run_in_executor(executor, functools.partial(print_queue, formatter, results_queue, **kwargs))
+                for formatter, results_queue in zip(self.formatters, queues)
+            ]
+            # The results are aborted, unless they are all retrieved.
+            end = ABORTED
+            try:
+                async for entry in results:
+                    count += 1
+                    for results_queue in queues:
+                        results_queue.put(entry)
+                    # Stop as soon as an output fails.
+                    for printer in printers:
+                        if printer.done():
+                            printer.result()
+                end = END_OF_RESULTS
+            finally:
+                for results_queue in queues:
+                    results_queue.put(end)
+            await asyncio.gather(*printers)
+        return count
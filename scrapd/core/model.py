@@ -1,6 +1,14 @@
-"""Define the ScrAPD models."""
+"""
+Define the ScrAPD models.
+
+The models are validated when they are created or modified through their public interface. The values produced by the
+parser are trusted instead, and set with `TrustedModel.assign()` or `TrustedModel.trusted()` without being validated
+again, unless the strict validation is enabled with `set_strict_validation()`.
+"""
+import copy
 import datetime
 from enum import Enum
+import functools
 import re
 from typing import List
 
@@ -11,6 +19,22 @@ from pydantic import validator
 from scrapd.core import date_utils
 from scrapd.core import regex
 
+# Pattern of a valid case number.
+CASE_NUMBER_PATTERN = re.compile(r"(\d{2}-\d{3,7})")
+
+# Validate the trusted values as well.
+STRICT_VALIDATION = False
+
+
+def set_strict_validation(strict=False):
+    """
+    Enable or disable the validation of the trusted values.
+
+    :param bool strict: `True` to validate the trusted values as well
+    """
+    global STRICT_VALIDATION  # pylint: disable=global-statement
+    STRICT_VALIDATION = strict
+
 
 class ModelConfig:
     """Represents the Pydantic model configuration."""
@@ -39,8 +63,47 @@ class Ethnicity(Enum):
     white = 'White'
 
 
+class TrustedModel(BaseModel):
+    """Define a model whose trusted values are not validated again."""
+
+    @classmethod
+    def trusted(cls, **values):
+        """
+        Create a model from trusted values.
+
+        The missing values are set to their defaults. In strict mode, the values are validated as usual.
+
+        :param values: the trusted values of the fields
+        :return: the model.
+        :rtype: TrustedModel
+        """
+        if STRICT_VALIDATION:
+            return cls(**values)
+
+        fields_set = set(values)
+        for name, field in cls.__fields__.items():
+            if name not in values:
+                values[name] = copy.deepcopy(field.default)
+        return cls.construct(values, fields_set)
+
+    def assign(self, name, value):
+        """
+        Assign a trusted value to a field.
+
+        In strict mode, the value is validated as usual.
+
+        :param str name: the name of the field
+        :param value: the trusted value
+        """
+        if STRICT_VALIDATION:
+            setattr(self, name, value)
+        else:
+            self.__dict__[name] = value
+            self.__fields_set__.add(name)
+
+
 # @dataclass(config=DataclassConfig)
-class Fatality(BaseModel):
+class Fatality(TrustedModel):
     """Define a a person who died in a crash."""
 
     age: int = 0
@@ -64,7 +127,7 @@ class Fatality(BaseModel):
 
 
 # @dataclass(config=DataclassConfig)
-class Report(BaseModel):
+class Report(TrustedModel):
     """Define a report."""
 
     case: str
@@ -88,10 +151,14 @@ class Report(BaseModel):
             if f.age or not f.dob:
                 continue
 
-            # Compute the age.
-            f.age = date_utils.compute_age(self.date, f.dob)
+            # Compute the age, and let the validation reject the negative ones.
+            age = date_utils.compute_age(self.date, f.dob)
+            if age < 0:
+                f.age = age
+            else:
+                f.assign('age', age)
 
-    def update(self, other, strict=False):
+    def update(self, other, strict=False, trusted=False):
         """
         Update a model in place with values from another one.
 
@@ -99,6 +166,7 @@ class Report(BaseModel):
 
         :param Report other: report to update with
         :param bool strict: strict mode
+        :param bool trusted: `True` to trust the values of the `other` instance, and skip their validation
         """
         # Do nothing if there is no other instance to update from.
         if not other:
@@ -108,6 +176,9 @@ class Report(BaseModel):
         if not isinstance(other, Report):
             raise TypeError(f'other instance is not of type "Report": {type(other)}')
 
+        # Choose how to set the attributes.
+        set_attr = self.assign if trusted else functools.partial(setattr, self)
+
         # Define the list of attrs.
         required_attrs = ['case']
         attrs = ['crash', 'date', 'fatalities', 'link', 'latitude', 'location', 'longitude', 'notes', 'time']
@@ -121,7 +192,7 @@ class Report(BaseModel):
         else:
             # Otherwise the required attributes are overridden.
             for attr in required_attrs:
-                setattr(self, attr, getattr(other, attr))
+                set_attr(attr, getattr(other, attr))
 
         # Set the non-empty attributes of `other` into the empty attributes of the current instance.
         for attr in attrs:
@@ -129,15 +200,14 @@ class Report(BaseModel):
             # Therefore it is all or nothing, but we want to make sure we do not update it with empty values.
             if attr == 'fatalities':
                 if getattr(other, attr):
-                    setattr(self, attr, getattr(other, attr))
+                    set_attr(attr, getattr(other, attr))
             elif not getattr(self, attr) and getattr(other, attr):
-                setattr(self, attr, getattr(other, attr))
+                set_attr(attr, getattr(other, attr))
 
     @validator('case')
     def valid_case_number(cls, v):  # pylint: disable=no-self-argument
         """Ensure a case number is valid."""
-        pattern = re.compile(r"(\d{2}-\d{3,7})")
-        if not regex.match_pattern(v, pattern):
+        if not regex.match_pattern(v, CASE_NUMBER_PATTERN):
             raise ValueError('invalid format: "{v}"')
         return v
 
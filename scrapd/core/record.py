@@ -0,0 +1,145 @@
+"""
+Define compact records of the reports.
+
+The records hold the fields of the `model.Report` and `model.Fatality` models in slots instead of per-instance
+dictionaries. The enumerations are shared singletons and the repeated strings, like the names and the locations, are
+interned. Large numbers of reports therefore fit in a fraction of the memory used by the models.
+
+The records have the same attributes as the models, and can be used directly by the formatters and the filters.
+"""
+import sys
+
+from scrapd.core import model
+
+# The fields of the records, in the order of the models.
+FATALITY_FIELDS = tuple(model.Fatality.__fields__)
+REPORT_FIELDS = tuple(model.Report.__fields__)
+
+# The string fields which are interned.
+INTERNED_FIELDS = {'first', 'generation', 'last', 'location', 'middle'}
+
+
+def intern(value):
+    """
+    Intern a string, in order to share the repeated values.
+
+    :param value: a value
+    :return: the interned string, or the value itself if it is not a string.
+    """
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Record:
+    """Define the base class of the records."""
+
+    __slots__ = ()
+    # The default values of the fields, by name.
+    _defaults = {}
+
+    def __init__(self, **values):
+        """
+        Initialize the record.
+
+        :param values: the values of the fields, the missing fields are set to their defaults
+        """
+        for name in self.__slots__:
+            value = values.get(name, self._defaults[name])
+            setattr(self, name, intern(value) if name in INTERNED_FIELDS else value)
+
+    def dict(self):
+        """
+        Convert the record to a dictionary of its fields.
+
+        The dictionary is the same as the one of the matching pydantic model.
+
+        :rtype: dict
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):  # noqa: D105
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):  # noqa: D105
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+class FatalityRecord(Record):
+    """Define the compact record of a `model.Fatality`."""
+
+    __slots__ = FATALITY_FIELDS
+    _defaults = {name: field.default for name, field in model.Fatality.__fields__.items()}
+
+    @classmethod
+    def from_fatality(cls, fatality):
+        """
+        Create a record from a fatality.
+
+        :param model.Fatality fatality: the fatality
+        :return: the record.
+        :rtype: FatalityRecord
+        """
+        return cls(**{name: getattr(fatality, name) for name in FATALITY_FIELDS})
+
+    def to_fatality(self):
+        """
+        Convert the record to a fatality.
+
+        :return: the fatality.
+        :rtype: model.Fatality
+        """
+        return model.Fatality.trusted(**self.dict())
+
+
+class ReportRecord(Record):
+    """Define the compact record of a `model.Report`, whose fatalities are stored in a tuple."""
+
+    __slots__ = REPORT_FIELDS
+    _defaults = {name: field.default for name, field in model.Report.__fields__.items()}
+
+    def __init__(self, **values):
+        """
+        Initialize the record.
+
+        :param values: the values of the fields, the missing fields are set to their defaults
+        """
+        super().__init__(**values)
+        self.fatalities = tuple(self.fatalities)
+
+    @classmethod
+    def from_report(cls, report):
+        """
+        Create a record from a report.
+
+        :param model.Report report: the report
+        :return: the record.
+        :rtype: ReportRecord
+        """
+        values = {name: getattr(report, name) for name in REPORT_FIELDS}
+        values['fatalities'] = [FatalityRecord.from_fatality(fatality) for fatality in report.fatalities]
+        return cls(**values)
+
+    def to_report(self):
+        """
+        Convert the record to a report.
+
+        :return: the report.
+        :rtype: model.Report
+        """
+        values = self.dict()
+        values['fatalities'] = [fatality.to_fatality() for fatality in self.fatalities]
+        return model.Report.trusted(**values)
+
+    def dict(self):
+        """
+        Convert the record to a dictionary, including its fatalities.
+
+        The dictionary is the same as the one of `model.Report`.
+
+        :rtype: dict
+        """
+        values = super().dict()
+        values['fatalities'] = [fatality.dict() for fatality in self.fatalities]
+        return values
@@ -1,18 +1,48 @@
-"""Functions with regex patterns for parsing APD crash bulletins."""
+"""
+Functions with regex patterns for parsing APD crash bulletins.
 
-import re
+The labelled fields of a bulletin are extracted by `match_fields`: the labels of the fields are located with string
+searches, then the precompiled pattern of each field is matched at the position of its label.
+"""
 
-from dateparser.search import search_dates
+import heapq
+import re
 
+from scrapd.core import date_utils
+from scrapd.core.constant import Fields
 
-def match_location_field(page):
-    """
-    Extract the location information from the content of the fatality page.
-
-    :param page: the content of the fatality page
-    :type page: str
-    """
-    location_pattern = re.compile(
+# Patterns of the labelled fields, anchored at their label.
+FIELD_PATTERNS = {
+    Fields.CASE: re.compile(
+        r'''
+        Case:           # The name of the field we are looking for.
+        .*              # Any character.
+        (\d{2}-\d{6,7}) # The case the number we are looking for.
+        ''',
+        re.VERBOSE,
+    ),
+    Fields.CRASH: re.compile(
+        r'''
+        (?:
+        (?:Traffic\sFatality\s\#(\d{1,3}))
+        |
+        (?:Fatality\sCrash\s\#(\d{1,3}))
+        )
+        ''',
+        re.VERBOSE,
+    ),
+    Fields.DATE: re.compile(
+        r'''
+        >Date:          # The name of the desired field.
+        \s*             # # Any whitespace
+        (?:</span>)?    # Non capture closing span tag
+        (?:</strong>)?  # Non-capture (literal match).
+        ([^<]*)         # Capture any character except '<'.
+        <               # Non-capture (literal match)
+        ''',
+        re.VERBOSE,
+    ),
+    Fields.LOCATION: re.compile(
         r'''
         >Location:      # The name of the desired field.
         \s*             # Any whitespace
@@ -23,8 +53,87 @@ def match_location_field(page):
         ([^<]+)         # Capture any character except '<'.
         ''',
         re.VERBOSE,
-    )
-    return match_pattern(page, location_pattern)
+    ),
+    Fields.TIME: re.compile(
+        r'''
+        Time:                             # The name of the desired field.
+        (?:</strong>)?                    # Non capture closing strong tag
+        \D*?                              # Any non-digit character (lazy).
+        (
+        (?:0?[1-9]|1[0-2]):?[0-5]?\d?     # 12h format.
+        \s*                               # Any whitespace (zero-unlimited).
+        [AaPp]\.?[Mm]\.?                  # AM/PM variations.
+        |                                 # OR
+        (?:[01]?[0-9]|2[0-3]):[0-5][0-9]  # 24h format.
+        )
+        ''',
+        re.VERBOSE,
+    ),
+}
+
+# Literal labels of the fields. A field pattern can only match where one of its labels starts.
+FIELD_LABELS = {
+    Fields.CASE: ('Case:', ),
+    Fields.CRASH: ('Traffic', 'Fatality'),
+    Fields.DATE: ('>Date:', ),
+    Fields.LOCATION: ('>Location:', ),
+    Fields.TIME: ('Time:', ),
+}
+
+
+def find_labels(text, labels):
+    """
+    Find the positions of labels in a text.
+
+    :param str text: the text to look into
+    :param tuple labels: the literal labels to find
+    :return: the positions of the labels, in order.
+    :rtype: generator
+    """
+    positions = [(text.find(label), label) for label in labels]
+    positions = [position for position in positions if position[0] >= 0]
+    heapq.heapify(positions)
+    while positions:
+        start, label = heapq.heappop(positions)
+        yield start
+        next_start = text.find(label, start + 1)
+        if next_start >= 0:
+            heapq.heappush(positions, (next_start, label))
+
+
+def match_fields(page, fields=None):
+    """
+    Extract the labelled fields from the content of the fatality page.
+
+    The labels are located with plain string searches, then the precompiled pattern of the field is matched at their
+    position. The first label followed by a valid value is used, which gives the same result as a search of the field
+    pattern through the whole page.
+
+    :param str page: the content of the fatality page
+    :param iterable fields: the fields to extract, defaults to None to extract all the fields of `FIELD_PATTERNS`
+    :return: a dictionary of the captured values, indexed by field. The fields which were not found are omitted.
+    :rtype: dict
+    """
+    captures = {}
+    for field in fields or FIELD_PATTERNS:
+        pattern = FIELD_PATTERNS[field]
+        for start in find_labels(page, FIELD_LABELS[field]):
+            match = pattern.match(page, start)
+            if match:
+                captures[field] = next(group for group in match.groups() if group is not None)
+                break
+
+    return captures
+
+
+def match_location_field(page):
+    """
+    Extract the location information from the content of the fatality page.
+
+    :param page: the content of the fatality page
+    :type page: str
+    """
+    return match_fields(page, [Fields.LOCATION]).get(Fields.LOCATION, '')
 
 
 def match_pattern(text, pattern, group_number=0):
@@ -49,22 +158,7 @@ def match_time_field(page):
     :return: a string representing the time.
     :rtype: str
     """
-    time_pattern = re.compile(
-        r'''
-        Time:                             # The name of the desired field.
-        (?:</strong>)?                    # Non capture closing strong tag
-        \D*?                              # Any non-digit character (lazy).
-        (
-        (?:0?[1-9]|1[0-2]):?[0-5]?\d?     # 12h format.
-        \s*                               # Any whitespace (zero-unlimited).
-        [AaPp]\.?[Mm]\.?                  # AM/PM variations.
-        |                                 # OR
-        (?:[01]?[0-9]|2[0-3]):[0-5][0-9]  # 24h format.
-        )
-        ''',
-        re.VERBOSE,
-    )
-    return match_pattern(page, time_pattern)
+    return match_fields(page, [Fields.TIME]).get(Fields.TIME, '')
 
 
 def match_case_field(page):
@@ -75,15 +169,7 @@ def match_case_field(page):
     :return: a string representing the case number.
     :rtype: str
     """
-    case_pattern = re.compile(
-        r'''
-        Case:           # The name of the field we are looking for.
-        .*              # Any character.
-        (\d{2}-\d{6,7}) # The case the number we are looking for.
-        ''',
-        re.VERBOSE,
-    )
-    return match_pattern(page, case_pattern)
+    return match_fields(page, [Fields.CASE]).get(Fields.CASE, '')
 
 
 def match_crash_field(page):
@@ -94,22 +180,7 @@ def match_crash_field(page):
     :return: a string representing the crash number.
     :rtype: str
     """
-    crashes_pattern = re.compile(
-        r'''
-        (?:
-        (?:Traffic\sFatality\s\#(\d{1,3}))
-        |
-        (?:Fatality\sCrash\s\#(\d{1,3}))
-        )
-        ''',
-        re.VERBOSE,
-    )
-    matches = crashes_pattern.search(page)
-    if not matches:
-        return None
-
-    non_empty_match = [match for match in matches.groups() if match]
-    return non_empty_match[0]
+    return match_fields(page, [Fields.CRASH]).get(Fields.CRASH)
 
 
 def match_date_field(page):
@@ -120,17 +191,15 @@ def match_date_field(page):
     :return: a string representing the date.
     :rtype: str
     """
-    date_pattern = re.compile(
-        r'''
-        >Date:          # The name of the desired field.
-        \s*             # # Any whitespace
-        (?:</span>)?    # Non capture closing span tag
-        (?:</strong>)?  # Non-capture (literal match).
-        ([^<]*)         # Capture any character except '<'.
-        <               # Non-capture (literal match)
-        ''',
-        re.VERBOSE,
-    )
-    date = match_pattern(page, date_pattern).replace('.', ' ')
-    date = search_dates(date)
-    return date[0][1].date() if date else None
+    return parse_date_field(match_fields(page, [Fields.DATE]).get(Fields.DATE, ''))
+
+
+def parse_date_field(date):
+    """
+    Parse the captured value of a date field.
+
+    :param str date: the captured value of the date field
+    :return: a date object representing the date, or `None`.
+    :rtype: datetime.date
+    """
+    return date_utils.search_date(date.replace('.', ' '))
@@ -0,0 +1,77 @@
+"""
+Define the state of the incremental crawls.
+
+The state records the detail pages which were already processed and the case numbers which were already reported, in
+order for the next crawl to only process the new bulletins.
+"""
+import json
+from pathlib import Path
+
+from loguru import logger
+
+
+class CrawlState:
+    """Represent the state of an incremental crawl."""
+
+    def __init__(self, links=None, cases=None):
+        """
+        Initialize the state.
+
+        :param set links: the URLs of the detail pages which were processed
+        :param set cases: the case numbers which were reported
+        """
+        self.links = set(links or [])
+        self.cases = set(cases or [])
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a state from a file.
+
+        A missing file means a first run, therefore an empty state is returned.
+
+        :param str path: path of the state file
+        :return: the state.
+        :rtype: CrawlState
+        """
+        state_file = Path(path)
+        if not state_file.exists():
+            logger.debug(f'No state found in {state_file}, starting a full crawl.')
+            return cls()
+
+        data = json.loads(state_file.read_text())
+        return cls(links=data.get('links'), cases=data.get('cases'))
+
+    def save(self, path):
+        """
+        Save the state into a file.
+
+        :param str path: path of the state file
+        """
+        data = {
+            'links': sorted(self.links),
+            'cases': sorted(self.cases),
+        }
+        state_file = Path(path)
+        tmp_file = state_file.with_name(f'{state_file.name}.tmp')
+        tmp_file.write_text(json.dumps(data, indent=2))
+        tmp_file.replace(state_file)
+
+    def is_known(self, link):
+        """
+        Return `True` if a detail page was already processed.
+
+        :param str link: the URL of the detail page
+        :rtype: bool
+        """
+        return link in self.links
+
+    def update(self, links, reports):
+        """
+        Record the detail pages and the reports of a crawl.
+
+        :param iterable links: the URLs of the detail pages which were processed
+        :param list reports: the reports which were produced
+        """
+        self.links.update(links)
+        self.cases.update(report.case for report in reports)
@@ -0,0 +1,239 @@
+"""
+Define the SQLite storage of the reports.
+
+The reports are stored in a `report` table, indexed by case number, and their fatalities in a `fatality` table. A report
+which is already stored is merged with the new one using `model.Report.update()`, therefore repeated and incremental
+crawls accumulate into a single data set.
+
+The writes are batched into transactions.
+"""
+import collections
+import datetime
+import sqlite3
+
+from loguru import logger
+
+from scrapd.core import model
+
+# Default number of reports written per transaction.
+DEFAULT_BATCH_SIZE = 100
+
+# The columns of the tables, named after the fields of the models.
+REPORT_COLUMNS = ('case', 'crash', 'date', 'time', 'location', 'latitude', 'longitude', 'link', 'notes')
+FATALITY_COLUMNS = ('first', 'middle', 'last', 'generation', 'ethnicity', 'gender', 'dob', 'age')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS report (
+    "case" TEXT PRIMARY KEY,
+    crash INTEGER,
+    date TEXT,
+    time TEXT,
+    location TEXT,
+    latitude REAL,
+    longitude REAL,
+    link TEXT,
+    notes TEXT
+);
+CREATE INDEX IF NOT EXISTS report_date ON report (date);
+CREATE INDEX IF NOT EXISTS report_crash ON report (crash);
+CREATE TABLE IF NOT EXISTS fatality (
+    "case" TEXT NOT NULL REFERENCES report ("case") ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    first TEXT,
+    middle TEXT,
+    last TEXT,
+    generation TEXT,
+    ethnicity TEXT,
+    gender TEXT,
+    dob TEXT,
+    age INTEGER,
+    PRIMARY KEY ("case", position)
+);
+'''
+
+
+def quote(columns):
+    """
+    Quote the names of columns.
+
+    :param tuple columns: the names of the columns
+    :return: the quoted names, separated with commas.
+    :rtype: str
+    """
+    return ', '.join(f'"{column}"' for column in columns)
+
+
+def to_column(value):
+    """
+    Convert a value of a model to a column value.
+
+    :param value: the value
+    :return: the value of an enumeration, the ISO format of a date or a time, or the value itself.
+    """
+    if isinstance(value, (model.Ethnicity, model.Gender)):
+        return value.value
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def to_report(row, fatality_rows):
+    """
+    Convert the rows of a report and of its fatalities to a report.
+
+    :param sqlite3.Row row: the row of the report
+    :param list fatality_rows: the rows of the fatalities, in order
+    :return: the report.
+    :rtype: model.Report
+    """
+    fatalities = []
+    for fatality_row in fatality_rows:
+        values = {column: fatality_row[column] for column in FATALITY_COLUMNS}
+        values['ethnicity'] = model.Ethnicity(values['ethnicity'])
+        values['gender'] = model.Gender(values['gender'])
+        values['dob'] = datetime.date.fromisoformat(values['dob']) if values['dob'] else None
+        fatalities.append(model.Fatality.trusted(**values))
+
+    values = {column: row[column] for column in REPORT_COLUMNS}
+    values['date'] = datetime.date.fromisoformat(values['date']) if values['date'] else None
+    values['time'] = datetime.time.fromisoformat(values['time']) if values['time'] else None
+    return model.Report.trusted(**values, fatalities=fatalities)
+
+
+class ReportStore:
+    """Store the reports into a SQLite database."""
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Initialize the store, creating the tables if needed.
+
+        :param str path: path of the SQLite database
+        :param int batch_size: number of reports written per transaction
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = []
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):  # noqa: D105
+        return self
+
+    def __exit__(self, *exc_info):  # noqa: D105
+        self.close()
+
+    def add(self, report):
+        """
+        Add a report, which is written with the next batch.
+
+        :param model.Report report: the report
+        """
+        self.pending.append(report)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    async def tee(self, reports):
+        """
+        Store the reports of an asynchronous iterable while yielding them.
+
+        :param async_iterable reports: the reports
+        :return: an asynchronous generator of the reports.
+        :rtype: async_generator
+        """
+        async for report in reports:
+            self.add(report)
+            yield report
+
+    def flush(self):
+        """Write the pending reports in a single transaction."""
+        if not self.pending:
+            return
+
+        with self.connection:
+            for report in self.pending:
+                self.upsert(report)
+        logger.debug(f'{len(self.pending)} report(s) stored into {self.path}.')
+        self.pending = []
+
+    def upsert(self, report):
+        """
+        Write a report, merging it with the stored one if there is one.
+
+        :param model.Report report: the report
+        """
+        stored = self.get(report.case)
+        if stored:
+            stored.update(report, trusted=True)
+            report = stored
+
+        self.connection.execute(
+            f'INSERT OR REPLACE INTO report ({quote(REPORT_COLUMNS)}) VALUES ({", ".join("?" * len(REPORT_COLUMNS))})',
+            [to_column(getattr(report, column)) for column in REPORT_COLUMNS],
+        )
+        self.connection.execute('DELETE FROM fatality WHERE "case" = ?', (report.case, ))
+        self.connection.executemany(
+            f'INSERT INTO fatality ("case", position, {quote(FATALITY_COLUMNS)}) '
+            f'VALUES (?, ?, {", ".join("?" * len(FATALITY_COLUMNS))})',
+            [(report.case, position, *(to_column(getattr(fatality, column)) for column in FATALITY_COLUMNS))
+             for position, fatality in enumerate(report.fatalities)],
+        )
+
+    def get(self, case):
+        """
+        Read a stored report.
+
+        :param str case: the case number of the report
+        :return: the report, or `None` if it is not stored.
+        :rtype: model.Report
+        """
+        row = self.connection.execute('SELECT * FROM report WHERE "case" = ?', (case, )).fetchone()
+        if not row:
+            return None
+
+        fatality_rows = self.connection.execute('SELECT * FROM fatality WHERE "case" = ? ORDER BY position', (case, ))
+        return to_report(row, fatality_rows.fetchall())
+
+    def query(self, from_=None, to=None):
+        """
+        Read the stored reports of a time range, from the newest to the oldest.
+
+        The reports are read with range scans of the date index.
+
+        :param datetime.date from_: start date, defaults to None
+        :param datetime.date to: end date, defaults to None
+        :return: a generator of the reports.
+        :rtype: generator
+        """
+        self.flush()
+        bounds = ((from_ or datetime.date.min).isoformat(), (to or datetime.date.max).isoformat())
+
+        fatality_rows = collections.defaultdict(list)
+        for fatality_row in self.connection.execute(
+                'SELECT fatality.* FROM report JOIN fatality USING ("case") '
+                'WHERE report.date BETWEEN ? AND ? ORDER BY fatality.position',
+                bounds,
+        ):
+            fatality_rows[fatality_row['case']].append(fatality_row)
+
+        rows = self.connection.execute(
+            'SELECT * FROM report WHERE date BETWEEN ? AND ? ORDER BY date DESC, "case" DESC',
+            bounds,
+        )
+        for row in rows:
+            yield to_report(row, fatality_rows[row['case']])
+
+    def count(self):
+        """
+        Count the stored reports.
+
+        :return: the number of reports.
+        :rtype: int
+        """
+        return self.connection.execute('SELECT COUNT(*) FROM report').fetchone()[0]
+
+    def close(self):
+        """Write the pending reports and close the database."""
+        self.flush()
+        self.connection.close()
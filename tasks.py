@@ -11,6 +11,12 @@ docker_org = 'scrapd'
 docker_repo = f'{docker_org}/{project_name}'
 
 
+@task
+def benchmark_models(c):
+    """Compare the cost of building the reports with and without validating the trusted values."""
+    c.run('python contrib/benchmark_models.py')
+
+
 @task
 def build_docker(c):
     """Build a docker image."""
@@ -1,5 +1,7 @@
 """Test the APD module."""
+import datetime
 from unittest import mock
+from urllib.parse import urljoin
 
 import aiohttp
 from aioresponses import aioresponses
@@ -9,9 +11,11 @@ from loguru import logger
 import pytest
 from tenacity import RetryError
 from tenacity import stop_after_attempt
+from yarl import URL
 
 from scrapd.core import apd
 from scrapd.core import article
+from scrapd.core import cache
 from tests.test_common import load_dumped_page
 from tests.test_common import load_test_page
 from tests.test_common import TEST_DATA_DIR
@@ -36,97 +40,158 @@ def news_page(scope='session'):
         pytest.param(
             load_test_page('296'),
             [
-                ('/news/fatality-crash-20-2', '20', '2'),
-                ('/news/fatality-crash-17-2', '17', '2'),
-                ('/news/fatality-crash-18-2', '18', '2'),
-                ('/news/fatality-crash-19-3', '19', '3'),
-                ('/news/fatality-crash-15-2', '15', '2'),
-                ('/news/fatality-crash-16-2', '16', '2'),
+                '/news/fatality-crash-20-2',
+                '/news/fatality-crash-17-2',
+                '/news/fatality-crash-18-2',
+                '/news/fatality-crash-19-3',
+                '/news/fatality-crash-15-2',
+                '/news/fatality-crash-16-2',
             ],
             id='news-page-0',
         ),
         pytest.param(
             load_test_page('296-page=2'),
             [
-                ('/news/fatality-crash-4-1', '4', '1'),
-                ('/news/fatality-crash-3-2', '3', '2'),
-                ('/news/fatality-crash-1-2', '1', '2'),
-                ('/news/fatality-crash-2-2', '2', '2'),
-                ('/news/traffic-fatality-86', '86'),
-                ('/news/traffic-fatality-85', '85'),
-                ('/news/traffic-fatality-84', '84'),
+                '/news/fatality-crash-4-1',
+                '/news/fatality-crash-3-2',
+                '/news/fatality-crash-1-2',
+                '/news/fatality-crash-2-2',
+                '/news/traffic-fatality-86',
+                '/news/traffic-fatality-85',
+                '/news/traffic-fatality-84',
             ],
             id='news-page-2',
         ),
         pytest.param(
             load_test_page('296-page=3'),
             [
-                ('/news/traffic-fatality-83', '83'),
-                ('/news/traffic-fatality-82', '82'),
-                ('/news/traffic-fatality-81', '81'),
-                ('/news/traffic-fatality-80-0', '80', '0'),
-                ('/news/traffic-fatality-79-0', '79', '0'),
-                ('/news/traffic-fatality-77-1', '77', '1'),
-                ('/news/traffic-fatality-78-0', '78', '0'),
-                ('/news/traffic-fatality-75-0', '75', '0'),
-                ('/news/traffic-fatality-76-0', '76', '0'),
+                '/news/traffic-fatality-83',
+                '/news/traffic-fatality-82',
+                '/news/traffic-fatality-81',
+                '/news/traffic-fatality-80-0',
+                '/news/traffic-fatality-79-0',
+                '/news/traffic-fatality-77-1',
+                '/news/traffic-fatality-78-0',
+                '/news/traffic-fatality-75-0',
+                '/news/traffic-fatality-76-0',
             ],
             id='news-page-3',
         ),
     ],
 )
-def test_extract_traffic_fatalities_page_details_link_00(input_, expected):
-    """Ensure page detail links are extracted from news page."""
-    actual = apd.extract_traffic_fatalities_page_details_link(input_)
-    assert actual == expected
+def test_parse_news_page_links_00(input_, expected):
+    """Ensure the fatality detail page links are parsed from the news pages."""
+    actual = [entry.url for entry in apd.parse_news_page(input_)]
+    assert actual == [urljoin(apd.PAGE_DETAILS_URL, link) for link in expected]
 
 
 @pytest.mark.parametrize(
     'input_,expected',
     [
         pytest.param(
+            '<div class="views-field views-field-field-news-release-date">'
+            '<div class="field-content">March 11, 2020</div></div>'
             '<div class="views-field views-field-title">'
             '<span class="field-content">'
             '<a href="/news/fatality-crash-20-2" hreflang="en">Fatality Crash #20</a>'
             '</span></div>',
-            [('/news/fatality-crash-20-2', '20', '2')],
+            ['/news/fatality-crash-20-2'],
             id="crash-20-2",
         ),
         pytest.param(
+            '<div class="views-field views-field-field-news-release-date">'
+            '<div class="field-content">March 11, 2020</div></div>'
             '<div class="views-field views-field-title">'
             '<span class="field-content">'
             '<a href="/news/traffic-fatality-25-4">Traffic Fatality #25</a>'
             '</span></div>',
-            [("/news/traffic-fatality-25-4", "25", "4")],
+            ["/news/traffic-fatality-25-4"],
             id="crash-25-4",
         ),
         pytest.param(
+            '<div class="views-field views-field-field-news-release-date">'
+            '<div class="field-content">March 11, 2020</div></div>'
             '<div class="views-field views-field-title">'
             '<span class="field-content">'
             '<a href="/news/traffic-fatality-25-update">Traffic Fatality #25 Update</a>'
             '</span></div>',
-            [("/news/traffic-fatality-25-update", "25", "update")],
+            ["/news/traffic-fatality-25-update"],
             id="crash-update",
         )
     ],
 )
-def test_extract_traffic_fatalities_page_details_link_01(input_, expected):
-    """Ensure page detail links are extracted from news page."""
-    actual = apd.extract_traffic_fatalities_page_details_link(input_)
-    assert actual == expected
-
-
-def test_generate_detail_page_urls_00():
-    """Ensure a full URL is generated from a partial one."""
-    actual = apd.generate_detail_page_urls([
-        ('/news/traffic-fatality-1-4', 'Traffic Fatality #1', '1'),
-        ('/news/traffic-fatality-2-3', 'Traffic Fatality #2', '2'),
-    ])
-    expected = [
-        'http://austintexas.gov/news/traffic-fatality-1-4',
-        'http://austintexas.gov/news/traffic-fatality-2-3',
+def test_parse_news_page_links_01(input_, expected):
+    """Ensure the fatality detail page links are parsed from the news entries."""
+    actual = [entry.url for entry in apd.parse_news_page(input_)]
+    assert actual == [urljoin(apd.PAGE_DETAILS_URL, link) for link in expected]
+
+
+@pytest.mark.parametrize('page,expected', [
+    ('296', 28),
+    ('296-page=3', 28),
+    ('296-page=27', None),
+    (None, None),
+])
+def test_parse_last_page_00(page, expected):
+    """Ensure the last page is parsed from the pager."""
+    news_page = load_test_page(page) if page else None
+    assert apd.parse_last_page(news_page) == expected
+
+
+@pytest.mark.parametrize('page,to,expected', [
+    ('296-page=3', datetime.date(2019, 10, 27), True),
+    ('296-page=3', datetime.date(2019, 10, 26), False),
+    ('296-page=3', datetime.date.max, True),
+])
+def test_reaches_date_00(page, to, expected):
+    """Ensure a news page reaches a date if its oldest entry was released around or before it."""
+    assert apd.reaches_date(load_test_page(page), to) == expected
+
+
+def test_parse_news_page_00():
+    """Ensure the fatality entries are parsed from the news page."""
+    actual = apd.parse_news_page(load_test_page('296-page=27'))
+    assert actual == [
+        apd.NewsEntry(
+            'http://austintexas.gov/news/traffic-fatality-9-3',
+            'Traffic Fatality #9',
+            9,
+            datetime.date(2018, 2, 22),
+        ),
+        apd.NewsEntry(
+            'http://austintexas.gov/news/traffic-fatality-8-3',
+            'Traffic Fatality #8',
+            8,
+            datetime.date(2018, 2, 20),
+        ),
+        apd.NewsEntry(
+            'http://austintexas.gov/news/traffic-fatality-7-3',
+            'Traffic Fatality #7',
+            7,
+            datetime.date(2018, 2, 15),
+        ),
+        apd.NewsEntry(
+            'http://austintexas.gov/news/traffic-fatality-6-5',
+            'Traffic Fatality #6',
+            6,
+            datetime.date(2018, 2, 15),
+        ),
     ]
-    assert actual == expected
+
+
+@pytest.mark.parametrize('release_date,from_,to,before,after', [
+    (datetime.date(2019, 3, 15), datetime.date(2019, 1, 1), datetime.date(2019, 1, 31), False, True),
+    (datetime.date(2019, 2, 15), datetime.date(2019, 1, 1), datetime.date(2019, 1, 31), False, False),
+    (datetime.date(2018, 12, 15), datetime.date(2019, 1, 1), datetime.date(2019, 1, 31), False, False),
+    (datetime.date(2018, 11, 15), datetime.date(2019, 1, 1), datetime.date(2019, 1, 31), True, False),
+    (datetime.date(2018, 11, 15), datetime.date.min, datetime.date.max, False, False),
+    (None, datetime.date(2019, 1, 1), datetime.date(2019, 1, 31), False, False),
+])
+def test_is_released_00(release_date, from_, to, before, after):
+    """Ensure the entries released outside of the time range are detected with a safety margin."""
+    entry = apd.NewsEntry('http://fake.url', 'Traffic Fatality #1', 1, release_date)
+    assert apd.is_released_before(entry, from_) == before
+    assert apd.is_released_after(entry, to) == after
 
 
 def test_has_next_00(news_page):
@@ -156,55 +221,6 @@ def test_has_next_02(input_, expected):
     assert apd.has_next(input_) == expected
 
 
-@asynctest.patch("scrapd.core.apd.fetch_news_page",
-                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
-@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('fatality-crash-20-2'))
-@pytest.mark.asyncio
-async def test_date_filtering_00(fake_details, fake_news):
-    """Ensure the date filtering do not fetch unnecessary data."""
-    expected = 2
-    data, actual = await apd.async_retrieve(pages=-1, from_="2050-01-02", to="2050-01-03")
-    assert actual == expected
-    assert isinstance(data, list)
-
-
-@asynctest.patch("scrapd.core.apd.fetch_news_page",
-                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
-@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('fatality-crash-20-2'))
-@pytest.mark.asyncio
-async def test_date_filtering_01(fake_details, fake_news):
-    """Ensure the date filtering do not fetch unnecessary data."""
-    data, _ = await apd.async_retrieve(pages=-5, from_="2019-01-02", to="2019-01-03")
-    assert isinstance(data, list)
-
-
-@asynctest.patch("scrapd.core.apd.fetch_news_page",
-                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
-@asynctest.patch(
-    "scrapd.core.apd.fetch_detail_page",
-    side_effect=[load_test_page(page) for page in ['traffic-fatality-2-3'] + ['traffic-fatality-71-2'] * 25])
-@pytest.mark.asyncio
-async def test_date_filtering_02(fake_details, fake_news):
-    """Ensure the date filtering do not fetch unnecessary data."""
-    data, page_count = await apd.async_retrieve(from_="2019-01-16", to="2019-01-16")
-    assert isinstance(data, list)
-    assert len(data) == 1
-    assert page_count == 2
-
-
-@asynctest.patch("scrapd.core.apd.fetch_news_page",
-                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
-@asynctest.patch("scrapd.core.apd.fetch_detail_page", side_effect=[load_test_page('traffic-fatality-50-3')] * 20)
-@pytest.mark.asyncio
-async def test_both_fatalities_from_one_incident(fake_details, fake_news):
-    data, _ = await apd.async_retrieve(pages=-1, from_="2019-08-16", to="2019-08-18", attempts=1, backoff=1)
-    assert isinstance(data, list)
-    assert len(data) == 1
-    assert len(data[0].fatalities) == 2
-    assert data[0].fatalities[0].age == 36
-    assert data[0].fatalities[1].age == 27
-
-
 @pytest.mark.asyncio
 async def test_fetch_text_00():
     """Ensure `fetch_text` retries several times."""
@@ -230,12 +246,39 @@ async def test_fetch_text_01():
             assert '{"foo": "bar"}' == text
 
 
-@asynctest.patch("scrapd.core.apd.fetch_news_page", side_effect=ValueError)
 @pytest.mark.asyncio
-async def test_async_retrieve_00(fake_news):
-    """Ensure `async_retrieve` raises `ValueError` when `fetch_news_page` fails to retrieve data."""
-    with pytest.raises(ValueError):
-        await apd.async_retrieve()
+async def test_fetch_text_02(tmp_path):
+    """Ensure fetch_text stores the responses into the cache and returns the fresh ones without any request."""
+    url = fake.uri()
+    token = apd.response_cache.set(cache.ResponseCache(tmp_path))
+    try:
+        with aioresponses() as m:
+            m.get(url, body='body', headers={'ETag': '"etag"'})
+            async with aiohttp.ClientSession() as session:
+                assert await apd.fetch_text(session, url) == 'body'
+                assert await apd.fetch_text(session, url) == 'body'
+            assert len(m.requests[('GET', URL(url))]) == 1
+    finally:
+        apd.response_cache.reset(token)
+
+
+@pytest.mark.asyncio
+async def test_fetch_text_03(tmp_path):
+    """Ensure fetch_text revalidates the expired responses."""
+    url = fake.uri()
+    response_cache = cache.ResponseCache(tmp_path, detail_ttl=0)
+    response_cache.set(url, {}, 'cached body', '"etag"')
+    token = apd.response_cache.set(response_cache)
+    try:
+        with aioresponses() as m:
+            m.get(url, status=304)
+            async with aiohttp.ClientSession() as session:
+                text = await apd.fetch_text(session, url)
+            request = m.requests[('GET', URL(url))][0]
+        assert text == 'cached body'
+        assert request.kwargs['headers'] == {'If-None-Match': '"etag"'}
+    finally:
+        apd.response_cache.reset(token)
 
 
 @asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value='')
@@ -247,6 +290,49 @@ async def test_fetch_and_parse_00(empty_page):
         await apd.fetch_and_parse(None, 'url')
 
 
+@pytest.mark.parametrize('kind', apd.PARSE_EXECUTORS)
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('traffic-fatality-2-3'))
+@pytest.mark.asyncio
+async def test_fetch_and_parse_02(fake_details, kind):
+    """Ensure the pages are parsed identically by all the executors."""
+    url = 'http://austintexas.gov/news/traffic-fatality-2-3'
+    expected = apd.parse_page(load_test_page('traffic-fatality-2-3'), url)
+    executor = apd.create_parse_executor(kind, 1)
+    try:
+        actual = await apd.fetch_and_parse(None, url, executor=executor)
+    finally:
+        if executor:
+            executor.shutdown()
+    assert actual.dict() == {**expected.dict(), 'link': url}
+
+
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('traffic-fatality-2-3'))
+@pytest.mark.asyncio
+async def test_fetch_and_parse_03(fake_details):
+    """Ensure the parse statistics of the worker processes are merged into the ones of the main process."""
+    before = [stats.copy() for stats in apd.PARSE_STATS]
+    executor = apd.create_parse_executor('process', 1, cache_size=0)
+    try:
+        await apd.fetch_and_parse(None, 'http://austintexas.gov/news/traffic-fatality-2-3', executor=executor)
+    finally:
+        executor.shutdown()
+    assert all(stats - previous for stats, previous in zip(apd.PARSE_STATS, before))
+
+
+def test_create_parse_executor_00():
+    """Ensure an invalid executor raises an exception."""
+    with pytest.raises(ValueError):
+        apd.create_parse_executor('invalid')
+
+
+def test_create_parse_executor_01(mocker):
+    """Ensure the validation mode is set up for the inline parsing."""
+    mocker.patch.object(apd.model, 'STRICT_VALIDATION', False)
+    mocker.patch('scrapd.core.date_utils.warm_up')
+    assert apd.create_parse_executor('inline', strict=True) is None
+    assert apd.model.STRICT_VALIDATION
+
+
 @asynctest.patch("scrapd.core.apd.fetch_text", return_value='')
 @pytest.mark.asyncio
 async def test_fetch_news_page_00(fetch_text):
@@ -220,13 +220,14 @@ deceased_tag_scenarios = [
 class TestPageParseContent:
     """Group the test cases for the `parsing.parse_page_content` function."""
 
+    @pytest.mark.parametrize('html_parser', article.available_html_parsers())
     @pytest.mark.parametrize(
         'page,expected,errors',
         [pytest.param(s['page'], s['expected'], s['errors'], id=s['id']) for s in page_scenarios if s.get('page')])
-    def test_parse_page_content_00(self, page, expected, errors):
+    def test_parse_page_content_00(self, page, expected, errors, html_parser):
         """Ensure location information is properly extracted from the page."""
         p = load_test_page(page)
-        actual, err = article.parse_content(p)
+        actual, err = article.parse_content(p, html_parser)
         if errors or err:
             assert errors == len(err)
         else:
@@ -254,9 +255,10 @@ class TestPageParseContent:
             id='no-deceased',
         ),
     ])
-    def test_parse_page_content_02(self, page, expected, errors):
+    @pytest.mark.parametrize('html_parser', article.available_html_parsers())
+    def test_parse_page_content_02(self, page, expected, errors, html_parser):
         """Ensure special cases are handled."""
-        actual, err = article.parse_content(page)
+        actual, err = article.parse_content(page, html_parser)
         if errors or err:
             assert errors == len(err)
         else:
@@ -286,3 +288,123 @@ class TestPageParseContent:
         for i, t in enumerate(tag):
             actual = article.parse_deceased_tag(t)
             assert actual == expected[i]
+
+
+class TestExtractArticle:
+    """Group the test cases for the `article.extract_article` function."""
+
+    def test_extract_article_00(self):
+        """Ensure the article region is extracted from a detail page."""
+        page = load_test_page('traffic-fatality-2-3')
+        region = article.extract_article(page)
+        assert region.startswith('<article')
+        assert region.endswith('</article>')
+        assert 'Deceased' in region
+        assert len(region) < len(page) / 4
+
+    @pytest.mark.parametrize('page', [
+        pytest.param('<p><strong>Case:</strong>18-1591949</p>', id='no-article'),
+        pytest.param('<article><p><strong>Case:</strong>18-1591949</p>', id='unclosed-article'),
+    ])
+    def test_extract_article_01(self, page):
+        """Ensure the whole page is used when there is no article region."""
+        assert article.extract_article(page) == page
+
+
+class TestHtmlParsers:
+    """Group the test cases for the HTML parsers."""
+
+    def test_available_html_parsers_00(self):
+        """Ensure the pure Python parser is always available, as the slowest option."""
+        parsers = article.available_html_parsers()
+        assert parsers[-1] == 'html.parser'
+        assert article.detect_html_parser() == parsers[0]
+
+    def test_available_html_parsers_01(self, mocker):
+        """Ensure the parsers are only available when their library is installed."""
+        mocker.patch('importlib.util.find_spec', return_value=None)
+        assert article.available_html_parsers() == ['html.parser']
+
+    @pytest.mark.parametrize('html_parser', article.available_html_parsers())
+    @pytest.mark.parametrize('page', [
+        'fatality-crash-17-2',
+        'fatality-crash-18-2',
+        'fatality-crash-19-3',
+        'fatality-crash-20-2',
+        'fatality-crash-41-2',
+        'fatality-crash-5-2',
+        'traffic-fatality-2-3',
+        'traffic-fatality-50-3',
+        'traffic-fatality-71-2',
+    ])
+    def test_parse_content_00(self, page, html_parser):
+        """Ensure all the HTML parsers give the same results."""
+        p = load_test_page(page)
+        expected, expected_err = article.parse_content(p, 'html.parser')
+        actual, err = article.parse_content(p, html_parser)
+        assert actual == expected
+        assert err == expected_err
+
+
+class TestGetDeceasedTag:
+    """Group the test cases for the `article.get_deceased_tag` function."""
+
+    def test_index_text_00(self):
+        """Ensure the text of each tag is a slice of the text of the tree."""
+        soup = article.to_soup('<div><p>Case: <b>19-123456</b></p><!-- comment --><p>Deceased: John</p></div>')
+        text, tags, spans = article.index_text(soup)
+        assert text == 'Case: 19-123456Deceased: John'
+        assert [tag.name for tag in tags] == ['div', 'p', 'b', 'p']
+        for tag in tags:
+            start, end = spans[id(tag)]
+            assert text[start:end] == tag.get_text()
+
+    @pytest.mark.parametrize('html,expected', [
+        pytest.param('<div><p>Case</p><p>Deceased: John</p></div>', ['<p>Deceased: John</p>'], id='nested'),
+        pytest.param('<div> <p>Deceased: John</p> </div>', ['<div> <p>Deceased: John</p> </div>'], id='outermost'),
+        pytest.param('<p> <b>Dece</b>ased: John</p>', ['<p> <b>Dece</b>ased: John</p>'], id='split-label'),
+        pytest.param('<p><b>Decea</b></p><p>sed: John</p>', [], id='label-across-tags'),
+        pytest.param(
+            '<p>Deceased 1: John</p>text<p>Case</p><p>Deceased 2: Jane</p>',
+            ['<p>Deceased 1: John</p>', '<p>Deceased 2: Jane</p>'],
+            id='siblings',
+        ),
+    ])
+    def test_get_deceased_tag_00(self, html, expected):
+        """Ensure the outermost tags starting with "Deceased" are found."""
+        soup = article.to_soup(html)
+        assert [str(tag) for tag in article.get_deceased_tag(soup)] == expected
+        if 'selectolax' in article.available_html_parsers():
+            from scrapd.core import article_selectolax
+            tree = article_selectolax.to_tree(html)
+            assert [node.html for node in article_selectolax.get_deceased_tag(tree)] == expected
+
+
+class TestParseDeceasedSection:
+    """Group the test cases for the `article.parse_deceased_section` function."""
+
+    @pytest.mark.parametrize('html,expected', [
+        pytest.param(
+            '<div><p>Case: 19-123456</p><p>Deceased: John Doe | White male | 01/02/1990</p>\n'
+            '<p>The driver lost control.</p>\n<p>Arrested: Jane Doe</p></div>',
+            article.DeceasedSection(
+                ['John Doe | White male | 01/02/1990'],
+                'The driver lost control.',
+                'Arrested: Jane Doe',
+            ),
+            id='arrested',
+        ),
+        pytest.param(
+            '<div><p>Case: 19-123456</p><p>Deceased: John Doe | White male | 01/02/1990</p>\n'
+            '<p>The driver lost control. APD is investigating this case.</p></div>',
+            article.DeceasedSection(['John Doe | White male | 01/02/1990'], 'The driver lost control.', ''),
+            id='boilerplate',
+        ),
+        pytest.param('<div><p>Case: 19-123456</p></div>', article.DeceasedSection([], '', ''), id='no-deceased'),
+    ])
+    def test_parse_deceased_section_00(self, html, expected):
+        """Ensure the deceased fields, the notes and the arrest information are extracted together."""
+        assert article.parse_deceased_section(article.to_soup(html)) == expected
+        if 'selectolax' in article.available_html_parsers():
+            from scrapd.core import article_selectolax
+            assert article_selectolax.parse_deceased_section(article_selectolax.to_tree(html)) == expected
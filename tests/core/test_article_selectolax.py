@@ -0,0 +1,35 @@
+"""Test the article_selectolax module."""
+import pytest
+
+from scrapd.core import article
+from tests.test_common import load_test_page
+
+# The selectolax backend is an optional dependency.
+pytest.importorskip('selectolax')
+
+
+@pytest.mark.parametrize('page', [
+    'fatality-crash-17-2',
+    'fatality-crash-18-2',
+    'fatality-crash-19-3',
+    'fatality-crash-20-2',
+    'fatality-crash-41-2',
+    'fatality-crash-5-2',
+    'traffic-fatality-2-3',
+    'traffic-fatality-50-3',
+    'traffic-fatality-71-2',
+])
+class TestParity:
+    """Ensure the selectolax tree gives the same results as the BeautifulSoup one."""
+
+    def test_parse_deceased_section_00(self, page):
+        """Ensure the deceased sections are identical."""
+        from scrapd.core import article_selectolax
+        html = article.extract_article(load_test_page(page)).replace("<br>", "</br>")
+        expected = article.parse_deceased_section(article.to_soup(html))
+        assert article_selectolax.parse_deceased_section(article_selectolax.to_tree(html)) == expected
+
+    def test_parse_content_00(self, page):
+        """Ensure the reports and the parsing errors are identical."""
+        p = load_test_page(page)
+        assert article.parse_content(p, 'selectolax') == article.parse_content(p, 'html.parser')
@@ -0,0 +1,73 @@
+"""Test the cache module."""
+import time
+from unittest import mock
+
+from scrapd.core import cache
+
+
+class TestResponseCache:
+    """Test the response cache."""
+
+    def test_get_00(self, tmp_path):
+        """Ensure a stored response is retrieved."""
+        c = cache.ResponseCache(tmp_path)
+        c.set('http://fake.url', {'page': 1}, 'body', '"etag"', 'Tue, 15 Oct 2019 19:00:00 GMT')
+        entry = c.get('http://fake.url', {'page': 1})
+        assert entry.body == 'body'
+        assert entry.validators() == {
+            'If-None-Match': '"etag"',
+            'If-Modified-Since': 'Tue, 15 Oct 2019 19:00:00 GMT',
+        }
+
+    def test_get_01(self, tmp_path):
+        """Ensure the parameters are part of the key."""
+        c = cache.ResponseCache(tmp_path)
+        c.set('http://fake.url', {'page': 1}, 'body')
+        assert c.get('http://fake.url', {'page': 2}) is None
+        assert c.get('http://fake.url') is None
+
+    def test_get_02(self, tmp_path):
+        """Ensure a corrupted entry is ignored."""
+        c = cache.ResponseCache(tmp_path)
+        c.path('http://fake.url').write_text('{')
+        assert c.get('http://fake.url') is None
+
+    def test_is_fresh_00(self, tmp_path):
+        """Ensure the freshness of an entry depends on its TTL."""
+        c = cache.ResponseCache(tmp_path)
+        entry = c.set('http://fake.url', None, 'body')
+        assert entry.is_fresh(60)
+        assert not entry.is_fresh(0)
+
+    def test_refresh_00(self, tmp_path):
+        """Ensure a revalidated entry is fresh again."""
+        c = cache.ResponseCache(tmp_path)
+        entry = c.set('http://fake.url', None, 'body')
+        entry.stored_at = time.time() - 120
+        c.refresh('http://fake.url', None, entry)
+        assert c.get('http://fake.url').is_fresh(60)
+
+    def test_evict_00(self, tmp_path):
+        """Ensure the least recently used entries are evicted first."""
+        c = cache.ResponseCache(tmp_path, max_size=3000)
+        c.set('http://fake.url/1', None, 'x' * 1000)
+        time.sleep(0.01)
+        c.set('http://fake.url/2', None, 'x' * 1000)
+        time.sleep(0.01)
+        c.get('http://fake.url/1')
+        time.sleep(0.01)
+        c.set('http://fake.url/3', None, 'x' * 1000)
+        assert c.get('http://fake.url/1')
+        assert c.get('http://fake.url/2') is None
+        assert c.get('http://fake.url/3')
+
+    def test_evict_01(self, tmp_path):
+        """Ensure the cache directory is only scanned once the cache is full."""
+        c = cache.ResponseCache(tmp_path, max_size=3000)
+        with mock.patch.object(c, 'scan', wraps=c.scan) as scan:
+            for i in range(2):
+                c.set(f'http://fake.url/{i}', None, 'x' * 1000)
+            assert scan.call_count == 1
+            c.set('http://fake.url/2', None, 'x' * 1000)
+            assert scan.call_count == 2
+        assert c.size <= 3000
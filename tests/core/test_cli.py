@@ -0,0 +1,119 @@
+"""Test the cli module."""
+import csv
+import io
+import json
+
+from click.testing import CliRunner
+import pytest
+
+from scrapd.cli import cli
+from scrapd.core.formatter import CSVFIELDS
+from scrapd.core.formatter import Formatter
+from scrapd.core.formatter import to_json
+from scrapd.core.store import ReportStore
+from tests.mock_reports import RESULTS
+
+
+async def retrieve_results(**kwargs):
+    """Retrieve the sample results, instead of crawling the APD news site."""
+    for report in RESULTS:
+        yield report
+
+
+async def fail_retrieval(**kwargs):
+    """Retrieve the first sample result, then fail."""
+    yield RESULTS[0]
+    raise RuntimeError('The news site is unavailable.')
+
+
+def format_results(format_):
+    """Format the sample results."""
+    output = io.StringIO()
+    Formatter(format_, output).print(RESULTS)
+    return output.getvalue()
+
+
+def store_results(path):
+    """Store the sample results into a SQLite database."""
+    with ReportStore(path) as report_store:
+        for report in RESULTS:
+            report_store.add(report)
+    return str(path)
+
+
+class TestQuery:
+    """Test the query subcommand."""
+
+    def test_query_00(self, tmp_path):
+        """Ensure the stored reports are printed."""
+        path = store_results(tmp_path / 'reports.sqlite')
+        result = CliRunner().invoke(cli.cli, ['query', '--store', path])
+        assert result.exit_code == 0
+        assert json.loads(result.output) == json.loads(to_json(RESULTS))
+
+    def test_query_01(self, tmp_path):
+        """Ensure the options given before the subcommand are used by default."""
+        path = store_results(tmp_path / 'reports.sqlite')
+        result = CliRunner().invoke(cli.cli, ['--format', 'csv', 'query', '--store', path])
+        assert result.exit_code == 0
+        rows = list(csv.reader(io.StringIO(result.output)))
+        assert rows[0] == CSVFIELDS
+        assert len(rows) == 1 + len(RESULTS[0].fatalities)
+
+    def test_query_02(self, tmp_path):
+        """Ensure the options of the subcommand take precedence."""
+        path = store_results(tmp_path / 'reports.sqlite')
+        result = CliRunner().invoke(cli.cli, ['--format', 'csv', 'query', '--format', 'count', '--store', path])
+        assert result.exit_code == 0
+        assert result.output.strip() == str(len(RESULTS))
+
+    def test_query_03(self, tmp_path):
+        """Ensure the database must exist."""
+        result = CliRunner().invoke(cli.cli, ['query', '--store', str(tmp_path / 'missing.sqlite')])
+        assert result.exit_code == 2
+
+
+class TestRetrieve:
+    """Test the retrieval of the reports."""
+
+    @pytest.mark.parametrize('output', ['csv', 'xml:reports.xml', 'csv:', ':reports.csv'])
+    def test_output_00(self, mocker, output):
+        """Ensure the malformed outputs are rejected."""
+        iter_reports = mocker.patch.object(cli.crawl, 'iter_reports')
+        result = CliRunner().invoke(cli.cli, ['--output', output])
+        assert result.exit_code == 2
+        assert f'"{output}" is not like FORMAT:PATH' in result.output
+        assert not iter_reports.called
+
+    def test_output_01(self):
+        """Ensure the format and the path of the outputs are parsed."""
+        actual = cli.parse_outputs(None, None, ('CSV:reports.csv', 'json:C:/reports.json', 'jsonl:-'))
+        assert actual == [('csv', 'reports.csv'), ('json', 'C:/reports.json'), ('jsonl', '-')]
+
+    def test_retrieve_00(self, mocker, tmp_path):
+        """Ensure the results are written to each output, in its own format."""
+        mocker.patch.object(cli.crawl, 'iter_reports', retrieve_results)
+        paths = {format_: tmp_path / f'reports.{format_}' for format_ in ('csv', 'json', 'jsonl')}
+        args = ['--parse-executor', 'inline']
+        for format_, path in paths.items():
+            args += ['--output', f'{format_}:{path}']
+        result = CliRunner().invoke(cli.cli, args + ['--output', 'count:-'])
+        assert result.exit_code == 0
+        assert result.output == format_results('count')
+        for format_, path in paths.items():
+            assert path.read_bytes().decode() == format_results(format_)
+        assert not list(tmp_path.glob('*.tmp'))
+
+    def test_retrieve_01(self, mocker, tmp_path):
+        """Ensure the previous outputs are kept when the retrieval fails."""
+        mocker.patch.object(cli.crawl, 'iter_reports', fail_retrieval)
+        paths = {format_: tmp_path / f'reports.{format_}' for format_ in ('csv', 'json')}
+        args = ['--parse-executor', 'inline']
+        for format_, path in paths.items():
+            path.write_text('previous\n')
+            args += ['--output', f'{format_}:{path}']
+        result = CliRunner().invoke(cli.cli, args)
+        assert result.exit_code == 1
+        for path in paths.values():
+            assert path.read_text() == 'previous\n'
+        assert not list(tmp_path.glob('*.tmp'))
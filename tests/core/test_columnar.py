@@ -0,0 +1,63 @@
+"""Test the columnar module."""
+import csv
+import io
+
+import pytest
+
+from scrapd.core import columnar
+from scrapd.core import record
+from scrapd.core.formatter import CSVFIELDS
+from scrapd.core.formatter import CSVFormatter
+from tests.mock_reports import RESULTS
+
+
+def test_to_columns_00():
+    """Ensure the columns have the layout of the CSV rows."""
+    actual = columnar.to_columns(RESULTS)
+    expected = io.StringIO()
+    CSVFormatter(output=expected).printer(RESULTS)
+    rows = list(csv.reader(io.StringIO(expected.getvalue())))
+    assert list(actual) == rows[0] == CSVFIELDS
+    assert [[str(value) for value in row] for row in zip(*actual.values())] == rows[1:]
+
+
+def test_to_columns_01():
+    """Ensure the records are flattened like the reports."""
+    records = [record.ReportRecord.from_report(report) for report in RESULTS]
+    assert columnar.to_columns(records) == columnar.to_columns(RESULTS)
+
+
+def test_to_arrow_00():
+    """Ensure the columns are typed and the enumerations are dictionary encoded."""
+    pyarrow = pytest.importorskip('pyarrow')
+    actual = columnar.to_arrow(RESULTS)
+    assert actual.num_rows == 1
+    assert actual.schema.field('date').type == pyarrow.date32()
+    assert actual.schema.field('time').type == pyarrow.time32('s')
+    assert pyarrow.types.is_dictionary(actual.schema.field('gender').type)
+    assert actual.to_pydict() == {name: values for name, values in columnar.to_columns(RESULTS).items()}
+
+
+def test_write_arrow_00(tmp_path):
+    """Ensure an Arrow file is read back with a memory map."""
+    pytest.importorskip('pyarrow')
+    path = tmp_path / 'reports.arrow'
+    columnar.write_arrow(RESULTS, str(path))
+    assert columnar.read_arrow(path).equals(columnar.to_arrow(RESULTS))
+
+
+def test_write_parquet_00(tmp_path):
+    """Ensure a Parquet file is read back."""
+    parquet = pytest.importorskip('pyarrow.parquet')
+    path = tmp_path / 'reports.parquet'
+    columnar.write_parquet(RESULTS, str(path))
+    assert parquet.read_table(str(path)).to_pydict() == columnar.to_arrow(RESULTS).to_pydict()
+
+
+def test_to_dataframe_00():
+    """Ensure the data frame has typed columns."""
+    pytest.importorskip('pyarrow')
+    pandas = pytest.importorskip('pandas')
+    actual = columnar.to_dataframe(RESULTS)
+    assert pandas.api.types.is_datetime64_any_dtype(actual['date'])
+    assert isinstance(actual['ethnicity'].dtype, pandas.CategoricalDtype)
@@ -0,0 +1,356 @@
+"""Test the crawl module."""
+import asyncio
+import datetime
+
+import asynctest
+from loguru import logger
+import pytest
+from tenacity import RetryError
+
+from scrapd.core import apd
+from scrapd.core import cache
+from scrapd.core import crawl
+from scrapd.core import model
+from scrapd.core import state
+from tests.test_common import load_test_page
+
+# Disable logging for the tests.
+logger.remove()
+
+
+async def fake_news_pages(session, page):
+    """Return the test news pages from their number."""
+    pages = {1: '296', 2: '296-page=1', 3: '296-page=2', 4: '296-page=3', 28: '296-page=27'}
+    return load_test_page(pages.get(page, '296-page=5'))
+
+
+@pytest.mark.parametrize('pages,concurrency,expected', [
+    (-1, 4, list(range(1, 29))),
+    (3, 4, [1, 2, 3]),
+    (-1, 1, list(range(1, 29))),
+])
+@pytest.mark.asyncio
+async def test_fetch_news_pages_00(pages, concurrency, expected):
+    """Ensure the news pages are fetched concurrently and yielded in order."""
+    first_page = load_test_page('296')
+
+    async def fake_fetch_news_page(session, page):
+        await asyncio.sleep(0.001 * (page % 3))
+        return first_page if page == 1 else str(page)
+
+    with asynctest.patch("scrapd.core.apd.fetch_news_page", side_effect=fake_fetch_news_page):
+        actual = [page async for page, _ in crawl.fetch_news_pages(None, pages, concurrency)]
+    assert actual == expected
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page",
+                 side_effect=[load_test_page(page) for page in ['296-page=27', '296-page=1', '296']])
+@pytest.mark.asyncio
+async def test_fetch_news_pages_01(fake_news):
+    """Ensure the news pages are fetched one by one when the last page is unknown."""
+    actual = [page async for page, _ in crawl.fetch_news_pages(None)]
+    assert actual == [1]
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page",
+                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('fatality-crash-20-2'))
+@pytest.mark.asyncio
+async def test_date_filtering_00(fake_details, fake_news):
+    """Ensure the date filtering do not fetch unnecessary data."""
+    expected = 2
+    data, actual = await crawl.async_retrieve(pages=-1, from_="2050-01-02", to="2050-01-03", release_margin=None)
+    assert actual == expected
+    assert isinstance(data, list)
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page",
+                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('fatality-crash-20-2'))
+@pytest.mark.asyncio
+async def test_date_filtering_01(fake_details, fake_news):
+    """Ensure the date filtering do not fetch unnecessary data."""
+    data, _ = await crawl.async_retrieve(pages=-5, from_="2019-01-02", to="2019-01-03", release_margin=None)
+    assert isinstance(data, list)
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page",
+                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
+@asynctest.patch(
+    "scrapd.core.apd.fetch_detail_page",
+    side_effect=[load_test_page(page) for page in ['traffic-fatality-2-3'] + ['traffic-fatality-71-2'] * 25])
+@pytest.mark.asyncio
+async def test_date_filtering_02(fake_details, fake_news):
+    """Ensure the date filtering do not fetch unnecessary data."""
+    data, page_count = await crawl.async_retrieve(from_="2019-01-16", to="2019-01-16", release_margin=None)
+    assert isinstance(data, list)
+    assert len(data) == 1
+    assert page_count == 2
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page",
+                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", side_effect=[load_test_page('traffic-fatality-50-3')] * 20)
+@pytest.mark.asyncio
+async def test_both_fatalities_from_one_incident(fake_details, fake_news):
+    data, _ = await crawl.async_retrieve(
+        pages=-1,
+        from_="2019-08-16",
+        to="2019-08-18",
+        attempts=1,
+        backoff=1,
+        release_margin=None,
+    )
+    assert isinstance(data, list)
+    assert len(data) == 1
+    assert len(data[0].fatalities) == 2
+    assert data[0].fatalities[0].age == 36
+    assert data[0].fatalities[1].age == 27
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page",
+                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('fatality-crash-20-2'))
+@pytest.mark.asyncio
+async def test_date_filtering_03(fake_details, fake_news):
+    """Ensure the detail pages released before the time range are not fetched."""
+    data, page_count = await crawl.async_retrieve(pages=-1, from_="2050-01-02", to="2050-01-03")
+    assert page_count == 1
+    assert not data
+    assert not fake_details.called
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page", side_effect=fake_news_pages)
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('fatality-crash-20-2'))
+@pytest.mark.asyncio
+async def test_date_filtering_04(fake_details, fake_news):
+    """Ensure only the news pages released around the time range are fetched."""
+    _, page_count = await crawl.async_retrieve(pages=-1, from_="2018-04-01", to="2018-04-02")
+    assert page_count == 28
+    assert [call[0][1] for call in fake_news.call_args_list] == [1, 2, 4, 8, 16, 28, 22, 25, 26, 27]
+    assert not fake_details.called
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page", side_effect=fake_news_pages)
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('fatality-crash-20-2'))
+@pytest.mark.asyncio
+async def test_date_filtering_05(fake_details, fake_news):
+    """Ensure the crawl starts at the first news page reaching the end date."""
+    _, page_count = await crawl.async_retrieve(pages=-1, from_="2019-12-01", to="2019-12-05", listing_concurrency=1)
+    assert page_count == 5
+    assert [call[0][1] for call in fake_news.call_args_list] == [1, 2, 4, 3, 5]
+    assert fake_details.call_count == 3 + 9
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page", side_effect=ValueError)
+@pytest.mark.asyncio
+async def test_async_retrieve_00(fake_news):
+    """Ensure `async_retrieve` raises `ValueError` when `fetch_news_page` fails to retrieve data."""
+    with pytest.raises(ValueError):
+        await crawl.async_retrieve()
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page",
+                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", side_effect=ValueError)
+@pytest.mark.asyncio
+async def test_async_retrieve_01(fake_details, fake_news):
+    """Ensure `async_retrieve` raises the errors occurring in the detail page workers."""
+    with pytest.raises((RetryError, ValueError)):
+        await crawl.async_retrieve(pages=-1)
+
+
+@pytest.mark.parametrize('concurrency', [1, 3, 20])
+@pytest.mark.asyncio
+async def test_async_retrieve_02(concurrency):
+    """Ensure the results do not depend on the number of workers."""
+    news_pages = [load_test_page(page) for page in ['296', '296-page=1', '296-page=27']]
+    detail_pages = [load_test_page(page) for page in ['traffic-fatality-2-3'] + ['traffic-fatality-71-2'] * 25]
+    with asynctest.patch("scrapd.core.apd.fetch_news_page", side_effect=news_pages), \
+            asynctest.patch("scrapd.core.apd.fetch_detail_page", side_effect=detail_pages):
+        data, page_count = await crawl.async_retrieve(
+            from_="2019-01-16",
+            to="2019-01-16",
+            concurrency=concurrency,
+            release_margin=None,
+        )
+    assert len(data) == 1
+    assert page_count == 2
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page",
+                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('traffic-fatality-50-3'))
+@pytest.mark.asyncio
+async def test_async_retrieve_03(fake_details, fake_news):
+    """Ensure an incremental crawl only processes the new detail pages and stops at the first known page."""
+    known_links = [entry.url for entry in apd.parse_news_page(load_test_page('296-page=1'))]
+    crawl_state = state.CrawlState(links=known_links)
+    data, page_count = await crawl.async_retrieve(pages=-1, state=crawl_state)
+    assert page_count == 2
+    assert fake_details.call_count == 6
+    assert len(data) == 1
+    assert crawl_state.cases == {'19-2291933'}
+
+    # A second crawl stops at the first page without processing anything.
+    fake_news.side_effect = [load_test_page('296')]
+    data, page_count = await crawl.async_retrieve(pages=-1, state=crawl_state)
+    assert page_count == 1
+    assert fake_details.call_count == 6
+    assert not data
+
+
+@pytest.mark.asyncio
+async def test_process_detail_pages_00():
+    """Ensure a worker cancelled while fetching a page does not record a failure."""
+    tracker = crawl.CrawlTracker()
+    tracker.add_page(1, 1)
+    queue = asyncio.Queue()
+    queue.put_nowait((1, 0, 'http://fake.url'))
+    fetching = asyncio.Event()
+
+    async def fetcher(*args):
+        fetching.set()
+        await asyncio.sleep(60)
+
+    worker = asyncio.ensure_future(crawl.process_detail_pages(None, queue, tracker, fetcher))
+    await fetching.wait()
+    worker.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await worker
+    assert not tracker.errors
+
+
+@pytest.mark.asyncio
+async def test_crawl_tracker_00():
+    """Ensure the pages are evaluated in order."""
+    tracker = crawl.CrawlTracker()
+    tracker.add_page(1, 1)
+    tracker.add_page(2, 1)
+    tracker.add_report(2, 0, model.Report(case='19-123456', date=datetime.date(2019, 1, 2)))
+    assert tracker.last_page == 0
+    tracker.add_report(1, 0, model.Report(case='19-654321', date=datetime.date(2019, 1, 3)))
+    assert tracker.last_page == 2
+    assert list(tracker.reports) == ['19-654321', '19-123456']
+
+
+@pytest.mark.asyncio
+async def test_crawl_tracker_01():
+    """Ensure the crawl stops once a page has no entries within the time range."""
+    tracker = crawl.CrawlTracker(datetime.date(2019, 1, 2), datetime.date(2019, 1, 3), True)
+    tracker.add_page(1, 1)
+    tracker.add_report(1, 0, model.Report(case='19-123456', date=datetime.date(2019, 1, 2), link='http://fake.url/1'))
+    assert not tracker.stop.is_set()
+    tracker.add_page(2, 1)
+    tracker.add_report(2, 0, model.Report(case='19-654321', date=datetime.date(2019, 1, 1), link='http://fake.url/2'))
+    assert tracker.stop.is_set()
+    assert tracker.last_page == 2
+    assert list(tracker.reports) == ['19-123456']
+    assert tracker.links == {'http://fake.url/1'}
+
+
+@pytest.mark.asyncio
+async def test_crawl_tracker_02():
+    """Ensure the new reports are only collected once."""
+    tracker = crawl.CrawlTracker()
+    tracker.add_page(1, 2)
+    tracker.add_report(1, 0, model.Report(case='19-123456', date=datetime.date(2019, 1, 2)))
+    assert not tracker.ready.is_set()
+    tracker.add_report(1, 1, model.Report(case='19-654321', date=datetime.date(2019, 1, 3)))
+    assert tracker.ready.is_set()
+    assert [report.case for report in tracker.pop_reports()] == ['19-123456', '19-654321']
+    assert not tracker.ready.is_set()
+    tracker.add_page(2, 1)
+    tracker.add_report(2, 0, model.Report(case='19-123456', date=datetime.date(2019, 1, 2)))
+    assert tracker.pop_reports() == []
+    assert tracker.cases == {'19-123456', '19-654321'}
+
+
+@pytest.mark.asyncio
+async def test_crawl_tracker_03():
+    """Ensure the reports of a page keep the order of the links, whatever the order they are processed in."""
+    tracker = crawl.CrawlTracker()
+    tracker.add_page(1, 3)
+    tracker.add_report(1, 2, model.Report(case='19-000003', date=datetime.date(2019, 1, 1)))
+    tracker.add_report(1, 0, model.Report(case='19-000001', date=datetime.date(2019, 1, 3)))
+    tracker.add_report(1, 1, model.Report(case='19-000002', date=datetime.date(2019, 1, 2)))
+    assert [report.case for report in tracker.pop_reports()] == ['19-000001', '19-000002', '19-000003']
+
+
+@pytest.mark.asyncio
+async def test_crawl_tracker_04():
+    """Ensure the errors of a page are only raised once the evaluation reaches the page."""
+    tracker = crawl.CrawlTracker(datetime.date(2019, 1, 2), datetime.date(2019, 1, 3), True)
+    tracker.add_page(1, 1)
+    tracker.add_report(1, 0, model.Report(case='19-123456', date=datetime.date(2019, 1, 2)))
+    tracker.add_page(2, 1)
+    tracker.add_page(3, 1)
+    tracker.fail(3, ValueError('cannot parse'))
+    assert not tracker.error
+    tracker.add_report(2, 0, model.Report(case='19-654321', date=datetime.date(2019, 1, 1)))
+    assert tracker.stop.is_set()
+    assert not tracker.error
+
+
+@pytest.mark.asyncio
+async def test_crawl_tracker_05():
+    """Ensure the error of the page being evaluated stops the crawl."""
+    tracker = crawl.CrawlTracker()
+    tracker.add_page(1, 2)
+    error = ValueError('cannot parse')
+    tracker.fail(1, error)
+    assert tracker.stop.is_set()
+    assert tracker.error is error
+    assert tracker.last_page == 0
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page",
+                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
+@asynctest.patch(
+    "scrapd.core.apd.fetch_detail_page",
+    side_effect=[load_test_page(page) for page in ['traffic-fatality-2-3'] + ['traffic-fatality-71-2'] * 25])
+@pytest.mark.asyncio
+async def test_iter_reports_00(fake_details, fake_news):
+    """Ensure the reports are yielded with the time range filtering and the progress of the crawl."""
+    tracker = crawl.CrawlTracker.from_range("2019-01-16", "2019-01-16")
+    data = [report async for report in crawl.iter_reports(release_margin=None, tracker=tracker)]
+    assert [report.case for report in data] == ['19-0161105']
+    assert tracker.last_page == 2
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page",
+                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('traffic-fatality-50-3'))
+@pytest.mark.asyncio
+async def test_iter_reports_01(fake_details, fake_news):
+    """Ensure the crawl stops with the iteration."""
+    crawl_state = state.CrawlState()
+    reports = crawl.iter_reports(pages=-1, state=crawl_state, release_margin=None)
+    report = await reports.__anext__()
+    await reports.aclose()
+    assert report.case == '19-2291933'
+    assert crawl_state.cases == {'19-2291933'}
+    assert not crawl_state.links
+    with pytest.raises(StopAsyncIteration):
+        await reports.__anext__()
+
+
+@asynctest.patch("scrapd.core.apd.fetch_news_page",
+                 side_effect=[load_test_page(page) for page in ['296', '296-page=1', '296-page=27']])
+@asynctest.patch("scrapd.core.apd.fetch_detail_page", return_value=load_test_page('traffic-fatality-50-3'))
+@pytest.mark.asyncio
+async def test_iter_reports_02(fake_details, fake_news, tmp_path):
+    """Ensure the response cache is only set for the crawl."""
+    response_cache = cache.ResponseCache(tmp_path)
+    caches = set()
+
+    async def fetch_detail_page(*args, **kwargs):
+        caches.add(apd.response_cache.get())
+        return load_test_page('traffic-fatality-50-3')
+
+    fake_details.side_effect = fetch_detail_page
+    reports = crawl.iter_reports(pages=-1, cache=response_cache, release_margin=None)
+    await reports.__anext__()
+    assert apd.response_cache.get() is None
+    await reports.aclose()
+    assert caches == {response_cache}
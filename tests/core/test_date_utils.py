@@ -89,3 +89,99 @@ def test_parse_date_field_00(input_, expected):
     """Ensure a date field gets parsed correctly."""
     actual = regex.match_date_field(input_)
     assert actual == expected
+
+
+@pytest.mark.parametrize('date, expected', [
+    ('January 15, 2019', datetime.date(2019, 1, 15)),
+    ('Wednesday, Oct. 3, 2018', datetime.date(2018, 10, 3)),
+    ('sept 3 2018', datetime.date(2018, 9, 3)),
+    ('1/2/1990', datetime.date(1990, 1, 2)),
+    ('10-1-17', datetime.date(2017, 10, 1)),
+    ('1/2/69', datetime.date(1969, 1, 2)),
+    ('2019-01-15', datetime.date(2019, 1, 15)),
+    ('13/1/2019', None),
+    ('February 30, 2019', None),
+    ('Jan 2019', None),
+    ('Afternoon', None),
+    ('', None),
+])
+def test_fast_parse_date_00(date, expected):
+    """Ensure the fast path only parses the known date formats."""
+    assert date_utils.fast_parse_date(date) == expected
+
+
+@pytest.mark.parametrize('time, expected', [
+    ('01:14a.m.', datetime.time(1, 14)),
+    ('8 PM', datetime.time(20, 0)),
+    ('12 am', datetime.time(0, 0)),
+    ('12:47 p.M.', datetime.time(12, 47)),
+    ('18:26', datetime.time(18, 26)),
+    ('18:46 pm', None),
+    ('00:24 a.m.', None),
+    ('28:24', None),
+])
+def test_fast_parse_time_00(time, expected):
+    """Ensure the fast path only parses the known time formats."""
+    assert date_utils.fast_parse_time(time) == expected
+
+
+@pytest.mark.parametrize('date, settings, expected', [
+    ('13/1/2019', None, datetime.date(2019, 1, 13)),
+    ('Jan 2019', dict(PREFER_DAY_OF_MONTH='first'), datetime.date(2019, 1, 1)),
+    ('Jan 2019', dict(PREFER_DAY_OF_MONTH='last'), datetime.date(2019, 1, 31)),
+])
+def test_parse_date_02(mocker, date, settings, expected):
+    """Ensure the dates which are not handled by the fast path are parsed by dateparser."""
+    mocker.patch.object(date_utils, 'STATS', date_utils.collections.Counter())
+    date_utils.clear_cache()
+    assert date_utils.parse_date(date, settings=settings) == expected
+    assert date_utils.STATS == {('date', 'fallback'): 1}
+
+
+def test_parse_stats_00(mocker):
+    """Ensure the hit rates are computed per kind of parse."""
+    mocker.patch.object(date_utils, 'STATS', date_utils.collections.Counter())
+    date_utils.clear_cache()
+    date_utils.parse_date('January 15, 2019')
+    date_utils.parse_date('January 16, 2019')
+    date_utils.parse_date('January 2019')
+    date_utils.parse_time('5:16')
+    assert date_utils.parse_stats() == {
+        'date': (2, 1, 2 / 3),
+        'time': (1, 0, 1.0),
+    }
+
+
+def test_parse_date_03(mocker):
+    """Ensure the repeated dates are parsed once."""
+    mocker.patch.object(date_utils, 'STATS', date_utils.collections.Counter())
+    date_utils.clear_cache()
+    for _ in range(3):
+        assert date_utils.parse_date('Jan 2019', settings={'PREFER_DAY_OF_MONTH': 'first'}) == datetime.date(2019, 1, 1)
+        assert date_utils.parse_date('Jan 2019', settings={'PREFER_DAY_OF_MONTH': 'last'}) == datetime.date(2019, 1, 31)
+    assert date_utils.STATS == {('date', 'fallback'): 2}
+    info = date_utils.cache_info()['date']
+    assert (info.hits, info.misses, info.currsize) == (4, 2, 2)
+
+
+def test_parse_date_04():
+    """Ensure an unparseable date is memoized without losing the default value."""
+    date_utils.clear_cache()
+    assert date_utils.parse_date('Not a date', default=datetime.date.min) == datetime.date.min
+    with pytest.raises(ValueError):
+        date_utils.parse_date('Not a date')
+    assert date_utils.cache_info()['date'].hits == 1
+
+
+def test_set_cache_size_00():
+    """Ensure the size of the caches is bounded."""
+    try:
+        date_utils.set_cache_size(2)
+        for hour in range(1, 5):
+            date_utils.parse_time(f'{hour}:00')
+        info = date_utils.cache_info()['time']
+        assert (info.maxsize, info.currsize) == (2, 2)
+        date_utils.clear_cache()
+        assert date_utils.cache_info()['time'].currsize == 0
+    finally:
+        date_utils.set_cache_size()
@@ -376,6 +376,60 @@ class TestFatality:
         actual = deceased.process_deceased_field(input_)
         assert [fatality for fatality, err in actual] == expected
 
+    @pytest.mark.parametrize('input_,expected', [
+        pytest.param(['John', 'Doe', 'DOB', '1/2/90', 'born', 'Born'], 5, id='precedence'),
+        pytest.param(['John', 'Doe', 'DOB:', '1/2/90', 'DOB:'], 2, id='first-occurrence'),
+        pytest.param(['John', 'Doe'], -1, id='missing'),
+    ])
+    def test_dob_search_00(self, input_, expected):
+        """Ensure the DOB token with the highest precedence is found."""
+        assert deceased.dob_search(input_) == expected
+
+    @pytest.mark.parametrize('input_,expected', [
+        pytest.param('John Doe, White male, DOB 01/02/1990', ['comma', 'space'], id='comma'),
+        pytest.param('John Doe | White male | 01/02/1990', ['pipe', 'space'], id='pipe'),
+        pytest.param('John Doe W/M 01/02/1990', ['space'], id='space'),
+        pytest.param('John Doe, White male, 45 years of age', ['space', 'age'], id='age'),
+        pytest.param('Unidentified White male', ['space', 'unidentified'], id='unidentified'),
+    ])
+    def test_classify_deceased_field_00(self, input_, expected):
+        """Ensure the formats which cannot parse a deceased field are ruled out."""
+        formats = deceased.classify_deceased_field(input_, deceased.COMMA_DELIMITERS.split(input_))
+        assert [name for name, _ in formats] == expected
+
+    @pytest.mark.parametrize('input_', [
+        'John Doe W/M 01/02/1990',
+        'John Doe | White male | 01/02/1990',
+        'John Doe, White male, 45 years of age',
+        'Unidentified White male',
+        'Jane</p>',
+    ])
+    def test_classify_deceased_field_01(self, input_):
+        """Ensure the formats which are ruled out cannot parse the deceased field."""
+        parsers = {
+            'comma': deceased.parse_comma_delimited_deceased_field,
+            'pipe': deceased.parse_pipe_delimited_deceased_field,
+            'age': deceased.parse_age_deceased_field,
+            'unidentified': deceased.parse_unidentified,
+        }
+        formats = deceased.classify_deceased_field(input_, deceased.COMMA_DELIMITERS.split(input_))
+        for name in parsers.keys() - {name for name, _ in formats}:
+            with pytest.raises((ValueError, IndexError)):
+                parsers[name](input_)
+
+    def test_process_deceased_field_00(self, mocker):
+        """Ensure the format of each parsed deceased field is counted."""
+        mocker.patch.object(deceased, 'STATS', deceased.collections.Counter())
+        deceased.process_deceased_field('John Doe | White male | 01/02/1990')
+        deceased.process_deceased_field('Jane Doe | White female | 02/03/1991')
+        deceased.process_deceased_field('Unidentified White male')
+        assert deceased.STATS == {'pipe': 2, 'unidentified': 1}
+
+    def test_process_deceased_field_01(self):
+        """Ensure a deceased field without any date of birth is not parsed as a fatality born on the current day."""
+        with pytest.raises(ValueError):
+            deceased.process_deceased_field('Jane</p>')
+
     @pytest.mark.parametrize(
         'input_,expected',
         [
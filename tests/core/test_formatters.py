@@ -1,17 +1,27 @@
 """Test the formatter module."""
-import datetime
+import csv
+import io
+import json
 import sys
+import threading
 
 import pytest
 
 from scrapd.core.formatter import (
     CountFormatter,
+    CSVFIELDS,
     CSVFormatter,
+    FanOut,
     Formatter,
     JSONFormatter,
+    JSONLinesFormatter,
+    open_output,
     PythonFormatter,
+    to_csv_rows,
+    to_json,
 )
 from scrapd.core import model
+from tests.mock_reports import RESULTS
 
 
 class TestFormatter:
@@ -65,34 +75,203 @@ class TestFormatter:
         out, _ = capsys.readouterr()
         assert "case='19-2540190'" in out
 
+    def test_formatter_jsonl_00(self):
+        """Ensure each result is written as a compact JSON object on its own line."""
+        output = io.StringIO()
+        count = JSONLinesFormatter(output=output).printer(RESULTS * 2)
+        lines = output.getvalue().splitlines()
+        assert count == 2
+        assert len(lines) == 2
+        assert json.loads(lines[0]) == json.loads(to_json(RESULTS))[0]
+        assert lines[0].startswith('{"case":"19-2540190","crash":58,')
+
+    def test_formatter_jsonl_01(self):
+        """Ensure the compact mode writes the keys in the order of the fields."""
+        output = io.StringIO()
+        JSONLinesFormatter(output=output, compact=True).printer(RESULTS)
+        assert json.loads(output.getvalue()) == json.loads(to_json(RESULTS))[0]
+        assert output.getvalue().startswith('{"case":"19-2540190","crash":58,"date":"2019-09-11","fatalities":')
+        assert Formatter(format_='jsonl', output=output, compact=True)._get_formatter().compact
+
+    def test_to_json_00(self):
+        """Ensure the reports are serialized like their dictionaries."""
+        results = RESULTS + [model.Report(case='19-123456', notes='Café')]
+        expected = json.dumps(
+            [result.dict() for result in results],
+            sort_keys=True,
+            indent=2,
+            default=lambda value: getattr(value, 'value', None) or value.isoformat(),
+        )
+        assert to_json(results) == expected
+
+    def test_to_json_01(self):
+        """Ensure the compact mode does not indent the JSON."""
+        actual = to_json(RESULTS, compact=True)
+        assert '\n' not in actual
+        assert json.loads(actual) == json.loads(to_json(RESULTS))
+
+    @pytest.mark.asyncio
+    async def test_formatter_jsonl_02(self, mocker):
+        """Ensure the results of an asynchronous iterable are flushed in batches."""
+
+        async def results():
+            for _ in range(5):
+                yield RESULTS[0]
+
+        output = io.StringIO()
+        flush = mocker.spy(output, 'flush')
+        formatter = Formatter(format_='ndjson', output=output)._get_formatter()
+        formatter.batch_size = 2
+        formatter.flush_interval = 3600
+        assert isinstance(formatter, JSONLinesFormatter)
+        assert await formatter.aprinter(results()) == 5
+        assert len(output.getvalue().splitlines()) == 5
+        assert flush.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_formatter_aprint_00(self):
+        """Ensure the results of an asynchronous iterable are collected by the formatters which do not stream."""
+
+        async def results():
+            for entry in RESULTS:
+                yield entry
+
+        output = io.StringIO()
+        assert await Formatter(format_='count', output=output).aprint(results()) == 1
+        assert output.getvalue() == '1\n'
+
+    def test_formatter_csv_00(self):
+        """Ensure the rows follow the order of the CSV fields."""
+        entry = RESULTS[0]
+        fatality = entry.fatalities[0]
+        row = next(to_csv_rows(entry))
+        assert len(row) == len(CSVFIELDS)
+        report_fields = ['crash', 'case', 'date', 'time', 'location', 'link', 'notes']
+        fatality_fields = ['first', 'middle', 'last', 'generation', 'dob', 'age']
+        expected = {field: getattr(entry, field) for field in report_fields}
+        expected.update({field: getattr(fatality, field) for field in fatality_fields})
+        expected.update(ethnicity='White', gender='Male')
+        assert dict(zip(CSVFIELDS, row)) == expected
+
+    @pytest.mark.asyncio
+    async def test_formatter_csv_01(self):
+        """Ensure the rows of an asynchronous iterable are appended without the header."""
+
+        async def results():
+            for entry in RESULTS * 2:
+                yield entry
+
+        output = io.StringIO()
+        CSVFormatter(output=output).printer(RESULTS)
+        assert await CSVFormatter(output=output).aprinter(results(), append=True) == 2
+        rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+        assert len(rows) == 3
+        assert {row['case'] for row in rows} == {'19-2540190'}
+
+
+class TestFanOut:
+    """Test the fan-out of the results to several formatters."""
+
+    @pytest.mark.asyncio
+    async def test_aprint_00(self):
+        """Ensure each formatter prints all the results."""
+
+        async def results():
+            for entry in RESULTS * 3:
+                yield entry
+
+        outputs = {format_: io.StringIO() for format_ in ('count', 'csv', 'json', 'jsonl')}
+        fan_out = FanOut([Formatter(format_, output) for format_, output in outputs.items()])
+        assert await fan_out.aprint(results(), append=False) == 3
+        for format_, output in outputs.items():
+            expected = io.StringIO()
+            Formatter(format_, expected).print(RESULTS * 3)
+            assert output.getvalue() == expected.getvalue()
+
+    @pytest.mark.asyncio
+    async def test_aprint_01(self):
+        """Ensure a blocked output does not block the results."""
+        released = threading.Event()
+
+        class BlockedOutput(io.StringIO):
+
+            def write(self, value):
+                assert released.wait(5)
+                return super().write(value)
+
+        async def results():
+            for entry in RESULTS * 3:
+                yield entry
+            released.set()
+
+        fast, blocked = io.StringIO(), BlockedOutput()
+        assert await FanOut([Formatter('jsonl', fast), Formatter('jsonl', blocked)]).aprint(results()) == 3
+        assert blocked.getvalue() == fast.getvalue()
+
+    @pytest.mark.asyncio
+    async def test_aprint_02(self):
+        """Ensure the errors of the outputs are raised."""
+
+        class FailingOutput(io.StringIO):
+
+            def write(self, value):
+                raise OSError('No space left on device')
+
+        async def results():
+            for entry in RESULTS:
+                yield entry
+
+        with pytest.raises(OSError):
+            await FanOut([Formatter('json', io.StringIO()), Formatter('csv', FailingOutput())]).aprint(results())
+
+    @pytest.mark.asyncio
+    async def test_aprint_03(self):
+        """Ensure nothing is printed by the non-streaming formatters if the results cannot all be retrieved."""
+
+        async def results():
+            for entry in RESULTS:
+                yield entry
+            raise ValueError('Cannot retrieve news page #2.')
+
+        outputs = {format_: io.StringIO() for format_ in ('count', 'json', 'jsonl')}
+        with pytest.raises(ValueError):
+            await FanOut([Formatter(format_, output) for format_, output in outputs.items()]).aprint(results())
+        assert outputs['count'].getvalue() == outputs['json'].getvalue() == ''
+        assert len(outputs['jsonl'].getvalue().splitlines()) == len(RESULTS)
+
+
+class TestOpenOutput:
+    """Test the opening of the output files."""
+
+    def test_open_output_00(self, tmp_path):
+        """Ensure an output file is replaced once the results are written."""
+        path = tmp_path / 'results.csv'
+        path.write_text('previous')
+        with open_output(str(path)) as output:
+            output.write('results')
+            assert path.read_text() == 'previous'
+        assert path.read_text() == 'results'
+        assert list(tmp_path.iterdir()) == [path]
+
+    def test_open_output_01(self, tmp_path):
+        """Ensure an output file is kept intact if the results cannot be written."""
+        path = tmp_path / 'results.csv'
+        path.write_text('previous')
+        with pytest.raises(ValueError):
+            with open_output(str(path)) as output:
+                output.write('partial results')
+                raise ValueError('Cannot retrieve news page #2.')
+        assert path.read_text() == 'previous'
+        assert list(tmp_path.iterdir()) == [path]
+
+    def test_open_output_02(self, tmp_path):
+        """Ensure the results are appended directly to an output file."""
+        path = tmp_path / 'results.csv'
+        path.write_text('previous\n')
+        with open_output(str(path), append=True) as output:
+            output.write('results\n')
+        assert path.read_text() == 'previous\nresults\n'
 
-RESULTS = [
-    model.Report(
-        case='19-2540190',
-        crash=58,
-        date=datetime.date(2019, 9, 11),
-        fatalities=[
-            model.Fatality(
-                age=41,
-                dob=datetime.date(1978, 6, 19),
-                ethnicity=model.Ethnicity.white,
-                gender=model.Gender.male,
-                first='Joe',
-                last='Ogg',
-                middle='H',
-            ),
-        ],
-        link='http://austintexas.gov/news/traffic-fatality-58-4',
-        latitude=0.0,
-        location='Hwy 290 WB at the 183 SB Flyover',
-        longitude=0.0,
-        notes='The preliminary investigation shows Joe H. Ogg was driving a red, 2001 Harley Davidson Motorcycle '
-        'westbound on Hwy 290 to the southbound 183 flyover when he failed to negotiate the curve and struck a '
-        'wall with the bike. Joe Ogg went over the wall, falling into the westbound lanes of 290 below. He was '
-        'pronounced deceased on scene.',
-        time=datetime.time(4, 37),
-    )
-]
 
 RESULTS_BAD_TYPE = [
     {
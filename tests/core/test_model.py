@@ -316,3 +316,42 @@ class TestReportModel:
         """Ensure the report date is valid."""
         with pytest.raises(ValueError):
             model.Report(case='19-123456', date=datetime.date.min)
+
+
+class TestTrustedModel:
+    """Test the trusted construction of the models."""
+
+    def test_trusted_00(self):
+        """Ensure the missing values of a trusted model are set to their defaults."""
+        actual = model.Report.trusted(case='19-123456')
+        assert actual.dict() == model.Report(case='19-123456').dict()
+        assert actual.fatalities is not model.Report.trusted(case='19-123456').fatalities
+
+    def test_trusted_01(self):
+        """Ensure the trusted values are not validated."""
+        actual = model.Report.trusted(case='123456')
+        actual.assign('crash', '1')
+        assert (actual.case, actual.crash) == ('123456', '1')
+
+    def test_trusted_02(self, mocker):
+        """Ensure the trusted values are validated in strict mode."""
+        mocker.patch.object(model, 'STRICT_VALIDATION', True)
+        with pytest.raises(ValueError):
+            model.Report.trusted(case='123456')
+        actual = model.Report.trusted(case='19-123456')
+        actual.assign('crash', '1')
+        assert actual.crash == 1
+
+    def test_update_00(self):
+        """Ensure a model can be updated with trusted values."""
+        actual = model.Report(case='19-123456')
+        other = model.Report(case='19-654321', crash=1, fatalities=[model.Fatality(age=20)])
+        actual.update(other, trusted=True)
+        assert actual.dict() == other.dict()
+
+    def test_compute_fatalities_age_00(self):
+        """Ensure a negative age is still rejected."""
+        report = model.Report(case='19-123456', date=now.date(), fatalities=[model.Fatality(dob=now.date())])
+        report.fatalities[0].assign('dob', datetime.date(now.year + 2, 1, 1))
+        with pytest.raises(ValueError):
+            report.compute_fatalities_age()
@@ -0,0 +1,73 @@
+"""Test the record module."""
+import io
+
+import pytest
+
+from scrapd.core import model
+from scrapd.core import record
+from scrapd.core.formatter import CountFormatter
+from scrapd.core.formatter import CSVFormatter
+from scrapd.core.formatter import Formatter
+from scrapd.core.formatter import JSONFormatter
+from tests.mock_reports import RESULTS
+
+
+class TestReportRecord:
+    """Test the compact records of the reports."""
+
+    def test_from_report_00(self):
+        """Ensure a record holds the same values as its report."""
+        actual = record.ReportRecord.from_report(RESULTS[0])
+        assert actual.dict() == RESULTS[0].dict()
+        assert isinstance(actual.fatalities, tuple)
+        assert actual.fatalities[0].ethnicity is model.Ethnicity.white
+
+    def test_from_report_01(self):
+        """Ensure the records do not have per-instance dictionaries."""
+        actual = record.ReportRecord.from_report(RESULTS[0])
+        assert not hasattr(actual, '__dict__')
+        assert not hasattr(actual.fatalities[0], '__dict__')
+
+    def test_from_report_02(self):
+        """Ensure the repeated strings are shared."""
+        report = RESULTS[0].copy(deep=True)
+        report.location = ''.join(['Hwy 290 WB', ' at the 183 SB Flyover'])
+        assert report.location is not RESULTS[0].location
+        first = record.ReportRecord.from_report(RESULTS[0])
+        second = record.ReportRecord.from_report(report)
+        assert first.location is second.location
+
+    def test_to_report_00(self):
+        """Ensure a record is converted back to an identical report."""
+        actual = record.ReportRecord.from_report(RESULTS[0]).to_report()
+        assert isinstance(actual, model.Report)
+        assert isinstance(actual.fatalities[0], model.Fatality)
+        assert actual == RESULTS[0]
+
+    def test_record_00(self):
+        """Ensure the missing values are set to their defaults."""
+        actual = record.ReportRecord(case='19-123456')
+        assert actual.dict() == model.Report(case='19-123456').dict()
+        assert actual == record.ReportRecord(case='19-123456')
+        assert actual != record.ReportRecord(case='19-654321')
+        assert "case='19-123456'" in repr(actual)
+
+    def test_record_01(self):
+        """Ensure the base record has no fields."""
+        actual = record.Record()
+        assert actual.dict() == {}
+        assert repr(actual) == 'Record()'
+
+    @pytest.mark.parametrize('formatter', [CountFormatter, CSVFormatter, JSONFormatter])
+    def test_formatters_00(self, formatter):
+        """Ensure the records are formatted like the reports."""
+        expected, actual = io.StringIO(), io.StringIO()
+        formatter(output=expected).printer(RESULTS)
+        formatter(output=actual).printer([record.ReportRecord.from_report(report) for report in RESULTS])
+        assert actual.getvalue() == expected.getvalue()
+
+    def test_formatters_01(self):
+        """Ensure the default formatter displays the records."""
+        actual = io.StringIO()
+        Formatter(format_='default', output=actual).printer([record.ReportRecord.from_report(RESULTS[0])])
+        assert "case='19-2540190'" in actual.getvalue()
@@ -53,3 +53,34 @@ def test_parse_location_field_00(input_, expected):
     """Ensure."""
     actual = regex.match_location_field(input_)
     assert actual == expected
+
+
+def test_match_fields_00():
+    """Ensure all the labelled fields are extracted at once."""
+    page = ('<title>Fatality Crash #1 | AustinTexas.gov</title>'
+            '<p><strong>Case:</strong>           18-3640187</p>'
+            '<p><strong>Date:</strong>  Wednesday, Oct. 3, 2018</p>'
+            '<p><strong>Time:</strong>  8:47  P.M.</p>'
+            '<p><strong>Location:</strong>     183 service road</p>')
+    assert regex.match_fields(page) == {
+        'case': '18-3640187',
+        'crash': '1',
+        'date': '  Wednesday, Oct. 3, 2018',
+        'location': '183 service road',
+        'time': '8:47  P.M.',
+    }
+
+
+def test_match_fields_01():
+    """Ensure the first label followed by a valid value is used."""
+    page = 'Time: unknown. Traffic Fatality #x. Case: none</p><p>Time: 5:16 Traffic Fatality #12 Case: 19-0161105'
+    assert regex.match_fields(page, ['case', 'crash', 'time']) == {
+        'case': '19-0161105',
+        'crash': '12',
+        'time': '5:16',
+    }
+
+
+def test_match_fields_02():
+    """Ensure the missing fields are omitted."""
+    assert regex.match_fields('There is no field here') == {}
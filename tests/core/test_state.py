@@ -0,0 +1,37 @@
+"""Test the state module."""
+import datetime
+
+from scrapd.core import model
+from scrapd.core.state import CrawlState
+
+
+class TestCrawlState:
+    """Test the state of the incremental crawls."""
+
+    def test_load_00(self, tmp_path):
+        """Ensure a missing state file returns an empty state."""
+        state = CrawlState.load(tmp_path / 'state.json')
+        assert not state.links
+        assert not state.cases
+
+    def test_save_00(self, tmp_path):
+        """Ensure a saved state can be loaded back."""
+        state_file = tmp_path / 'state.json'
+        CrawlState({'http://fake.url'}, {'19-123456'}).save(state_file)
+        state = CrawlState.load(state_file)
+        assert state.links == {'http://fake.url'}
+        assert state.cases == {'19-123456'}
+
+    def test_update_00(self):
+        """Ensure the state records the links and the cases."""
+        state = CrawlState()
+        state.update(
+            ['http://fake.url/1', 'http://fake.url/2'],
+            [
+                model.Report(case='19-123456', date=datetime.date(2019, 1, 1)),
+                model.Report(case='19-654321', date=datetime.date(2019, 1, 3)),
+            ],
+        )
+        assert state.is_known('http://fake.url/1')
+        assert not state.is_known('http://fake.url/3')
+        assert state.cases == {'19-123456', '19-654321'}
@@ -0,0 +1,97 @@
+"""Test the store module."""
+import datetime
+import sqlite3
+
+import pytest
+
+from scrapd.core import model
+from scrapd.core.store import ReportStore
+from tests.mock_reports import RESULTS
+
+
+class TestReportStore:
+    """Test the SQLite storage of the reports."""
+
+    def test_upsert_00(self, tmp_path):
+        """Ensure a stored report is read back identically."""
+        with ReportStore(tmp_path / 'reports.sqlite') as store:
+            for report in RESULTS:
+                store.upsert(report)
+            for report in RESULTS:
+                assert store.get(report.case) == report
+            assert store.get('19-000000') is None
+
+    def test_upsert_01(self, tmp_path):
+        """Ensure a report is merged with the stored one."""
+        with ReportStore(tmp_path / 'reports.sqlite') as store:
+            store.upsert(model.Report(case='19-123456', location='Main St', crash=1))
+            store.upsert(
+                model.Report(
+                    case='19-123456',
+                    location='Other St',
+                    date=datetime.date(2019, 1, 2),
+                    fatalities=[model.Fatality(first='John', last='Doe')],
+                ))
+            actual = store.get('19-123456')
+            assert store.count() == 1
+            assert actual.location == 'Main St'
+            assert actual.crash == 1
+            assert actual.date == datetime.date(2019, 1, 2)
+            assert actual.fatalities == [model.Fatality(first='John', last='Doe')]
+
+    def test_upsert_02(self, tmp_path):
+        """Ensure the fatalities are replaced and not duplicated."""
+        with ReportStore(tmp_path / 'reports.sqlite') as store:
+            store.upsert(RESULTS[0])
+            store.upsert(RESULTS[0])
+            count = store.connection.execute('SELECT COUNT(*) FROM fatality').fetchone()[0]
+            assert count == len(RESULTS[0].fatalities)
+
+    def test_add_00(self, tmp_path):
+        """Ensure the reports are written in batches."""
+        path = tmp_path / 'reports.sqlite'
+        store = ReportStore(path, batch_size=2)
+        store.add(model.Report(case='19-000001'))
+        assert sqlite3.connect(path).execute('SELECT COUNT(*) FROM report').fetchone()[0] == 0
+        store.add(model.Report(case='19-000002'))
+        assert sqlite3.connect(path).execute('SELECT COUNT(*) FROM report').fetchone()[0] == 2
+        store.add(model.Report(case='19-000003'))
+        store.close()
+        assert sqlite3.connect(path).execute('SELECT COUNT(*) FROM report').fetchone()[0] == 3
+
+    def test_schema_00(self, tmp_path):
+        """Ensure the reports are indexed on the date and the crash number."""
+        with ReportStore(tmp_path / 'reports.sqlite') as store:
+            indexes = {row['name'] for row in store.connection.execute('PRAGMA index_list(report)')}
+        assert {'report_date', 'report_crash'} <= indexes
+
+    @pytest.mark.asyncio
+    async def test_tee_00(self, tmp_path):
+        """Ensure the reports are stored while they are yielded."""
+
+        async def reports():
+            for report in RESULTS:
+                yield report
+
+        with ReportStore(tmp_path / 'reports.sqlite') as store:
+            actual = [report async for report in store.tee(reports())]
+            store.flush()
+            assert actual == RESULTS
+            assert store.count() == len(RESULTS)
+
+    def test_query_00(self, tmp_path):
+        """Ensure the reports of a time range are read from the newest to the oldest."""
+        with ReportStore(tmp_path / 'reports.sqlite') as store:
+            for day in (1, 15, 31):
+                store.upsert(model.Report(case=f'19-0000{day:02}', date=datetime.date(2019, 1, day)))
+            store.upsert(model.Report(case='19-000201', date=datetime.date(2019, 2, 1)))
+            store.upsert(RESULTS[0])
+            actual = list(store.query(datetime.date(2019, 1, 1), datetime.date(2019, 1, 31)))
+            assert [report.case for report in actual] == ['19-000031', '19-000015', '19-000001']
+            assert next(store.query()) == RESULTS[0]
+
+    def test_query_01(self, tmp_path):
+        """Ensure the pending reports are written before the query."""
+        with ReportStore(tmp_path / 'reports.sqlite') as store:
+            store.add(RESULTS[0])
+            assert list(store.query()) == RESULTS
@@ -0,0 +1,32 @@
+"""Represent the mock data of the reports."""
+import datetime
+
+from scrapd.core import model
+
+RESULTS = [
+    model.Report(
+        case='19-2540190',
+        crash=58,
+        date=datetime.date(2019, 9, 11),
+        fatalities=[
+            model.Fatality(
+                age=41,
+                dob=datetime.date(1978, 6, 19),
+                ethnicity=model.Ethnicity.white,
+                gender=model.Gender.male,
+                first='Joe',
+                last='Ogg',
+                middle='H',
+            ),
+        ],
+        link='http://austintexas.gov/news/traffic-fatality-58-4',
+        latitude=0.0,
+        location='Hwy 290 WB at the 183 SB Flyover',
+        longitude=0.0,
+        notes='The preliminary investigation shows Joe H. Ogg was driving a red, 2001 Harley Davidson Motorcycle '
+        'westbound on Hwy 290 to the southbound 183 flyover when he failed to negotiate the curve and struck a '
+        'wall with the bike. Joe Ogg went over the wall, falling into the westbound lanes of 290 below. He was '
+        'pronounced deceased on scene.',
+        time=datetime.time(4, 37),
+    )
+]
@@ -4,7 +4,7 @@ from pytest_bdd import given
 from pytest_bdd import scenario
 from pytest_bdd import then
 
-from scrapd.core import apd
+from scrapd.core import crawl
 from scrapd.core import model
 from scrapd.core.formatter import Formatter
 from tests.test_common import TEST_ROOT_DIR
@@ -43,7 +43,7 @@ def time_range(from_date, to_date):
 @pytest.mark.asyncio
 def ensure_results(mocker, event_loop, output_format, time_range, crash_count, fatality_count):
     """Ensure we get the right amount of entries."""
-    results, _ = event_loop.run_until_complete(apd.async_retrieve(pages=-1, **time_range))
+    results, _ = event_loop.run_until_complete(crawl.async_retrieve(pages=-1, **time_range))
     assert results is not None
     assert isinstance(results, list)
     assert isinstance(results[0], model.Report)